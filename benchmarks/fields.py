@@ -0,0 +1,93 @@
+'''
+CPU time per call and size of the answer of the list of contacts read and
+serialized whole, and with a sparse fieldset that selects only the columns the
+client asked for.
+
+    $ python -m benchmarks.fields
+'''
+
+from asyncio import run
+from time import process_time
+
+from pydantic import TypeAdapter
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from src.database import Base, Contact, User, open_session
+from src.repository.contacts import read
+from src.schemas.contact import projection, Responses
+from src.services.responses import ResponseCache
+from src.services.settings import get_sql
+
+
+CALLS = 500
+CONTACTS = 200
+FIELDS = ('id', 'first_name', 'phone_number')
+
+
+async def measure(title: str, call) -> float:
+    size = len(await call())
+
+    start = process_time()
+
+    for _ in range(CALLS):
+        await call()
+
+    elapsed = (process_time() - start) / CALLS * 1e6
+
+    print(f'{title:<24} {elapsed:10.2f} us/call {size:10} bytes')
+
+    return elapsed
+
+
+async def main() -> None:
+    engine = create_async_engine(
+        'sqlite+aiosqlite:///:memory:',
+        poolclass=StaticPool,
+        query_cache_size=get_sql().query_cache_size,
+    )
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+        await conn.execute(insert(User), [
+            {'email': 'jack@post.com', 'password': 'secret'},
+        ])
+
+        await conn.execute(insert(Contact), [
+            {
+                'first_name': f'Contact {number}',
+                'last_name': 'Surname',
+                'email': f'contact{number}@post.com',
+                'phone_number': f'+38050{number:07}',
+                'bio': 'x' * 400,
+                'user_id': 1,
+            }
+            for number in range(CONTACTS)
+        ])
+
+    serializer = TypeAdapter(Responses)
+
+    async with open_session(engine) as db:
+        user = await db.get(User, 1)
+
+        async def whole() -> str:
+            return ResponseCache.serialize(serializer, await read(db, user))
+
+        async def sparse() -> str:
+            return ResponseCache.serialize(
+                projection(FIELDS),
+                await read(db, user, fields=FIELDS),
+            )
+
+        full = await measure('whole contacts', whole)
+        partial = await measure('id,first_name,phone', sparse)
+
+        print(f'{"":<24} {(1 - partial / full) * 100:10.1f} % saved')
+
+    await engine.dispose()
+
+
+if __name__ == '__main__':
+    run(main())
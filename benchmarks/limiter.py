@@ -0,0 +1,51 @@
+'''
+Overhead of the rate limiter per request.
+
+    $ python -m benchmarks.limiter
+'''
+
+from asyncio import run
+from os import environ
+from time import perf_counter
+
+from src.services import cache
+from src.services.limiter import Limiter, Quota
+from src.services.settings import get_ratelimit
+from tests.fake_redis import FakeRedis
+
+
+REQUESTS = 100_000
+USERS = 1_000
+
+
+async def measure(title: str, batch: int, redis: FakeRedis = None) -> None:
+    environ['RATELIMIT_BATCH'] = str(batch)
+    environ['RATELIMIT_INTERVAL'] = '60'
+    get_ratelimit.cache_clear()
+
+    limiter = Limiter(Quota(REQUESTS, 60))
+    cache.cache = redis
+
+    start = perf_counter()
+
+    for request in range(REQUESTS):
+        await limiter.hit(request % USERS, 'read_contacts')
+
+    elapsed = perf_counter() - start
+
+    print(
+        f'{title:<32} {elapsed / REQUESTS * 1e6:8.2f} us/request',
+        f'{redis.round_trips / REQUESTS:6.3f} round trips/request'
+        if redis else '',
+    )
+
+
+async def main() -> None:
+    await measure('local only', 10)
+    await measure('sync every request', 1, FakeRedis())
+    await measure('sync in batches of 10', 10, FakeRedis())
+    await measure('sync in batches of 100', 100, FakeRedis())
+
+
+if __name__ == '__main__':
+    run(main())
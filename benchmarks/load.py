@@ -0,0 +1,328 @@
+'''
+Load test of the whole API against a local database and an in-process cache.
+
+    $ python -m benchmarks.load --users 50 --contacts 200 --concurrency 32 \
+        --requests 5000 --output load.json
+
+The database is SQLite unless another URL is given with --database, for
+example a local PostgreSQL server. The results are printed and saved as JSON
+together with the current commit, so that two runs can be compared. The
+answers with an error status are counted per flow and left out of the
+latencies, and the run fails if there are any of them.
+'''
+
+from argparse import ArgumentParser, Namespace
+from asyncio import Lock, gather, run
+from collections import Counter
+from datetime import date
+from json import dump
+from os import environ, remove
+from os.path import exists
+from random import choice, choices, randrange, seed
+from statistics import quantiles
+from subprocess import run as execute
+from sys import exit
+from time import perf_counter
+from typing import Iterator
+from uuid import uuid4
+
+
+def parse() -> Namespace:
+    parser = ArgumentParser(description=__doc__.split('\n')[1])
+
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--contacts', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--database', default='sqlite+aiosqlite:///load.db')
+    parser.add_argument('--output', default='load.json')
+    parser.add_argument('--seed', type=int, default=0)
+
+    return parser.parse_args()
+
+
+ARGS = parse()
+
+environ['POSTGRES_URL'] = ARGS.database
+environ['RATELIMIT_DEFAULT'] = '1000000/60'
+
+from httpx import ASGITransport, AsyncClient, Response  # noqa: E402
+from sqlalchemy import insert, make_url  # noqa: E402
+
+from main import app  # noqa: E402
+from src import database  # noqa: E402
+from src.services import cache  # noqa: E402
+from src.services.auth import auth_service  # noqa: E402
+from tests.fake_redis import FakeRedis, FakeSyncRedis  # noqa: E402
+
+
+PASSWORD = 'secret'
+
+# The share of every flow in the generated load.
+FLOWS = {
+    'list': 30,
+    'get': 20,
+    'birthdays': 15,
+    'create': 10,
+    'update': 10,
+    'delete': 5,
+    'refresh': 7,
+    'login': 3,
+}
+
+
+async def prepare() -> None:
+    '''
+    Creating the schema and seeding the users with their contacts. The
+    password of all the users is hashed only once.
+    '''
+
+    url = make_url(ARGS.database)
+
+    if url.get_backend_name() == 'sqlite' and url.database \
+            and exists(url.database):
+        remove(url.database)
+
+    await database.init_db_once()
+
+    async with database.engine.begin() as conn:
+        await conn.run_sync(database.Base.metadata.drop_all)
+        await conn.run_sync(database.Base.metadata.create_all)
+
+        password = auth_service.get_password_hash(PASSWORD)
+
+        await conn.execute(insert(database.User), [
+            {
+                'email': f'user{user}@post.com',
+                'password': password,
+                'verified': True,
+            }
+            for user in range(ARGS.users)
+        ])
+
+        await conn.execute(insert(database.Contact), [
+            {
+                'first_name': f'Contact {contact}',
+                'email': f'contact{user}.{contact}@post.com',
+                'phone_number': f'+380{randrange(10 ** 9):09}',
+                'birthday': date(1990, randrange(1, 13), randrange(1, 29)),
+                'bio': 'Bla ' * 50,
+                'user_id': user + 1,
+            }
+            for user in range(ARGS.users)
+            for contact in range(ARGS.contacts)
+        ])
+
+    cache.cache = FakeRedis()
+    auth_service._Auth__cache = FakeSyncRedis()
+
+
+class User:
+    '''
+    A virtual user that logs in once and then runs random flows, one at a
+    time, so that its flows do not race for the same contacts.
+    '''
+
+    def __init__(self, client: AsyncClient, number: int) -> None:
+        self.client = client
+        self.email = f'user{number}@post.com'
+        self.contacts: list[int] = []
+        self.tokens: dict = {}
+        self.lock = Lock()
+
+    @property
+    def headers(self) -> dict:
+        return {'Authorization': f"Bearer {self.tokens['access_token']}"}
+
+    async def login(self) -> Response:
+        response = await self.client.post('/api/auth/login', data={
+            'username': self.email,
+            'password': PASSWORD,
+        })
+
+        if response.status_code == 200:
+            self.tokens = response.json()
+
+        return response
+
+    async def refresh(self) -> Response:
+        response = await self.client.get(
+            '/api/auth/refresh-token',
+            headers={
+                'Authorization': f"Bearer {self.tokens['refresh_token']}",
+            },
+        )
+
+        if response.status_code == 200:
+            self.tokens = response.json()
+
+        return response
+
+    async def list(self) -> Response:
+        response = await self.client.get('/api/contacts/', headers=self.headers)
+
+        if response.status_code == 200:
+            self.contacts = [contact['id'] for contact in response.json()]
+
+        return response
+
+    async def get(self) -> Response | None:
+        if self.contacts:
+            return await self.client.get(
+                f'/api/contacts/{choice(self.contacts)}',
+                headers=self.headers,
+            )
+
+    async def birthdays(self) -> Response:
+        return await self.client.get(
+            '/api/contacts/birthdays',
+            params={'days': 30},
+            headers=self.headers,
+        )
+
+    async def create(self) -> Response:
+        response = await self.client.post(
+            '/api/contacts/',
+            json={'first_name': 'Jack', 'email': f'{uuid4().hex}@post.com'},
+            headers=self.headers,
+        )
+
+        if response.status_code == 201:
+            self.contacts.append(response.json()['id'])
+
+        return response
+
+    async def update(self) -> Response | None:
+        if self.contacts:
+            return await self.client.put(
+                f'/api/contacts/{choice(self.contacts)}',
+                json={'first_name': 'Jack', 'email': f'{uuid4().hex}@post.com'},
+                headers=self.headers,
+            )
+
+    async def delete(self) -> Response | None:
+        if self.contacts:
+            return await self.client.delete(
+                f'/api/contacts/{self.contacts.pop()}',
+                headers=self.headers,
+            )
+
+
+async def drive(
+    users: list[User],
+    plan: Iterator[int],
+    latencies: dict[str, list],
+    errors: dict[str, Counter]
+) -> None:
+    '''
+    Running the flows until the planned number of requests is sent. The plan
+    is shared by all the concurrent drivers. The flows that had nothing to
+    work on are not counted, and the answers with an error status are
+    counted by their status instead of their latency.
+    '''
+
+    for _ in plan:
+        user = choice(users)
+        flow = choices(list(FLOWS), list(FLOWS.values()))[0]
+
+        async with user.lock:
+            start = perf_counter()
+            response = await getattr(user, flow)()
+            elapsed = perf_counter() - start
+
+        if response is None:
+            continue
+
+        if response.is_error:
+            errors.setdefault(flow, Counter())[response.status_code] += 1
+        else:
+            latencies.setdefault(flow, []).append(elapsed)
+
+
+def summarize(values: list[float], failed: int, elapsed: float) -> dict:
+    cuts = quantiles(values, n=100, method='inclusive') \
+        if len(values) > 1 else values * 99 or [0] * 99
+
+    return {
+        'requests': len(values),
+        'errors': failed,
+        'rps': round(len(values) / elapsed, 1),
+        **{
+            f'p{percentile}': round(cuts[percentile - 1] * 1000, 2)
+            for percentile in (50, 95, 99)
+        },
+    }
+
+
+async def main() -> None:
+    seed(ARGS.seed)
+
+    await prepare()
+
+    latencies: dict[str, list] = {}
+    errors: dict[str, Counter] = {}
+
+    async with AsyncClient(
+        transport=ASGITransport(app),
+        base_url='http://test',
+    ) as client:
+        users = [User(client, number) for number in range(ARGS.users)]
+
+        for response in await gather(*(user.login() for user in users)):
+            response.raise_for_status()
+
+        plan = iter(range(ARGS.requests))
+        start = perf_counter()
+
+        await gather(*(
+            drive(users, plan, latencies, errors)
+            for _ in range(ARGS.concurrency)
+        ))
+
+        elapsed = perf_counter() - start
+
+    commit = execute(
+        ['git', 'rev-parse', '--short', 'HEAD'],
+        capture_output=True,
+        text=True,
+    ).stdout.strip()
+
+    result = {
+        'commit': commit,
+        'settings': vars(ARGS),
+        'total': summarize(
+            [value for values in latencies.values() for value in values],
+            sum(codes.total() for codes in errors.values()),
+            elapsed,
+        ),
+        'flows': {
+            flow: summarize(
+                latencies.get(flow, []),
+                errors.get(flow, Counter()).total(),
+                elapsed,
+            )
+            for flow in sorted(latencies.keys() | errors.keys())
+        },
+        'errors': {
+            flow: {str(code): count for code, count in sorted(codes.items())}
+            for flow, codes in sorted(errors.items())
+        },
+    }
+
+    print(f"{'flow':<12}{'requests':>10}{'errors':>10}{'rps':>10}"
+          f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+
+    for flow, row in (*result['flows'].items(), ('total', result['total'])):
+        print(f'{flow:<12}' + ''.join(f'{value:>10}' for value in row.values()))
+
+    with open(ARGS.output, 'w') as file:
+        dump(result, file, indent=2)
+
+    await database.engine.dispose()
+
+    if errors:
+        exit(f"Errors: {result['errors']}")
+
+
+if __name__ == '__main__':
+    run(main())
@@ -0,0 +1,56 @@
+'''
+Overhead of the metrics middleware per request.
+
+    $ python -m benchmarks.metrics
+'''
+
+from asyncio import run
+from time import perf_counter
+
+from starlette.routing import Route
+
+from src.services.metrics import MetricsMiddleware
+
+
+REQUESTS = 200_000
+
+ROUTE = Route('/api/contacts/{contact_id}', lambda request: None)
+
+
+async def app(scope: dict, receive, send) -> None:
+    scope['route'] = ROUTE
+
+    await send({'type': 'http.response.start', 'status': 200})
+    await send({'type': 'http.response.body', 'body': b''})
+
+
+async def receive() -> dict:
+    return {'type': 'http.request'}
+
+
+async def send(message: dict) -> None:
+    ...
+
+
+async def measure(title: str, application) -> float:
+    start = perf_counter()
+
+    for _ in range(REQUESTS):
+        await application({'type': 'http', 'method': 'GET'}, receive, send)
+
+    elapsed = (perf_counter() - start) / REQUESTS * 1e6
+
+    print(f'{title:<24} {elapsed:8.2f} us/request')
+
+    return elapsed
+
+
+async def main() -> None:
+    bare = await measure('without middleware', app)
+    measured = await measure('with middleware', MetricsMiddleware(app))
+
+    print(f'{"overhead":<24} {measured - bare:8.2f} us/request')
+
+
+if __name__ == '__main__':
+    run(main())
@@ -0,0 +1,58 @@
+'''
+Overhead of the revocation check per request: the local bloom filter against
+a lookup in the caching service for every token. The in-process stand-in of
+the caching service leaves the network out, so a real deployment adds its
+round trip to the second figure.
+
+    $ python -m benchmarks.revocation
+'''
+
+from asyncio import run
+from time import perf_counter, time
+from uuid import uuid4
+
+from src.services import cache
+from src.services.revocation import Revocations
+from tests.fake_redis import FakeRedis
+
+
+CHECKS = 200_000
+REVOKED = 10_000
+
+
+async def measure(title: str, check, tokens: list[str]) -> float:
+    start = perf_counter()
+
+    for token in tokens:
+        await check(token)
+
+    elapsed = (perf_counter() - start) / len(tokens) * 1e6
+
+    print(f'{title:<24} {elapsed:8.2f} us/request')
+
+    return elapsed
+
+
+async def main() -> None:
+    cache.cache = FakeRedis()
+    revocations = Revocations()
+    expires = time() + 900
+
+    for _ in range(REVOKED):
+        await revocations.revoke(uuid4().hex, expires)
+
+    await revocations.sync()
+
+    tokens = [uuid4().hex for _ in range(CHECKS)]
+
+    async def lookup(jti: str) -> bool:
+        return await cache.cache.zscore(Revocations.KEY, jti) is not None
+
+    await measure('bloom filter', revocations.revoked, tokens)
+    await measure('cache lookup', lookup, tokens)
+
+    print('The cache lookup also waits for a network round trip per request.')
+
+
+if __name__ == '__main__':
+    run(main())
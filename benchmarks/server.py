@@ -0,0 +1,108 @@
+'''
+Throughput of the production launcher against the development entry point,
+both serving the health check over real sockets.
+
+    $ python -m benchmarks.server --requests 5000 --concurrency 64
+
+The servers use the database and the caching service of the environment,
+for example those started by docker compose.
+'''
+
+from argparse import ArgumentParser, Namespace
+from asyncio import gather, run, sleep
+from os import environ, killpg
+from signal import SIGTERM
+from statistics import quantiles
+from subprocess import Popen
+from sys import executable
+from time import perf_counter
+
+from httpx import AsyncClient, HTTPError, Limits
+
+
+def parse() -> Namespace:
+    parser = ArgumentParser(description=__doc__.split('\n')[1])
+
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--path', default='/api/healthchecker')
+
+    return parser.parse_args()
+
+
+TARGETS = {
+    'main.py': ([executable, 'main.py'], 8000),
+    'server.py': ([executable, 'server.py'], 8001),
+}
+
+
+async def wait(client: AsyncClient, url: str) -> None:
+    for _ in range(100):
+        try:
+            await client.get(url)
+
+            return
+        except HTTPError:
+            await sleep(.2)
+
+    raise RuntimeError(f'{url} is not available')
+
+
+async def load(url: str, args: Namespace) -> dict:
+    latencies = []
+    plan = iter(range(args.requests))
+
+    async with AsyncClient(
+        limits=Limits(max_connections=args.concurrency),
+        timeout=30,
+    ) as client:
+        await wait(client, url)
+
+        async def drive() -> None:
+            for _ in plan:
+                start = perf_counter()
+
+                await client.get(url)
+
+                latencies.append(perf_counter() - start)
+
+        start = perf_counter()
+
+        await gather(*(drive() for _ in range(args.concurrency)))
+
+        elapsed = perf_counter() - start
+
+    cuts = quantiles(latencies, n=100)
+
+    return {
+        'rps': round(len(latencies) / elapsed, 1),
+        'p50 ms': round(cuts[49] * 1000, 2),
+        'p99 ms': round(cuts[98] * 1000, 2),
+    }
+
+
+def main() -> None:
+    args = parse()
+
+    print(f"{'entry point':<12}{'rps':>10}{'p50 ms':>10}{'p99 ms':>10}")
+
+    for title, (command, port) in TARGETS.items():
+        process = Popen(
+            command,
+            env=environ | {'SERVER_PORT': str(port)},
+            start_new_session=True,
+        )
+
+        try:
+            result = run(load(f'http://127.0.0.1:{port}{args.path}', args))
+        finally:
+            killpg(process.pid, SIGTERM)
+            process.wait()
+
+        print(f'{title:<12}' + ''.join(
+            f'{value:>10}' for value in result.values()
+        ))
+
+
+if __name__ == '__main__':
+    main()
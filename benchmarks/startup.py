@@ -0,0 +1,111 @@
+'''
+Cold start of a worker: the import of the application and the latency of its
+first request, in fresh interpreters, with the heavy libraries that are now
+imported when first used and with them imported up front, as they were
+before.
+
+    $ python -m benchmarks.startup --runs 10
+
+The first request uses the database of the environment.
+'''
+
+from argparse import ArgumentParser, Namespace
+from json import loads
+from statistics import median
+from subprocess import run
+from sys import executable
+
+
+EAGER = ('cloudinary.uploader', 'fastapi_mail', 'passlib.context')
+
+WORKER = '''
+from asyncio import run
+from json import dumps
+from sys import argv, modules
+from time import perf_counter
+
+start = perf_counter()
+
+for name in argv[2:]:
+    __import__(name)
+
+from httpx import ASGITransport, AsyncClient
+
+from main import app
+
+imported = perf_counter()
+
+
+async def request() -> float:
+    async with AsyncClient(
+        transport=ASGITransport(app),
+        base_url='http://test',
+    ) as client:
+        (await client.get(argv[1])).raise_for_status()
+
+    answered = perf_counter()
+
+    from src import database
+
+    await database.engine.dispose()
+
+    return answered
+
+
+answered = run(request())
+
+print(dumps({
+    'import ms': (imported - start) * 1000,
+    'first request ms': (answered - imported) * 1000,
+    'modules': len(modules),
+}))
+'''
+
+
+def parse() -> Namespace:
+    parser = ArgumentParser(description=__doc__.split('\n')[1])
+
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--path', default='/api/healthchecker')
+
+    return parser.parse_args()
+
+
+def measure(args: Namespace, modules: tuple[str, ...]) -> dict:
+    results = [
+        loads(run(
+            [executable, '-c', WORKER, args.path, *modules],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout)
+        for _ in range(args.runs)
+    ]
+
+    return {
+        key: median(result[key] for result in results)
+        for key in results[0]
+    }
+
+
+def main() -> None:
+    args = parse()
+
+    print(
+        f"{'imports':<8}{'import ms':>12}{'first request ms':>18}"
+        f"{'modules':>10}"
+    )
+
+    for title, modules in (('lazy', ()), ('eager', EAGER)):
+        result = measure(args, modules)
+
+        print(
+            f'{title:<8}'
+            f"{result['import ms']:>12.1f}"
+            f"{result['first request ms']:>18.1f}"
+            f"{result['modules']:>10.0f}"
+        )
+
+
+if __name__ == '__main__':
+    main()
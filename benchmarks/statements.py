@@ -0,0 +1,109 @@
+'''
+CPU time per call of the hot queries built as a fresh construct on every call,
+as they were before, and as cached lambda statements.
+
+    $ python -m benchmarks.statements
+'''
+
+from asyncio import run
+from time import process_time
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from src.database import Base, Contact, User, open_session
+from src.repository.contacts import get, read
+from src.services.auth import auth_service
+from src.services.settings import get_sql
+
+
+CALLS = 5_000
+
+
+async def fresh_get(db, user: User, contact_id: int) -> Contact:
+    query = select(Contact).filter_by(id=contact_id, user=user)
+
+    return (await db.execute(query)).scalar_one_or_none()
+
+
+async def fresh_read(db, user: User) -> list[Contact]:
+    query = select(Contact).where(Contact.user == user)
+
+    return (await db.execute(query)).scalars().all()
+
+
+async def fresh_user(db, email: str) -> User:
+    query = select(User).where(User.email == email)
+
+    return (await db.execute(query)).scalar_one_or_none()
+
+
+async def measure(title: str, call) -> float:
+    await call()
+
+    start = process_time()
+
+    for _ in range(CALLS):
+        await call()
+
+    elapsed = (process_time() - start) / CALLS * 1e6
+
+    print(f'{title:<24} {elapsed:8.2f} us/call')
+
+    return elapsed
+
+
+async def main() -> None:
+    engine = create_async_engine(
+        'sqlite+aiosqlite:///:memory:',
+        poolclass=StaticPool,
+        query_cache_size=get_sql().query_cache_size,
+    )
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+        await conn.execute(insert(User), [
+            {'email': 'jack@post.com', 'password': 'secret'},
+        ])
+
+        await conn.execute(insert(Contact), [
+            {
+                'first_name': f'Contact {number}',
+                'email': f'contact{number}@post.com',
+                'user_id': 1,
+            }
+            for number in range(10)
+        ])
+
+    async with open_session(engine) as db:
+        user = await db.get(User, 1)
+
+        for title, before, after in (
+            (
+                'get',
+                lambda: fresh_get(db, user, 1),
+                lambda: get(db, user, 1),
+            ),
+            (
+                'read',
+                lambda: fresh_read(db, user),
+                lambda: read(db, user),
+            ),
+            (
+                'user by email',
+                lambda: fresh_user(db, user.email),
+                lambda: auth_service.get_user_by_email(user.email, db),
+            ),
+        ):
+            fresh = await measure(f'{title}, fresh', before)
+            cached = await measure(f'{title}, cached', after)
+
+            print(f'{title:<24} {(1 - cached / fresh) * 100:8.1f} % saved\n')
+
+    await engine.dispose()
+
+
+if __name__ == '__main__':
+    run(main())
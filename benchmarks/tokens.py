@@ -0,0 +1,88 @@
+'''
+Throughput of signing and verifying tokens by algorithm, with the keys parsed
+once by the token signer of the application.
+
+    $ python -m benchmarks.tokens
+'''
+
+from time import perf_counter, time
+from uuid import uuid4
+
+from cryptography.hazmat.primitives.asymmetric.ec import SECP256R1, \
+    generate_private_key as generate_ec_key
+from cryptography.hazmat.primitives.asymmetric.ed25519 import \
+    Ed25519PrivateKey
+from cryptography.hazmat.primitives.asymmetric.rsa import \
+    generate_private_key as generate_rsa_key
+from cryptography.hazmat.primitives.serialization import Encoding, \
+    NoEncryption, PrivateFormat, PublicFormat
+
+from src.services.tokens import Signer
+
+
+ROUNDS = 2_000
+SECRET = 'secret' * 11
+
+
+def signers() -> dict[str, tuple[Signer, Signer]]:
+    '''
+    A signer with the private key and a verifier with the public key only, or
+    the same signer twice for the algorithms with a shared secret.
+    '''
+
+    result = {
+        algorithm: (Signer(algorithm, SECRET),) * 2
+        for algorithm in Signer.HMAC
+    }
+
+    for algorithm, private in (
+        ('ES256', generate_ec_key(SECP256R1())),
+        ('EdDSA', Ed25519PrivateKey.generate()),
+        ('RS256', generate_rsa_key(65537, 2048)),
+    ):
+        result[algorithm] = (
+            Signer(algorithm, private_key=private.private_bytes(
+                Encoding.PEM,
+                PrivateFormat.PKCS8,
+                NoEncryption(),
+            )),
+            Signer(algorithm, public_key=private.public_key().public_bytes(
+                Encoding.PEM,
+                PublicFormat.SubjectPublicKeyInfo,
+            )),
+        )
+
+    return result
+
+
+def measure(title: str, call) -> float:
+    start = perf_counter()
+
+    for _ in range(ROUNDS):
+        call()
+
+    rate = ROUNDS / (perf_counter() - start)
+
+    print(f'{title:<24} {rate:10.0f} tokens/s')
+
+    return rate
+
+
+def main() -> None:
+    payload = {
+        'sub': 'jack@post.com',
+        'iat': int(time()),
+        'exp': int(time()) + 900,
+        'jti': uuid4().hex,
+        'scope': 'access_token',
+    }
+
+    for algorithm, (signer, verifier) in signers().items():
+        token = signer.encode(payload)
+
+        measure(f'{algorithm} sign', lambda: signer.encode(payload))
+        measure(f'{algorithm} verify', lambda: verifier.decode(token))
+
+
+if __name__ == '__main__':
+    main()
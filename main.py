@@ -2,52 +2,108 @@ from contextlib import asynccontextmanager
 
 from fastapi import Depends, FastAPI, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi_limiter import FastAPILimiter
-from redis.asyncio import Redis as InitRedis
+from fastapi.responses import PlainTextResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.sql import text
 from uvicorn import run
 
-from src.database import get_db
+from src.database import get_db, start_probe, stop_probe
 from src.routes.auth import router as auth_router
 from src.routes.contacts import router as contacts_router
+from src.routes.profiler import router as profiler_router
 from src.routes.users import router as users_router
-from src.services.environment import environment
+from src.services.admission import AdmissionMiddleware
+from src.services.breakers import Breaker, breakers
+from src.services.cache import close_cache, init_cache
+from src.services.email import outbox
+from src.services.events import broker
+from src.services.idempotency import IdempotencyMiddleware
+from src.services.metrics import MetricsMiddleware, render
+from src.services.profiler import ProfilerMiddleware
+from src.services.queries import QueryMiddleware
+from src.services.revocation import revocations
+from src.services.sessions import sessions
+from src.services.settings import get_profiling, validate
+from src.services.stats import reconciler
 
 
 @asynccontextmanager
 async def launch(app: FastAPI):
     '''
-    Connecting the cache to the system for determining limits on the number of requests.
+    Validating the settings of all the subsystems, so that an invalid one stops
+    the application at boot, and connecting the cache to the system for
+    determining limits on the number of requests and for delivering contact
+    change events between workers, writing the
+    refresh tokens kept by it to the database, mirroring the revoked access
+    tokens, sending again the e-mails that failed, reconciling the counters
+    of the contacts and checking the read replicas in the background.
 
     :param app: Application object.
     :type app: FastAPI
     '''
 
-    cache = await InitRedis(
-        **environment('REDIS', True, True),
-        db=0,
-        encoding='utf-8',
-        decode_responses=True,
-    )
+    validate()
 
-    await FastAPILimiter.init(cache)
+    await init_cache()
+
+    broker.start()
+    sessions.start()
+    outbox.start()
+    reconciler.start()
+    start_probe()
+
+    await revocations.start()
 
     yield
 
+    await revocations.stop()
+    await stop_probe()
+    await reconciler.stop()
+    await outbox.stop()
+    await sessions.stop()
+    await broker.stop()
+    await close_cache()
+
 
 app = FastAPI(lifespan=launch)
 
+app.add_middleware(QueryMiddleware)
 app.add_middleware(
-    CORSMiddleware,
-    allow_credentials=True,
-    **{f'allow_{name}s': ['*'] for name in ('origin', 'method', 'header')},
+    IdempotencyMiddleware,
+    routes={('POST', '/api/contacts/'), ('POST', '/api/auth/signup')},
+)
+app.add_middleware(
+    AdmissionMiddleware,
+    expensive={
+        ('POST', '/api/auth/signup'),
+        ('POST', '/api/auth/login'),
+        ('PATCH', '/api/users/'),
+    },
+    exempt={
+        '/api/healthchecker',
+        '/api/readiness',
+        '/metrics',
+        '/api/contacts/events',
+    },
 )
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(auth_router, prefix='/api')
 app.include_router(contacts_router, prefix='/api')
 app.include_router(users_router, prefix='/api')
 
+if get_profiling().token:
+    app.add_middleware(ProfilerMiddleware)
+    app.include_router(profiler_router, prefix='/api')
+
+# Added last to be the outermost, so that the answers of the other middleware,
+# such as the rejections of the overloaded worker, also carry its headers.
+app.add_middleware(
+    CORSMiddleware,
+    allow_credentials=True,
+    **{f'allow_{name}s': ['*'] for name in ('origin', 'method', 'header')},
+)
+
 
 @app.get('/api/healthchecker', tags=['Status'])
 async def root(db: AsyncSession = Depends(get_db)) -> dict:
@@ -82,5 +138,42 @@ async def root(db: AsyncSession = Depends(get_db)) -> dict:
         )
 
 
+@app.get('/api/readiness', tags=['Status'])
+async def readiness() -> dict:
+    '''
+    Endpoint for determining whether the worker serves its requests normally
+    or with the fallbacks of the external dependencies whose breakers are not
+    closed: the database instead of the user cache, the local rate limiter
+    and the queue of the unsent e-mails. Unlike the health check, it does not
+    call any of them.
+
+    :return: The state of the worker, ``ready`` or ``degraded``, and the
+        states of the breakers.
+    :rtype: dict
+    '''
+
+    states = {name: item.state for name, item in breakers.items()}
+
+    return {
+        'status': 'ready' if all(
+            state == Breaker.CLOSED for state in states.values()
+        ) else 'degraded',
+        'breakers': states,
+    }
+
+
+@app.get('/metrics', include_in_schema=False)
+async def metrics() -> PlainTextResponse:
+    '''
+    Operational metrics of the current worker in the Prometheus text format.
+
+    :return: Request latencies and counts, the state of the database pool,
+        the user cache, the rate limiter and the e-mail queue.
+    :rtype: PlainTextResponse
+    '''
+
+    return PlainTextResponse(render(), media_type='text/plain; version=0.0.4')
+
+
 if __name__ == '__main__':
     run('main:app', host='0.0.0.0', port=8000, reload=True)
@@ -0,0 +1,134 @@
+'''
+Production launcher: a pre-forking supervisor of uvicorn workers.
+
+    $ python server.py
+
+The application is imported once by the supervisor and the workers are forked
+from it, sharing the listening socket, so they start without importing it
+again. Every worker runs uvloop and httptools and gets an equal share of the
+database connections, so that all of them together stay under the limit of
+the server. A worker that dies is replaced.
+'''
+
+from contextlib import suppress
+from os import _exit, cpu_count, fork, getpid, kill, waitpid, WNOHANG
+from signal import SIG_DFL, SIGINT, SIGTERM, signal
+from socket import socket
+from time import sleep
+
+from uvicorn import Config, Server
+
+from main import app
+from src import database
+from src.services.settings import get_server, validate
+
+
+def configure() -> Config:
+    settings = get_server()
+
+    return Config(
+        app,
+        host=settings.host,
+        port=settings.port,
+        loop='uvloop',
+        http='httptools',
+        timeout_keep_alive=settings.keepalive,
+        backlog=settings.backlog,
+        limit_concurrency=settings.concurrency,
+        access_log=settings.access_log,
+        proxy_headers=True,
+        server_header=False,
+    )
+
+
+def spawn(config: Config, sock: socket) -> int:
+    '''
+    Forking a worker that serves the shared socket until it is terminated.
+
+    :param config: The settings of the server.
+    :type config: Config
+    :param sock: The listening socket.
+    :type sock: socket
+    :return: The process identifier of the worker.
+    :rtype: int
+    '''
+
+    if (pid := fork()):
+        return pid
+
+    for number in (SIGINT, SIGTERM):
+        signal(number, SIG_DFL)
+
+    try:
+        Server(config).run(sockets=[sock])
+    finally:
+        _exit(0)
+
+
+def share(workers: int) -> None:
+    '''
+    Capping the pool of database connections of every worker at its equal
+    share of the connections of the server, without overflow, so that the
+    workers together never open more than ``SERVER_CONNECTIONS``.
+
+    :param workers: The number of workers.
+    :type workers: int
+
+    :raises SystemExit: If there are more workers than connections.
+    '''
+
+    if (connections := get_server().connections) < workers:
+        raise SystemExit(
+            f'{workers} workers cannot share {connections} connections',
+        )
+
+    database.POOL_LIMIT = connections // workers
+
+
+def main() -> None:
+    validate()
+
+    count = get_server().workers or cpu_count() or 1
+
+    share(count)
+
+    config = configure()
+    sock = config.bind_socket()
+    workers = {spawn(config, sock) for _ in range(count)}
+    stopping = False
+
+    def stop(number: int, frame) -> None:
+        nonlocal stopping
+
+        stopping = True
+
+        for pid in list(workers):
+            with suppress(ProcessLookupError):
+                kill(pid, SIGTERM)
+
+    for number in (SIGINT, SIGTERM):
+        signal(number, stop)
+
+    print(f'Supervisor {getpid()} started {count} workers')
+
+    while workers:
+        try:
+            pid, _ = waitpid(-1, WNOHANG)
+        except ChildProcessError:
+            break
+
+        if not pid:
+            sleep(.5)
+
+            continue
+
+        workers.discard(pid)
+
+        if not stopping:
+            workers.add(spawn(config, sock))
+
+    sock.close()
+
+
+if __name__ == '__main__':
+    main()
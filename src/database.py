@@ -1,17 +1,199 @@
-from typing import AsyncGenerator
+from asyncio import CancelledError, create_task, sleep
+from contextlib import asynccontextmanager, suppress
+from datetime import datetime
+from itertools import count
+from math import ceil
+from time import monotonic, perf_counter
+from typing import AsyncGenerator, AsyncIterator
 
 from fastapi import Depends, HTTPException, status
-from sqlalchemy import Boolean, Date, ForeignKey, Integer, String, text
+from redis.exceptions import RedisError
+from sqlalchemy import Boolean, Date, DateTime, ForeignKey, Integer, String, \
+    event, func, make_url, text
+from sqlalchemy.engine import Engine
 from sqlalchemy.exc import OperationalError, SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, \
     async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry
 
-from .services.environment import environment
+from .services import cache
+from .services.breakers import Open
+from .services.metrics import Histogram, Metric
+from .services.queries import observe
+from .services.settings import get_database, get_replicas, get_sql
 
 
 engine: AsyncEngine = None
 
+# The share of the connections of the database server of one worker, set by
+# the launcher of several of them.
+POOL_LIMIT: int = None
+
+checkout = Histogram(
+    'db_pool_checkout_wait_seconds',
+    'Time spent waiting for a connection from the pool.',
+)
+
+Metric(
+    'db_pool_connections',
+    'Connections of the pool by their state.',
+    ('state',),
+    'gauge',
+    lambda: {
+        ('size',): engine.pool.size(),
+        ('checked_out',): engine.pool.checkedout(),
+        ('overflow',): max(engine.pool.overflow(), 0),
+    } if isinstance(getattr(engine, 'pool', None), Pool) else {},
+)
+
+
+class Pool(AsyncAdaptedQueuePool):
+    '''
+    The default pool of the asynchronous engine that also measures how long a
+    session waits for a connection.
+    '''
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        start = perf_counter()
+
+        try:
+            return super()._do_get()
+        finally:
+            checkout.observe(perf_counter() - start)
+
+
+compilations = Metric(
+    'sql_compiled_cache_total',
+    'Executed statements by the lookup of their compiled form in the cache.',
+    ('result',),
+)
+
+reads = Metric(
+    'db_read_sessions_total',
+    'Sessions of the read-only routes by the database that served them.',
+    ('target',),
+)
+
+ejections = Metric(
+    'db_replica_ejections_total',
+    'Replicas taken out of the routing after a failure.',
+    ('replica',),
+)
+
+
+class Replica:
+    '''
+    A read-only copy of the database. A copy that fails is ejected from the
+    routing for a while and then tried again.
+    '''
+
+    def __init__(self, number: int, url: str) -> None:
+        '''
+        :param number: The position of the replica in the settings, used to
+            label its metrics without exposing the credentials in its URL.
+        :type number: int
+        :param url: The connection URL of the replica.
+        :type url: str
+        '''
+
+        self.number = number
+        self.engine = connect(url)
+        self.ejected = 0.0
+
+    @property
+    def healthy(self) -> bool:
+        return monotonic() >= self.ejected
+
+    def eject(self) -> None:
+        if self.healthy:
+            ejections.inc(self.number)
+
+        self.ejected = monotonic() + get_replicas().retry
+
+    async def check(self) -> None:
+        '''
+        Connecting to the replica, which ejects it if it fails and lets it
+        back into the routing if it succeeds.
+        '''
+
+        try:
+            async with self.engine.connect() as conn:
+                await conn.execute(text('SELECT 1'))
+        except (OperationalError, OSError):
+            self.eject()
+        else:
+            self.ejected = 0.0
+
+
+replicas: list[Replica] = []
+rotation = count()
+
+# The moments until which the reads of the users who have just written are
+# served by the primary database.
+writes: dict[int, float] = {}
+
+probing = None
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def before_cursor_execute(conn, cursor, statement, params, context, many):
+    context.started = perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def after_cursor_execute(conn, cursor, statement, params, context, many):
+    observe(statement, perf_counter() - context.started)
+
+    if (result := getattr(context, 'cache_hit', None)) is not None:
+        compilations.inc(result.name.lower())
+
+
+def connect(url: str) -> AsyncEngine:
+    '''
+    Creating an engine whose compiled statements are cached by SQLAlchemy
+    and, with asyncpg, also prepared once per connection by the server. When
+    the launcher sets :data:`POOL_LIMIT`, the pool of the worker is capped at
+    its share of the connections of the server and does not overflow it.
+    A request waits for a connection of the pool for a limited time.
+
+    With asyncpg, every session is also limited in the time of its
+    statements: the server cancels those that run longer than the statement
+    timeout, and the client gives up on a server that does not answer a
+    second later.
+
+    :param url: The connection URL of the database.
+    :type url: str
+    :return: The engine.
+    :rtype: AsyncEngine
+    '''
+
+    settings = get_sql()
+
+    options = {
+        'poolclass': Pool,
+        'pool_size': min(settings.pool_size, POOL_LIMIT) if POOL_LIMIT
+        else settings.pool_size,
+        'max_overflow': 0 if POOL_LIMIT else settings.pool_overflow,
+        'pool_timeout': settings.pool_timeout,
+        'query_cache_size': settings.query_cache_size,
+    }
+
+    if make_url(url).get_driver_name() == 'asyncpg':
+        options['connect_args'] = {
+            'prepared_statement_cache_size': settings.statement_cache_size,
+        }
+
+        if (timeout := settings.statement_timeout):
+            options['connect_args'] |= {
+                'server_settings': {
+                    'statement_timeout': str(timeout),
+                },
+                'command_timeout': timeout / 1000 + 1,
+            }
+
+    return create_async_engine(url, **options)
+
 
 async def init_engine() -> None:
     '''
@@ -19,10 +201,18 @@ async def init_engine() -> None:
     checking its capabilities is done before it is requested.
     '''
 
-    global engine
+    global engine, replicas
 
     try:
-        engine = create_async_engine(environment())
+        engine = connect(get_database().url)
+
+        replicas = [
+            Replica(number, url.strip())
+            for number, url in enumerate(
+                get_replicas().urls.split(','),
+            )
+            if url.strip()
+        ]
 
         async with engine.connect() as conn:
             await conn.execute(text('SELECT 1'))
@@ -65,16 +255,158 @@ async def get_db(
     :raises HTTPException: If session creation failed.
     '''
 
-    async_session = async_sessionmaker(
-        engine,
+    try:
+        async with open_session(engine) as session:
+            yield session
+    except OperationalError as err:
+        raise HTTPException(
+            status.HTTP_503_SERVICE_UNAVAILABLE,
+            'Database connection failed: ' + str(err),
+        )
+
+
+def open_session(bind: AsyncEngine) -> AsyncSession:
+    return async_sessionmaker(
+        bind,
         class_=AsyncSession,
         autoflush=False,
         expire_on_commit=False,
         autocommit=False,
-    )
+    )()
+
+
+async def wrote(user_id: int) -> None:
+    '''
+    Remembering that a user has just written, so that the reads of the user
+    are served by the primary database until the replicas catch up. The mark
+    is shared with the other workers through the caching service.
+
+    :param user_id: The identifier of the user.
+    :type user_id: int
+    '''
+
+    if not replicas:
+        return
+
+    now = monotonic()
+
+    if len(writes) > 10000:
+        for key in [key for key, until in writes.items() if until <= now]:
+            del writes[key]
+
+    stickiness = get_replicas().stickiness
+
+    writes[user_id] = now + stickiness
+
+    if cache.cache:
+        with suppress(Open, RedisError):
+            async with cache.circuit:
+                await cache.cache.set(
+                    f'written:{user_id}',
+                    1,
+                    ex=max(ceil(stickiness), 1),
+                )
+
+
+async def sticky(user_id: int) -> bool:
+    if writes.get(user_id, 0) > monotonic():
+        return True
+
+    writes.pop(user_id, None)
+
+    if cache.cache:
+        with suppress(Open, RedisError):
+            async with cache.circuit:
+                return bool(await cache.cache.get(f'written:{user_id}'))
+
+    return False
+
+
+async def probe() -> None:
+    '''
+    Checking the replicas in the background, so that the requests do not
+    have to connect to one to learn whether it is healthy.
+    '''
+
+    while True:
+        for replica in replicas:
+            await replica.check()
+
+        await sleep(get_replicas().probe)
+
+
+def start_probe() -> None:
+    global probing
+
+    if not probing:
+        probing = create_task(probe())
+
+
+async def stop_probe() -> None:
+    global probing
+
+    if probing:
+        probing.cancel()
+
+        with suppress(CancelledError):
+            await probing
+
+        probing = None
+
+
+@asynccontextmanager
+async def read_session(user_id: int = None) -> AsyncIterator[AsyncSession]:
+    '''
+    A session for read-only queries on the next healthy replica in turn, or
+    on the primary database when none is healthy or the user has just
+    written. The session connects on its first query, so the requests that
+    do not query cost no connection. A replica that fails then is ejected
+    and the request is answered with 503, while the background probe finds
+    the failing replicas before the requests do.
+
+    :param user_id: The identifier of the user whose own writes have to be
+        seen or an empty value if a lagging replica is acceptable.
+    :type user_id: int
+    :return: A session for working with the database.
+    :rtype: AsyncIterator[AsyncSession]
+
+    :raises HTTPException: If the database fails while the session is used.
+    '''
+
+    replica = None
+
+    if replicas and (user_id is None or not await sticky(user_id)):
+        start = next(rotation) % len(replicas)
+
+        replica = next(
+            (
+                replica
+                for replica in replicas[start:] + replicas[:start]
+                if replica.healthy
+            ),
+            None,
+        )
+
+    if replica:
+        reads.inc('replica')
+
+        try:
+            async with open_session(replica.engine) as session:
+                yield session
+        except OperationalError as err:
+            replica.eject()
+
+            raise HTTPException(
+                status.HTTP_503_SERVICE_UNAVAILABLE,
+                'Database connection failed: ' + str(err),
+            )
+
+        return
+
+    reads.inc('primary')
 
     try:
-        async with async_session() as session:
+        async with open_session(engine) as session:
             yield session
     except OperationalError as err:
         raise HTTPException(
@@ -83,6 +415,23 @@ async def get_db(
         )
 
 
+async def get_replica_db(
+    db_init=Depends(init_db_once)
+) -> AsyncGenerator[AsyncSession, None]:
+    '''
+    Granting access to a replica of the database for queries that tolerate
+    its lag.
+
+    :param db_init: Setting up the connection to the database.
+    :type db_init: Any
+    :return: A session for working with the database.
+    :rtype: AsyncGenerator[AsyncSession, None]
+    '''
+
+    async with read_session() as session:
+        yield session
+
+
 class Base(DeclarativeBase):
     ...
 
@@ -108,6 +457,19 @@ class Contact(Base):
         Integer,
         ForeignKey('users.id'),
         nullable=True,
+        index=True,
+    )
+
+    version: Mapped[int] = mapped_column(
+        Integer,
+        default=1,
+        server_default='1',
+    )
+
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
     )
 
     user: Mapped['User'] = relationship(
@@ -133,6 +495,57 @@ class User(Base):
     verified: Mapped[bool] = mapped_column(Boolean(), default=False)
     avatar: Mapped[str] = mapped_column(String(255), nullable=True)
 
+    revision: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        server_default='0',
+    )
+
+
+class Change(Base):
+    __tablename__ = 'changes'
+
+    user_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey('users.id'),
+        primary_key=True,
+    )
+
+    revision: Mapped[int] = mapped_column(Integer, primary_key=True)
+    contact_id: Mapped[int] = mapped_column(Integer)
+    deleted: Mapped[bool] = mapped_column(Boolean(), default=False)
+
+
+class Stats(Base):
+    __tablename__ = 'contact_stats'
+
+    user_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey('users.id'),
+        primary_key=True,
+    )
+
+    total: Mapped[int] = mapped_column(Integer, default=0, server_default='0')
+
+    birthdays: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        server_default='0',
+    )
+
+
+class BirthdayWeek(Base):
+    __tablename__ = 'birthday_weeks'
+
+    user_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey('users.id'),
+        primary_key=True,
+    )
+
+    week: Mapped[int] = mapped_column(Integer, primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, default=0, server_default='0')
+
 
 async def init_db() -> None:
     '''
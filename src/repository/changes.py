@@ -0,0 +1,133 @@
+from sqlalchemy import and_, update
+from sqlalchemy.future import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database import Change, Contact, User, wrote
+from src.schemas.contact import Changes
+from src.services.events import broker
+from src.services.responses import responses
+
+
+async def record(
+    db: AsyncSession,
+    user: User,
+    contact_id: int,
+    deleted: bool = False
+) -> Change:
+    '''
+    Adding an entry to the change log of a user within the current
+    transaction. The revision counter of the user is incremented by the same
+    statement that locks the user row, so revisions are committed in order.
+
+    :param db: Database connection.
+    :type db: AsyncSession
+    :param user: The owner of the changed contact.
+    :type user: User
+    :param contact_id: The identifier of the changed contact.
+    :type contact_id: int
+    :param deleted: Indication that the contact has been deleted.
+    :type deleted: bool
+    :return: The entry of the change log.
+    :rtype: Change
+    '''
+
+    revision = await db.scalar(
+        update(User)
+        .where(User.id == user.id)
+        .values(revision=User.revision + 1)
+        .returning(User.revision)
+    )
+
+    change = Change(
+        user_id=user.id,
+        revision=revision,
+        contact_id=contact_id,
+        deleted=deleted,
+    )
+
+    db.add(change)
+
+    return change
+
+
+async def notify(
+    user: User,
+    change: Change,
+    contact: Contact = None
+) -> None:
+    '''
+    Informing the subscribers of a user about a committed change, and the
+    routing of the reads and the cache of the answers, so that the user sees
+    the change right away.
+
+    :param user: The owner of the changed contact.
+    :type user: User
+    :param change: The entry of the change log.
+    :type change: Change
+    :param contact: The current state of the contact unless it is deleted.
+    :type contact: Contact
+    '''
+
+    await wrote(user.id)
+    await responses.invalidate(user.id)
+
+    await broker.publish(user.id, {
+        'revision': change.revision,
+        'id': change.contact_id,
+        'deleted': change.deleted,
+        'contact': contact,
+    })
+
+
+async def read(
+    db: AsyncSession,
+    user: User,
+    since: int = 0,
+    limit: int = 100
+) -> Changes:
+    '''
+    Get the changes of the contacts of a user made after a particular
+    revision. Only the primary key index of the change log is used, so the
+    cost depends on the number of changes and not on the number of contacts.
+
+    :param db: Database connection.
+    :type db: AsyncSession
+    :param user: The owner of the contacts.
+    :type user: User
+    :param since: The last revision that the client already has.
+    :type since: int
+    :param limit: The maximum number of log entries per page.
+    :type limit: int
+    :return: The latest state of every changed contact or its tombstone, the
+        token of the next page and whether there are more changes.
+    :rtype: Changes
+    '''
+
+    query = select(Change, Contact).outerjoin(Contact, and_(
+        Contact.id == Change.contact_id,
+        Change.deleted.is_(False),
+    )).where(
+        Change.user_id == user.id,
+        Change.revision > since,
+    ).order_by(Change.revision).limit(limit + 1)
+
+    rows = (await db.execute(query)).all()
+    more = len(rows) > limit
+    result = {}
+
+    for change, contact in rows[:limit]:
+        result.pop(change.contact_id, None)
+
+        result[change.contact_id] = {
+            'revision': change.revision,
+            'id': change.contact_id,
+            'deleted': contact is None,
+            'contact': contact,
+        }
+
+    return {
+        'changes': list(result.values()),
+        'next': rows[limit - 1][0].revision if more
+        else rows[-1][0].revision if rows else since,
+        'more': more,
+    }
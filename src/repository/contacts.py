@@ -1,42 +1,92 @@
-from datetime import date
+from datetime import date, datetime
 
 from fastapi import HTTPException, status
-from sqlalchemy import and_
+from sqlalchemy import and_, func, lambda_stmt, update as modify
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database import Contact, User
 from src.schemas.contact import Request, Response, Responses
+from .changes import notify, record
+from .stats import adjust
 
 
 async def create(db: AsyncSession, user: User, body: Request) -> Response:
-    contact = Contact(**body.model_dump(exclude_unset=True), user=user)
+    # The user may belong to the session of another database, such as that of
+    # a replica, so only its key is used.
+    contact = Contact(**body.model_dump(exclude_unset=True), user_id=user.id)
 
     db.add(contact)
 
+    await db.flush()
+
+    change = await record(db, user, contact.id)
+
+    await adjust(db, user, 1, contact.birthday)
+
     await db.commit()
     await db.refresh(contact)
+    await notify(user, change, contact)
 
     return contact
 
 
+def columns(fields: tuple[str, ...], *required: str) -> list:
+    '''
+    The columns of the contacts selected for a sparse fieldset.
+
+    :param fields: The names of the requested fields.
+    :type fields: tuple[str, ...]
+    :param required: The names of the fields that are also needed to answer.
+    :type required: str
+    :return: The columns.
+    :rtype: list
+    '''
+
+    return [getattr(Contact, name) for name in dict.fromkeys(fields + required)]
+
+
 async def read(
     db: AsyncSession,
     user: User,
     first_name: str = None,
     last_name: str = None,
-    email: str = None
+    email: str = None,
+    fields: tuple[str, ...] = None
 ) -> list[Response]:
-    query = select(Contact).where(Contact.user == user)
+    user_id = user.id
+
+    if fields:
+        query = select(*columns(fields)).where(
+            Contact.user_id == user_id,
+            *(
+                getattr(Contact, name) == value
+                for name, value in (
+                    ('first_name', first_name),
+                    ('last_name', last_name),
+                    ('email', email),
+                )
+                if value
+            ),
+        )
+
+        if not (result := (await db.execute(query)).all()):
+            raise HTTPException(status.HTTP_404_NOT_FOUND, 'Not found')
+
+        return result
+
+    query = lambda_stmt(
+        lambda: select(Contact).where(Contact.user_id == user_id),
+    )
 
     if first_name:
-        query.where(Contact.first_name == first_name)
+        query += lambda query: query.where(Contact.first_name == first_name)
 
     if last_name:
-        query.where(Contact.last_name == last_name)
+        query += lambda query: query.where(Contact.last_name == last_name)
 
     if email:
-        query.where(Contact.email == email)
+        query += lambda query: query.where(Contact.email == email)
 
     result = await db.execute(query)
 
@@ -46,15 +96,28 @@ async def read(
     return result
 
 
-async def birthday(db: AsyncSession, user: User, days: int) -> Responses:
-    query = select(Contact).where(and_(
-        Contact.birthday.isnot(None),
-        Contact.user == user,
-    ))
+async def birthday(
+    db: AsyncSession,
+    user: User,
+    days: int,
+    fields: tuple[str, ...] = None
+) -> Responses:
+    user_id = user.id
+
+    if fields:
+        query = select(*columns(fields, 'birthday')).where(
+            Contact.birthday.isnot(None),
+            Contact.user_id == user_id,
+        )
+    else:
+        query = lambda_stmt(lambda: select(Contact).where(and_(
+            Contact.birthday.isnot(None),
+            Contact.user_id == user_id,
+        )))
 
     result = await db.execute(query)
 
-    if not (entities := result.scalars().all()):
+    if not (entities := result.all() if fields else result.scalars().all()):
         raise HTTPException(status.HTTP_404_NOT_FOUND, 'Not found')
 
     result = []
@@ -72,28 +135,110 @@ async def birthday(db: AsyncSession, user: User, days: int) -> Responses:
     return result
 
 
-async def get(db: AsyncSession, user: User, contact_id: int) -> Response:
-    query = select(Contact).filter_by(id=contact_id, user=user)
-    result = await db.execute(query)
+async def get(
+    db: AsyncSession,
+    user: User,
+    contact_id: int,
+    fields: tuple[str, ...] = None
+) -> Response:
+    user_id = user.id
 
-    if not (contact := result.scalar_one_or_none()):
+    if fields:
+        result = await db.execute(select(*columns(fields)).where(
+            Contact.id == contact_id,
+            Contact.user_id == user_id,
+        ))
+
+        contact = result.one_or_none()
+    else:
+        result = await db.execute(lambda_stmt(
+            lambda: select(Contact).filter_by(id=contact_id, user_id=user_id),
+        ))
+
+        contact = result.scalar_one_or_none()
+
+    if not contact:
         raise HTTPException(status.HTTP_404_NOT_FOUND, 'Not found')
 
     return contact
 
 
+async def revision(
+    db: AsyncSession,
+    user: User,
+    contact_id: int = None
+) -> tuple[int, datetime] | tuple[int, int, datetime]:
+    if contact_id:
+        query = select(Contact.version, Contact.updated_at) \
+            .where(Contact.id == contact_id, Contact.user_id == user.id)
+
+        if not (result := (await db.execute(query)).one_or_none()):
+            raise HTTPException(status.HTTP_404_NOT_FOUND, 'Not found')
+    else:
+        query = select(
+            func.count(Contact.id),
+            func.coalesce(func.sum(Contact.version), 0),
+            func.max(Contact.updated_at),
+        ).where(Contact.user_id == user.id)
+
+        result = (await db.execute(query)).one()
+
+    return tuple(result)
+
+
 async def update(
     db: AsyncSession,
     user: User,
     body: Request,
-    contact_id: int
+    contact_id: int,
+    versions: list[int] = None
 ) -> Response:
-    if (contact := await get(db, user, contact_id)):
-        for key, value in body.model_dump(exclude_unset=True).items():
-            setattr(contact, key, value)
+    # The user row is locked first, the same as by a delete, so that the two
+    # cannot deadlock on the rows of the user and the contact. A failed update
+    # rolls the entry of the change log back.
+    change = await record(db, user, contact_id)
+    birthday = None
+
+    # The row stays locked, so the birthday cannot change before the counters.
+    if 'birthday' in body.model_fields_set:
+        birthday = await db.scalar(
+            select(Contact.birthday)
+            .where(Contact.id == contact_id, Contact.user_id == user.id)
+            .with_for_update()
+        )
+
+    query = modify(Contact).where(
+        Contact.id == contact_id,
+        Contact.user_id == user.id,
+    )
+
+    if versions:
+        query = query.where(Contact.version.in_(versions))
+
+    query = query.values(
+        **body.model_dump(exclude_unset=True),
+        version=Contact.version + 1,
+        updated_at=func.now(),
+    ).returning(Contact).execution_options(populate_existing=True)
 
-        await db.commit()
-        await db.refresh(contact)
+    result = await db.execute(query)
+
+    if not (contact := result.scalar_one_or_none()):
+        await db.rollback()
+
+        if versions and await revision(db, user, contact_id):
+            raise HTTPException(
+                status.HTTP_412_PRECONDITION_FAILED,
+                'Contact has been changed',
+            )
+
+        raise HTTPException(status.HTTP_404_NOT_FOUND, 'Not found')
+
+    if 'birthday' in body.model_fields_set and contact.birthday != birthday:
+        await adjust(db, user, added=contact.birthday, removed=birthday)
+
+    await db.commit()
+    await notify(user, change, contact)
 
     return contact
 
@@ -101,4 +246,10 @@ async def update(
 async def delete(db: AsyncSession, user: User, contact_id: int) -> None:
     if (contact := await get(db, user, contact_id)):
         await db.delete(contact)
+
+        change = await record(db, user, contact_id, True)
+
+        await adjust(db, user, -1, removed=contact.birthday)
+
         await db.commit()
+        await notify(user, change)
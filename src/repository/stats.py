@@ -0,0 +1,230 @@
+from collections import Counter
+from datetime import date, timedelta
+
+from sqlalchemy import delete, insert, update
+from sqlalchemy.future import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database import BirthdayWeek, Contact, Stats, User
+from src.schemas.contact import Stats as Answer
+
+
+WEEKS = 53
+
+
+def week(day: date) -> int:
+    '''
+    The week of the year a birthday falls in. The weeks are fixed spans of
+    seven days from the first of January of a leap year, so that every day,
+    including the 29th of February, always falls in the same one, and the
+    last one is only one or two days long.
+
+    :param day: The date of the birthday or any other day.
+    :type day: date
+    :return: The number of the week from zero.
+    :rtype: int
+    '''
+
+    return (day.replace(year=2000).timetuple().tm_yday - 1) // 7
+
+
+def start(number: int, today: date) -> date:
+    '''
+    The first day of an upcoming week of the year.
+
+    :param number: The number of the week from zero.
+    :type number: int
+    :param today: The current date.
+    :type today: date
+    :return: The first day of the week in the current year, or in the next
+        one if the week is already over, so for the current week it may be
+        in the past.
+    :rtype: date
+    '''
+
+    day = date(2000, 1, 1) + timedelta(days=number * 7)
+    year = today.year + (number < week(today))
+
+    return day.replace(year=year)
+
+
+async def increment(
+    db: AsyncSession,
+    model: type[Stats | BirthdayWeek],
+    user_id: int,
+    values: dict,
+    **key
+) -> None:
+    result = await db.execute(
+        update(model)
+        .where(model.user_id == user_id, *(
+            getattr(model, name) == value for name, value in key.items()
+        ))
+        .values({
+            name: getattr(model, name) + value
+            for name, value in values.items()
+        })
+    )
+
+    if not result.rowcount:
+        await db.execute(insert(model).values(user_id=user_id, **key, **values))
+
+
+async def adjust(
+    db: AsyncSession,
+    user: User,
+    total: int = 0,
+    added: date = None,
+    removed: date = None
+) -> None:
+    '''
+    Changing the counters of the contacts of a user within the current
+    transaction. It has to follow :func:`src.repository.changes.record`,
+    whose lock of the user row makes the changes of one user, and the
+    reconciliation, take turns, so a missing counter row is safely inserted.
+
+    :param db: Database connection.
+    :type db: AsyncSession
+    :param user: The owner of the contacts.
+    :type user: User
+    :param total: The change of the number of contacts.
+    :type total: int
+    :param added: The birthday of a contact that is counted from now on.
+    :type added: date
+    :param removed: The birthday of a contact that is no longer counted.
+    :type removed: date
+    '''
+
+    changes = Counter()
+
+    if added:
+        changes[week(added)] += 1
+
+    if removed:
+        changes[week(removed)] -= 1
+
+    birthdays = bool(added) - bool(removed)
+
+    if total or birthdays:
+        await increment(db, Stats, user.id, {
+            'total': total,
+            'birthdays': birthdays,
+        })
+
+    for number, count in changes.items():
+        if count:
+            await increment(
+                db,
+                BirthdayWeek,
+                user.id,
+                {'count': count},
+                week=number,
+            )
+
+
+async def read(db: AsyncSession, user: User, weeks: int) -> Answer:
+    '''
+    Get the counters of the contacts of a user, which are two primary key
+    lookups whatever the number of contacts.
+
+    :param db: Database connection.
+    :type db: AsyncSession
+    :param user: The owner of the contacts.
+    :type user: User
+    :param weeks: The number of weeks of the upcoming birthdays, starting
+        with the current one.
+    :type weeks: int
+    :return: The number of contacts, of those with a birthday and of the
+        birthdays in every upcoming week.
+    :rtype: Answer
+    '''
+
+    today = date.today()
+    numbers = [(week(today) + offset) % WEEKS for offset in range(weeks)]
+
+    stats = (await db.execute(
+        select(Stats.total, Stats.birthdays).where(Stats.user_id == user.id)
+    )).one_or_none()
+
+    counts = dict((await db.execute(
+        select(BirthdayWeek.week, BirthdayWeek.count).where(
+            BirthdayWeek.user_id == user.id,
+            BirthdayWeek.week.in_(numbers),
+        )
+    )).all())
+
+    return Answer(
+        total=stats.total if stats else 0,
+        birthdays=stats.birthdays if stats else 0,
+        weeks=[
+            {'start': start(number, today), 'count': counts.get(number, 0)}
+            for number in numbers
+        ],
+    )
+
+
+async def reconcile(db: AsyncSession, after: int = 0, limit: int = 100) -> int:
+    '''
+    Counting the contacts of a batch of users again and replacing their
+    counters, which repairs any drift, such as that of the contacts changed
+    outside of the application. The users are locked for the time of it.
+
+    :param db: Database connection.
+    :type db: AsyncSession
+    :param after: The identifier of the last user of the previous batch.
+    :type after: int
+    :param limit: The number of users in a batch.
+    :type limit: int
+    :return: The identifier of the last user of the batch, or zero when
+        there are no more users.
+    :rtype: int
+    '''
+
+    users = (await db.scalars(
+        select(User.id)
+        .where(User.id > after)
+        .order_by(User.id)
+        .limit(limit)
+        .with_for_update()
+    )).all()
+
+    if not users:
+        await db.commit()
+
+        return 0
+
+    totals = Counter()
+    birthdays = Counter()
+    weeks = Counter()
+
+    for user_id, birthday in (await db.execute(
+        select(Contact.user_id, Contact.birthday)
+        .where(Contact.user_id.in_(users))
+    )).all():
+        totals[user_id] += 1
+
+        if birthday:
+            birthdays[user_id] += 1
+            weeks[user_id, week(birthday)] += 1
+
+    for model in (Stats, BirthdayWeek):
+        await db.execute(delete(model).where(model.user_id.in_(users)))
+
+    await db.execute(insert(Stats), [
+        {
+            'user_id': user_id,
+            'total': totals[user_id],
+            'birthdays': birthdays[user_id],
+        }
+        for user_id in users
+    ])
+
+    if weeks:
+        await db.execute(insert(BirthdayWeek), [
+            {'user_id': user_id, 'week': number, 'count': count}
+            for (user_id, number), count in weeks.items()
+        ])
+
+    await db.commit()
+
+    return users[-1]
@@ -1,33 +1,47 @@
 from fastapi import Depends
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database import get_db, User
 from src.schemas.user import Response, TokenSchema, UserRequest
-from src.services.auth import auth_service, Token
+from src.services.accounts import accounts
+from src.services.auth import auth_service
+from src.services.sessions import sessions
+
+
+INSERTS = {'postgresql': postgresql_insert, 'sqlite': sqlite_insert}
 
 
 async def create(
     body: UserRequest,
     db: AsyncSession = Depends(get_db)
-) -> Response:
+) -> Response | None:
     '''
-    Create a new user based on the provided email address and password.
+    Create a new user based on the provided email address and password with
+    a single statement that does nothing if the address is already taken, so
+    that concurrent signups with it cannot fail with a unique violation.
 
     :param body: A couple of fields are required to create an entity.
     :type body: UserRequest
     :param db: Database connection.
     :type db: AsyncSession
     :return: The part of the created entity that contains the ID and email
-        address.
-    :rtype: Response
+        address, or an empty value if the address is taken.
+    :rtype: Response | None
     '''
 
-    user = User(email=body.username, password=body.password)
+    insert = INSERTS[db.get_bind().dialect.name]
 
-    db.add(user)
+    user = await db.scalar(
+        insert(User)
+        .values(email=body.username, password=body.password)
+        .on_conflict_do_nothing(index_elements=[User.email])
+        .returning(User)
+    )
 
     await db.commit()
-    await db.refresh(user)
+    await accounts.add(body.username)
 
     return user
 
@@ -38,35 +52,25 @@ async def update(
     revoke: bool = False
 ) -> TokenSchema | None:
     '''
-    Making changes to one or more fields of an existing user.
+    Saving changes to one or more fields of an existing user, such as a new
+    password, after which all the sessions of the user are ended.
 
     :param user: A set of all fields from the user model for the database.
     :type user: User
     :param db: Database connection.
     :type db: AsyncSession
-    :param revoke: Indication that the refresh token must be reset.
+    :param revoke: Indication that no new session is started.
     :type revoke: bool
-    :return: The access and update token and their type if the entity was
-        successfully updated.
+    :return: The access and update token and their type if a new session is
+        started.
     :rtype: TokenSchema | None
     '''
 
-    if revoke:
-        user.token = None
-    else:
-        result = {
-            **{
-                token.value: await auth_service.create_token(user.email, token)
-                for token in Token
-            },
-            'token_type': 'bearer',
-        }
-
-        user.token = result[Token.REFRESH.value]
-
     await db.commit()
 
-    return result or None
+    await sessions.revoke(user.id, db)
+
+    return None if revoke else await sessions.issue(user, db)
 
 
 async def verify(email: str, db: AsyncSession) -> None:
@@ -7,8 +7,11 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database import get_db
 from src.repository.users import create, update, verify
+from src.services.accounts import accounts
 from src.services.auth import auth_service, Token
 from src.services.email import send
+from src.services.revocation import revocations
+from src.services.sessions import sessions
 from src.schemas.user import TokenSchema, UserRequest
 
 
@@ -24,17 +27,21 @@ async def signup(
     request: Request,
     db: AsyncSession = Depends(get_db)
 ) -> dict:
-    if await auth_service.get_user_by_email(body.username, db):
-        raise HTTPException(
-            status.HTTP_409_CONFLICT,
-            'Account already exists',
-        )
+    conflict = HTTPException(status.HTTP_409_CONFLICT, 'Account already exists')
+
+    # The password is only hashed for an address that is not known to be
+    # taken, and the insert itself settles the races.
+    if await accounts.taken(body.username):
+        raise conflict
 
     body.password = auth_service.get_password_hash(body.password)
 
+    if not (user := await create(body, db)):
+        raise conflict
+
     background.add_task(
         send,
-        (await create(body, db)).email,
+        user.email,
         'Confirm your email',
         request.base_url,
         'verify',
@@ -59,7 +66,7 @@ async def login(
     if not auth_service.verify_password(body.password, user.password):
         raise HTTPException(status.HTTP_401_UNAUTHORIZED, 'Invalid password')
 
-    return await update(user, db)
+    return await sessions.issue(user, db)
 
 
 @router.get('/refresh-token')
@@ -67,21 +74,20 @@ async def refresh_token(
     credentials: HTTPAuthorizationCredentials = Depends(get_refresh_token),
     db: AsyncSession = Depends(get_db)
 ) -> TokenSchema:
-    token = credentials.credentials
+    return await sessions.rotate(credentials.credentials, db)
 
-    email = await auth_service.decode_token(token, Token.REFRESH)
 
-    user = await auth_service.get_user_by_email(email, db)
-
-    if user.token != token:
-        await update(user, db, True)
+@router.post('/logout', status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    token: str = Depends(auth_service.oauth2_scheme),
+    db: AsyncSession = Depends(get_db)
+) -> None:
+    payload = await auth_service.decode_payload(token, Token.ACCESS)
 
-        raise HTTPException(
-            status.HTTP_401_UNAUTHORIZED,
-            'Invalid refresh token',
-        )
+    if 'jti' in payload:
+        await revocations.revoke(payload['jti'], payload['exp'])
 
-    return await update(user, db)
+    await sessions.end(payload, db)
 
 
 @router.get('/verify/{token}', status_code=status.HTTP_202_ACCEPTED)
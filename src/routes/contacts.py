@@ -1,19 +1,72 @@
-from fastapi import APIRouter, Depends, Path, Query, status
-from fastapi_limiter.depends import RateLimiter
+from datetime import date
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Path, Query, \
+    status
+from fastapi import Response as HTTPResponse
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database import get_db, User
-from src.repository.contacts import birthday, create, delete, get, read, update
-from src.schemas.contact import Request, Response, Responses
-from src.services.auth import auth_service
+from src.repository.changes import read as read_changes
+from src.repository.contacts import birthday, create, delete, get, read, \
+    revision, update
+from src.repository.stats import read as read_stats, WEEKS
+from src.schemas.contact import Change, Changes, projection, Request, \
+    Response, Responses, Stats
+from src.services.auth import auth_service, get_read_db
+from src.services.conditional import Conditional, etag
+from src.services.events import broker, serialize
+from src.services.limiter import limiter
+from src.services.responses import Entry, midnight, responses
 
 
 router = APIRouter(
     prefix='/contacts',
     tags=['Contacts'],
-    dependencies=[Depends(RateLimiter(3, minutes=1))],
+    dependencies=[Depends(limiter)],
 )
 
+serializer = TypeAdapter(Responses)
+
+
+def fieldset(
+    fields: str = Query(
+        None,
+        pattern=r'^\w+(,\w+)*$',
+        description='The fields of the contacts to return, separated by '
+        'commas, for example first_name,phone_number. The id is always '
+        'returned.',
+    )
+) -> tuple[str, ...] | None:
+    '''
+    Dependency that parses a sparse fieldset.
+
+    :param fields: The names of the fields separated by commas.
+    :type fields: str
+    :return: The names of the fields in the order of the response, or an
+        empty value for all of them.
+    :rtype: tuple[str, ...] | None
+
+    :raises HTTPException: If a field is unknown.
+    '''
+
+    if not fields:
+        return None
+
+    names = set(fields.split(','))
+
+    if (unknown := names - Response.model_fields.keys()):
+        raise HTTPException(
+            status.HTTP_422_UNPROCESSABLE_ENTITY,
+            f"Unknown fields: {', '.join(sorted(unknown))}",
+        )
+
+    return tuple(
+        name for name in Response.model_fields
+        if name in names or name == 'id'
+    )
+
 
 @router.post('/', status_code=status.HTTP_201_CREATED)
 async def create_contact(
@@ -29,38 +82,189 @@ async def read_contacts(
     first_name: str = None,
     last_name: str = None,
     email: str = Query(None, pattern=r'^[^@]+@[^\.]+\.\w+$'),
-    db: AsyncSession = Depends(get_db),
+    fields: tuple[str, ...] | None = Depends(fieldset),
+    conditional: Conditional = Depends(),
+    response: HTTPResponse = None,
+    db: AsyncSession = Depends(get_read_db),
     user: User = Depends(auth_service.get_current_user)
 ) -> Responses:
-    return await read(db, user, first_name, last_name, email)
+    params = (first_name, last_name, email, fields)
+    entry, generation = await responses.get(user.id, 'contacts', *params)
+
+    if entry:
+        conditional.check(entry.tag)
+
+        return entry.respond(response)
+
+    # A delete does not advance the time of the last change of the remaining
+    # contacts, so the collections are validated by their tags only.
+    tag = etag(*await revision(db, user), *params, weak=True)
+
+    conditional.check(tag)
+
+    contacts = await read(db, user, *params)
+
+    if generation is None and not fields:
+        return contacts
+
+    entry = Entry(
+        generation,
+        tag,
+        responses.serialize(
+            projection(fields) if fields else serializer,
+            contacts,
+        ),
+    )
+
+    if generation is not None:
+        await responses.put(user.id, 'contacts', params, entry)
+
+    return entry.respond(response)
 
 
 @router.get('/birthdays')
 async def read_birthday_contacts(
     days: int = Query(default=7, ge=0),
-    db: AsyncSession = Depends(get_db),
+    fields: tuple[str, ...] | None = Depends(fieldset),
+    conditional: Conditional = Depends(),
+    response: HTTPResponse = None,
+    db: AsyncSession = Depends(get_read_db),
     user: User = Depends(auth_service.get_current_user)
 ) -> Responses:
-    return await birthday(db, user, days)
+    params = (date.today(), days, fields)
+    entry, generation = await responses.get(user.id, 'birthdays', *params)
+
+    if entry:
+        conditional.check(entry.tag)
+
+        return entry.respond(response)
+
+    tag = etag(*await revision(db, user), *params, weak=True)
+
+    conditional.check(tag)
+
+    contacts = await birthday(db, user, days, fields)
+
+    if generation is None and not fields:
+        return contacts
+
+    entry = Entry(
+        generation,
+        tag,
+        responses.serialize(
+            projection(fields) if fields else serializer,
+            contacts,
+        ),
+    )
+
+    if generation is not None:
+        # The answer depends on the date, so it is only kept until midnight.
+        await responses.put(user.id, 'birthdays', params, entry, midnight())
+
+    return entry.respond(response)
+
+
+@router.get('/stats')
+async def read_contact_stats(
+    weeks: int = Query(default=4, ge=1, le=WEEKS),
+    db: AsyncSession = Depends(get_read_db),
+    user: User = Depends(auth_service.get_current_user)
+) -> Stats:
+    return await read_stats(db, user, weeks)
+
+
+@router.get('/changes')
+async def read_contact_changes(
+    since: int = Query(default=0, ge=0),
+    limit: int = Query(default=100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(auth_service.get_current_user)
+) -> Changes:
+    return await read_changes(db, user, since, limit)
+
+
+@router.get('/events', response_class=StreamingResponse)
+async def read_contact_events(
+    last_event_id: int = Header(None, ge=0),
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(auth_service.get_current_user)
+) -> StreamingResponse:
+    subscription = broker.subscribe(user.id)
+    replay = []
+    revision = 0
+
+    if last_event_id is not None:
+        page = await read_changes(db, user, last_event_id, 1000)
+        revision = page['next']
+
+        replay = [
+            serialize(Change.model_validate(change))
+            for change in page['changes']
+        ]
+
+        if page['more']:
+            broker.unsubscribe(user.id, subscription)
+
+            subscription = None
+
+            replay.append('event: resync\ndata: {}\n\n')
+
+    return StreamingResponse(
+        broker.stream(user.id, subscription, replay, revision),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
 
 
 @router.get('/{contact_id}')
 async def read_contact(
     contact_id: int = Path(ge=1),
-    db: AsyncSession = Depends(get_db),
+    fields: tuple[str, ...] | None = Depends(fieldset),
+    conditional: Conditional = Depends(),
+    response: HTTPResponse = None,
+    db: AsyncSession = Depends(get_read_db),
     user: User = Depends(auth_service.get_current_user)
 ) -> Response:
-    return await get(db, user, contact_id)
+    version, modified = await revision(db, user, contact_id)
+
+    if not fields:
+        conditional.check(etag(version), modified)
+
+        return await get(db, user, contact_id)
+
+    # The version of the contact stays a strong tag for If-Match only when
+    # the whole representation is sent.
+    conditional.check(etag(version, fields, weak=True), modified)
+
+    return HTTPResponse(
+        responses.serialize(
+            projection(fields, False),
+            await get(db, user, contact_id, fields),
+        ),
+        media_type='application/json',
+        headers=dict(response.headers),
+    )
 
 
 @router.put('/{contact_id}')
 async def update_contact(
     body: Request,
     contact_id: int = Path(ge=1),
+    conditional: Conditional = Depends(),
     db: AsyncSession = Depends(get_db),
     user: User = Depends(auth_service.get_current_user)
 ) -> Response:
-    return await update(db, user, body, contact_id)
+    contact = await update(
+        db,
+        user,
+        body,
+        contact_id,
+        conditional.versions(),
+    )
+
+    conditional.tag(etag(contact.version), contact.updated_at)
+
+    return contact
 
 
 @router.delete('/{contact_id}', status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import PlainTextResponse
+
+from src.services.profiler import authorize, profile
+
+
+router = APIRouter(
+    prefix='/profile',
+    tags=['Profiling'],
+    dependencies=[Depends(authorize)],
+)
+
+
+@router.get('/', response_class=PlainTextResponse)
+async def profile_worker(seconds: float = Query(10, gt=0, le=60)) -> str:
+    return await profile(seconds)
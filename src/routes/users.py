@@ -1,5 +1,3 @@
-from cloudinary import CloudinaryImage, config
-from cloudinary.uploader import upload
 from fastapi import APIRouter, Depends, File, UploadFile
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -7,7 +5,7 @@ from src.database import get_db, User
 from src.repository.users import avatar
 from src.schemas.user import Response
 from src.services.auth import auth_service
-from src.services.environment import environment
+from src.services.settings import get_storage, Storage
 
 
 router = APIRouter(prefix='/users', tags=['Users'])
@@ -17,9 +15,13 @@ router = APIRouter(prefix='/users', tags=['Users'])
 async def set_avatar(
     file: UploadFile = File(),
     current_user: User = Depends(auth_service.get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    storage: Storage = Depends(get_storage)
 ) -> Response:
-    config(secure=True, **environment('CLOUDINARY', True, True))
+    from cloudinary import CloudinaryImage, config
+    from cloudinary.uploader import upload
+
+    config(secure=True, **storage.model_dump())
 
     identifier = f'ContactApp/{current_user.id}'
 
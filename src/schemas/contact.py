@@ -1,6 +1,9 @@
+from datetime import date
+from functools import lru_cache
 from typing import Optional
 
-from pydantic import BaseModel, EmailStr, Field, PastDate
+from pydantic import BaseModel, ConfigDict, create_model, EmailStr, Field, \
+    PastDate, TypeAdapter
 
 
 class Request(BaseModel):
@@ -26,3 +29,54 @@ class Response(BaseModel):
 
 
 Responses = list[Response]
+
+
+@lru_cache
+def projection(fields: tuple[str, ...], many: bool = True) -> TypeAdapter:
+    '''
+    The serializer of contacts with only some of the fields of the response,
+    created once for every set of fields.
+
+    :param fields: The names of the fields of the response.
+    :type fields: tuple[str, ...]
+    :param many: Indication that a list of contacts is serialized.
+    :type many: bool
+    :return: The adapter of the partial responses.
+    :rtype: TypeAdapter
+    '''
+
+    model = create_model(
+        'Projection',
+        __config__=ConfigDict(from_attributes=True),
+        **{
+            name: (Response.model_fields[name].annotation,
+                   Response.model_fields[name])
+            for name in fields
+        },
+    )
+
+    return TypeAdapter(list[model] if many else model)
+
+
+class Change(BaseModel):
+    revision: int
+    id: int
+    deleted: bool = False
+    contact: Optional[Response] = None
+
+
+class Changes(BaseModel):
+    changes: list[Change]
+    next: int
+    more: bool = False
+
+
+class Week(BaseModel):
+    start: date
+    count: int
+
+
+class Stats(BaseModel):
+    total: int = 0
+    birthdays: int = 0
+    weeks: list[Week]
@@ -0,0 +1,83 @@
+from redis.exceptions import RedisError
+
+from . import cache
+from .breakers import Open
+from .metrics import Metric
+from .settings import get_accounts
+
+
+lookups = Metric(
+    'account_cache_requests_total',
+    'Lookups of the e-mail addresses of the accounts in the cache.',
+    ('result',),
+)
+
+
+class Accounts:
+    '''
+    Cache of the e-mail addresses that are known to be taken, checked at
+    signup before the password is hashed, so that the repeated signups of
+    existing accounts are rejected without the database or bcrypt.
+
+    An address that is not in it is not checked any further: the insert of
+    the account decides whether it is created, and an address it finds taken
+    is added, so a flood of signups with the same address costs one hash.
+    '''
+
+    PREFIX = 'account'
+
+    def __init__(self) -> None:
+        '''
+        Reading the number of seconds the addresses are remembered, for
+        example ``ACCOUNTS_TTL=86400``.
+        '''
+
+        self.__ttl = get_accounts().ttl
+
+    async def taken(self, email: str) -> bool:
+        '''
+        Checking whether an address is known to be taken.
+
+        :param email: The e-mail address of the account.
+        :type email: str
+        :return: Indication that an account with the address exists, false if
+            it is not known.
+        :rtype: bool
+        '''
+
+        if not cache.cache:
+            return False
+
+        try:
+            async with cache.circuit:
+                taken = await cache.cache.get(f'{self.PREFIX}:{email}')
+        except (Open, RedisError):
+            return False
+
+        lookups.inc('hit' if taken else 'miss')
+
+        return bool(taken)
+
+    async def add(self, email: str) -> None:
+        '''
+        Remembering that an address is taken.
+
+        :param email: The e-mail address of the account.
+        :type email: str
+        '''
+
+        if not cache.cache:
+            return
+
+        try:
+            async with cache.circuit:
+                await cache.cache.set(
+                    f'{self.PREFIX}:{email}',
+                    1,
+                    ex=self.__ttl,
+                )
+        except (Open, RedisError):
+            pass
+
+
+accounts = Accounts()
@@ -0,0 +1,182 @@
+from asyncio import CancelledError, Future, get_running_loop, timeout
+from collections import deque
+from math import ceil
+from time import perf_counter
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from .metrics import Histogram, Metric
+from .settings import get_admission
+
+
+rejections = Metric(
+    'admission_rejected_total',
+    'Requests rejected because the worker was overloaded.',
+    ('priority',),
+)
+
+depth = Metric(
+    'admission_queue_depth',
+    'Requests waiting for a free slot of the worker.',
+    ('priority',),
+    'gauge',
+)
+
+waiting = Histogram(
+    'admission_queue_seconds',
+    'Time requests waited for a free slot of the worker.',
+    ('priority',),
+)
+
+
+class AdmissionMiddleware:
+    '''
+    Admission control of the requests of one worker. At most a fixed number
+    of them are handled at once, the rest wait in a queue, and those that
+    would wait longer than the target delay are answered at once with 503 and
+    ``Retry-After`` instead of holding a connection until the database pool
+    times out.
+
+    The expensive routes, which hash passwords or upload files, may only take
+    a share of the slots, and the freed slots are given to the cheap requests
+    first, so that the reads of the logged in users keep being served when
+    the expensive routes are overloaded.
+    '''
+
+    CHEAP, EXPENSIVE = 'cheap', 'expensive'
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        expensive: set[tuple[str, str]] = frozenset(),
+        exempt: set[str] = frozenset()
+    ) -> None:
+        '''
+        Reading the number of requests handled at once, the share of them the
+        expensive routes may take, the length of the queue and the target
+        delay in seconds, for example ``ADMISSION_CONCURRENCY=64``.
+
+        :param app: The application.
+        :type app: ASGIApp
+        :param expensive: The methods and paths of the expensive routes.
+        :type expensive: set[tuple[str, str]]
+        :param exempt: The paths that are always admitted, such as the health
+            checks, the metrics and the event streams, which would hold a slot
+            for as long as they stay open.
+        :type exempt: set[str]
+        '''
+
+        settings = get_admission()
+
+        self.app = app
+        self.expensive = expensive
+        self.exempt = exempt
+        self.limit = settings.concurrency
+        self.share = max(int(self.limit * settings.expensive_share), 1)
+        self.capacity = settings.queue or self.limit
+        self.target = settings.target
+        self.active = 0
+        self.heavy = 0
+        self.queues: dict[str, deque[Future]] = {
+            self.CHEAP: deque(),
+            self.EXPENSIVE: deque(),
+        }
+
+    def free(self, priority: str) -> bool:
+        return self.active < self.limit and (
+            priority == self.CHEAP or self.heavy < self.share
+        )
+
+    def take(self, priority: str) -> None:
+        self.active += 1
+
+        if priority == self.EXPENSIVE:
+            self.heavy += 1
+
+    def release(self, priority: str) -> None:
+        '''
+        Freeing the slot of a finished request and handing the free slots to
+        the waiting requests, the cheap ones first.
+
+        :param priority: The priority of the finished request.
+        :type priority: str
+        '''
+
+        self.active -= 1
+
+        if priority == self.EXPENSIVE:
+            self.heavy -= 1
+
+        for waiting_priority, queue in self.queues.items():
+            while queue and self.free(waiting_priority):
+                if not (waiter := queue.popleft()).done():
+                    self.take(waiting_priority)
+
+                    waiter.set_result(None)
+
+    async def admit(self, priority: str) -> bool:
+        '''
+        Taking a slot for a request, waiting for it at most the target delay.
+
+        :param priority: The priority of the request.
+        :type priority: str
+        :return: Indication that the request got a slot.
+        :rtype: bool
+        '''
+
+        if self.free(priority):
+            self.take(priority)
+
+            return True
+
+        if len(queue := self.queues[priority]) >= self.capacity:
+            return False
+
+        waiter = get_running_loop().create_future()
+        start = perf_counter()
+
+        queue.append(waiter)
+        depth.inc(priority)
+
+        try:
+            async with timeout(self.target):
+                await waiter
+        except TimeoutError:
+            # The slot may have been handed over just as the time ran out.
+            if not waiter.done() or waiter.cancelled():
+                return False
+        except CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release(priority)
+
+            raise
+        finally:
+            depth.dec(priority)
+            waiting.observe(perf_counter() - start, priority)
+
+        return True
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http' or scope['path'] in self.exempt:
+            return await self.app(scope, receive, send)
+
+        priority = self.EXPENSIVE \
+            if (scope['method'], scope['path']) in self.expensive \
+            else self.CHEAP
+
+        if not await self.admit(priority):
+            rejections.inc(priority)
+
+            response = JSONResponse(
+                {'detail': 'The service is overloaded'},
+                503,
+                {'Retry-After': str(max(ceil(self.target), 1))},
+            )
+
+            return await response(scope, receive, send)
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.release(priority)
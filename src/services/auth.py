@@ -1,18 +1,28 @@
+from contextlib import suppress
 from enum import Enum
-from datetime import datetime, timedelta, UTC
+from datetime import timedelta
+from functools import cached_property
 from pickle import dumps, loads
+from time import time
+from typing import AsyncGenerator
+from uuid import uuid4
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import jwt, JWTError
-from passlib.context import CryptContext
 from redis import Redis
-from sqlalchemy import select
+from redis.exceptions import RedisError
+from sqlalchemy import lambda_stmt, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.database import get_db, User
+from src.database import get_db, get_replica_db, init_db_once, \
+    read_session, User
 from src.schemas.user import Response
-from .environment import environment
+from .breakers import Open
+from .cache import circuit
+from .metrics import Metric
+from .revocation import revocations
+from .settings import get_redis
+from .tokens import InvalidToken, Signer
 
 
 class Token(Enum):
@@ -20,21 +30,35 @@ class Token(Enum):
     REFRESH = 'refresh_token'
 
 
-class Auth:
-    __pwd_context = CryptContext(['bcrypt'], deprecated='auto')
+user_cache = Metric(
+    'user_cache_requests_total',
+    'Lookups of the current user in the cache.',
+    ('result',),
+)
 
-    def __init__(self) -> None:
-        '''
-        Setting the encryption algorithm and secret key for the JWT token. A
-        connection to the caching service is also made to save data about the
-        current user.
-        '''
 
-        self.__ALGORITHM = environment('JWT_ALGORITHM')
-        self.__SECRET = environment('JWT_SECRET')
-
-        self.__cache = Redis(
-            **environment('REDIS', True, True),
+class Auth:
+    '''
+    The service is created when the module is imported, but nothing is loaded
+    then: the keys that sign and verify the JWT tokens, the password hasher
+    and the connection to the caching service, which saves data about the
+    current user, are made when they are first used.
+    '''
+
+    @cached_property
+    def __pwd_context(self):
+        from passlib.context import CryptContext
+
+        return CryptContext(['bcrypt'], deprecated='auto')
+
+    @cached_property
+    def __signer(self) -> Signer:
+        return Signer.load()
+
+    @cached_property
+    def __cache(self) -> Redis:
+        return Redis(
+            **get_redis().model_dump(),
             db=0,
             encoding='utf-8',
             decode_responses=True,
@@ -69,11 +93,13 @@ class Auth:
         self,
         email: str,
         token: Token = None,
-        expire: bool = False
+        expire: bool = False,
+        claims: dict = None
     ) -> str:
         '''
         Generation of one of the types of tokens where the e-mail address,
-        creation date and expiration date are used as the payload.
+        creation date, expiration date and a unique identifier, by which the
+        token can be revoked, are used as the payload.
 
         :param email: The email address used as part of the payload.
         :type email: str
@@ -83,22 +109,52 @@ class Auth:
         :param expire: True value for specifying the token's validity period in
             days, otherwise in minutes.
         :type expire: bool
+        :param claims: Additional claims of the payload.
+        :type claims: dict
         :return: A string representation of the generated token.
         :rtype: str
         '''
 
+        now = int(time())
+        lifetime = timedelta(days=7) if expire else timedelta(minutes=15)
+
         payload = {
             'sub': email,
-            **{key: datetime.now(UTC) for key in ('iat', 'exp')},
+            'iat': now,
+            'exp': now + int(lifetime.total_seconds()),
+            'jti': uuid4().hex,
+            **(claims or {}),
         }
 
         if token:
             payload['scope'] = token.value
 
-        payload['exp'] += timedelta(days=7) if expire \
-            else timedelta(minutes=15)
+        return self.__signer.encode(payload)
+
+    async def create_tokens(self, email: str, claims: dict = None) -> dict:
+        '''
+        Generation of the pair of the access and refresh tokens that a user
+        receives after logging in.
+
+        :param email: The email address used as part of the payload.
+        :type email: str
+        :param claims: Additional claims of the payloads of both tokens.
+        :type claims: dict
+        :return: Both tokens and their type.
+        :rtype: dict
+        '''
 
-        return jwt.encode(payload, self.__SECRET, self.__ALGORITHM)
+        return {
+            **{
+                token.value: await self.create_token(
+                    email,
+                    token,
+                    claims=claims,
+                )
+                for token in Token
+            },
+            'token_type': 'bearer',
+        }
 
     async def decode_token(self, token: str, type: Token = None) -> str:
         '''
@@ -117,17 +173,36 @@ class Auth:
             incorrect.
         '''
 
+        return (await self.decode_payload(token, type))['sub']
+
+    async def decode_payload(self, token: str, type: Token = None) -> dict:
+        '''
+        Extract the whole payload from the token string representation.
+
+        :param token: The token from which you need to get information.
+        :type token: str
+        :param token: One of two common types of tokens (access token and
+            refresh token) or an empty value for a non-standard token.
+        :type token: Token
+        :return: The claims of the token.
+        :rtype: dict
+
+        :raises HTTPException: If the token cannot be decoded with an incorrect
+            structure or when the type of token specified in the payload is
+            incorrect.
+        '''
+
         try:
-            payload = jwt.decode(token, self.__SECRET, [self.__ALGORITHM])
+            payload = self.__signer.decode(token)
 
             if not type or payload['scope'] == type.value:
-                return payload['sub']
+                return payload
 
             raise HTTPException(
                 status.HTTP_401_UNAUTHORIZED,
                 'Invalid scope for token',
             )
-        except JWTError:
+        except InvalidToken:
             raise HTTPException(
                 status.HTTP_422_UNPROCESSABLE_ENTITY,
                 'Invalid token',
@@ -151,27 +226,31 @@ class Auth:
         :rtype: Response | None
         '''
 
-        user = await db.execute(select(User).where(User.email == email))
+        user = await db.execute(lambda_stmt(
+            lambda: select(User).where(User.email == email),
+        ))
 
         return user.scalar_one_or_none()
 
     async def get_current_user(
         self,
         token: str = Depends(oauth2_scheme),
-        db: AsyncSession = Depends(get_db)
+        db: AsyncSession = Depends(get_replica_db)
     ) -> Response:
         '''
         Get the logged in user.
 
         :param token: The access token by which the user is searched.
         :type token: str
-        :param db: Database connection.
+        :param db: Database connection, a replica is enough as the user is
+            cached for longer than it lags.
         :type db: AsyncSession
         :return: The entity of the found user.
         :rtype: Response
 
-        :raises HTTPException: If the token type does not match or the user
-            with the email address contained in the token does not exist.
+        :raises HTTPException: If the token type does not match, the token is
+            revoked or the user with the email address contained in the token
+            does not exist.
         '''
 
         credentials_exception = HTTPException(
@@ -181,23 +260,58 @@ class Auth:
         )
 
         try:
-            payload = jwt.decode(token, self.__SECRET, [self.__ALGORITHM])
+            payload = self.__signer.decode(token)
 
             if payload['scope'] != Token.ACCESS.value or not payload['sub']:
                 raise credentials_exception
-        except JWTError:
+        except InvalidToken:
             raise credentials_exception
 
-        if (user := self.__cache.get(name := f"user:{payload['sub']}")):
-            user = loads(user)
-        else:
-            if not (user := await self.get_user_by_email(payload['sub'], db)):
-                raise credentials_exception
+        if await revocations.revoked(payload.get('jti')):
+            raise credentials_exception
+
+        name = f"user:{payload['sub']}"
+        user = None
+
+        # The lookup goes to the database alone while the cache is failing.
+        with suppress(Open, RedisError), circuit:
+            user = self.__cache.get(name)
+
+        if user:
+            user_cache.inc('hit')
+
+            return loads(user)
 
-            self.__cache.set(name, dumps(user))
-            self.__cache.expire(name, 3600)  # 1 hour
+        user_cache.inc('miss' if circuit.state == circuit.CLOSED else 'bypass')
+
+        if not (user := await self.get_user_by_email(payload['sub'], db)):
+            raise credentials_exception
+
+        with suppress(Open, RedisError), circuit:
+            self.__cache.set(name, dumps(user), ex=3600)  # 1 hour
 
         return user
 
 
 auth_service = Auth()
+
+
+async def get_read_db(
+    user: User = Depends(auth_service.get_current_user),
+    db_init=Depends(init_db_once)
+) -> AsyncGenerator[AsyncSession, None]:
+    '''
+    Granting access to a replica of the database for the read-only routes of
+    the current user, or to the primary database right after the user's own
+    write so that it is seen.
+
+    :param user: The current user.
+    :type user: User
+    :param db_init: Setting up the connection to the database.
+    :type db_init: Any
+    :return: A session for working with the database.
+    :rtype: AsyncGenerator[AsyncSession, None]
+    '''
+
+    async with read_session(user.id) as session:
+        yield session
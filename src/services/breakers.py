@@ -0,0 +1,168 @@
+from time import monotonic
+from types import TracebackType
+
+from .metrics import Metric
+from .settings import get_breaker
+
+
+class Open(Exception):
+    '''
+    The call was not made because the dependency is failing.
+    '''
+
+
+class Breaker:
+    '''
+    Circuit breaker of one external dependency. After a number of failures in
+    a row the dependency is not called for a while, so that the requests take
+    their fallback at once instead of waiting for its timeout, and then a
+    single trial call decides whether it is closed again.
+
+    It is used as a context manager around the calls, synchronous or not:
+
+        async with breakers['smtp']:
+            await send()
+
+    which raises :class:`Open` instead of entering while the breaker is open.
+    Errors other than the given ones pass through without counting.
+    '''
+
+    CLOSED, HALF_OPEN, OPEN = 'closed', 'half_open', 'open'
+
+    def __init__(
+        self,
+        name: str,
+        errors: tuple[type[BaseException], ...] = (Exception,),
+        threshold: int = 5,
+        reset: float = 30
+    ) -> None:
+        '''
+        :param name: The name of the dependency in the metrics.
+        :type name: str
+        :param errors: The exceptions that count as failures of the
+            dependency, timeouts included.
+        :type errors: tuple[type[BaseException], ...]
+        :param threshold: The number of failures in a row that opens the
+            breaker.
+        :type threshold: int
+        :param reset: The number of seconds after which a trial call is let
+            through an open breaker.
+        :type reset: float
+        '''
+
+        self.name = name
+        self.errors = errors
+        self.threshold = threshold
+        self.reset = reset
+        self.failures = 0
+        self.opened = 0.0
+        self.trial = False
+
+    @property
+    def state(self) -> str:
+        if self.failures < self.threshold:
+            return self.CLOSED
+
+        if monotonic() - self.opened < self.reset:
+            return self.OPEN
+
+        return self.HALF_OPEN
+
+    def __enter__(self) -> 'Breaker':
+        if (state := self.state) == self.OPEN or \
+                state == self.HALF_OPEN and self.trial:
+            rejections.inc(self.name)
+
+            raise Open(f'{self.name} is unavailable')
+
+        self.trial = state == self.HALF_OPEN
+
+        return self
+
+    def __exit__(
+        self,
+        kind: type[BaseException] | None,
+        error: BaseException | None,
+        traceback: TracebackType | None
+    ) -> None:
+        self.trial = False
+
+        if kind is None:
+            self.failures = 0
+        elif issubclass(kind, self.errors):
+            failures.inc(self.name)
+
+            self.failures += 1
+
+            if self.failures >= self.threshold:
+                self.opened = monotonic()
+
+    async def __aenter__(self) -> 'Breaker':
+        return self.__enter__()
+
+    async def __aexit__(
+        self,
+        kind: type[BaseException] | None,
+        error: BaseException | None,
+        traceback: TracebackType | None
+    ) -> None:
+        self.__exit__(kind, error, traceback)
+
+
+failures = Metric(
+    'breaker_failures_total',
+    'Failed calls of the external dependencies.',
+    ('dependency',),
+)
+
+rejections = Metric(
+    'breaker_rejected_total',
+    'Calls not made because the breaker of the dependency was open.',
+    ('dependency',),
+)
+
+breakers: dict[str, Breaker] = {}
+
+
+def breaker(
+    name: str,
+    errors: tuple[type[BaseException], ...] = (Exception,)
+) -> Breaker:
+    '''
+    The breaker of a dependency, created with the settings of the
+    application, for example ``BREAKER_THRESHOLD=5`` and ``BREAKER_RESET=30``,
+    the first time it is requested.
+
+    :param name: The name of the dependency.
+    :type name: str
+    :param errors: The exceptions that count as its failures.
+    :type errors: tuple[type[BaseException], ...]
+    :return: The breaker.
+    :rtype: Breaker
+    '''
+
+    if name not in breakers:
+        settings = get_breaker()
+
+        breakers[name] = Breaker(
+            name,
+            errors,
+            settings.threshold,
+            settings.reset,
+        )
+
+    return breakers[name]
+
+
+states = Metric(
+    'breaker_state',
+    'State of the breakers: 0 closed, 1 half open, 2 open.',
+    ('dependency',),
+    'gauge',
+    lambda: {
+        (name,): (Breaker.CLOSED, Breaker.HALF_OPEN, Breaker.OPEN).index(
+            item.state,
+        )
+        for name, item in breakers.items()
+    },
+)
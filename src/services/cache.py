@@ -0,0 +1,46 @@
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from .breakers import breaker
+from .settings import get_redis
+
+
+cache: Redis = None
+
+# Shared by the asynchronous client and the synchronous one of the current
+# user lookup, as both fail together.
+circuit = breaker('redis', (RedisError,))
+
+
+async def init_cache() -> Redis:
+    '''
+    Connecting to the caching service that is shared by all the subsystems of
+    the application within the current worker.
+
+    :return: Asynchronous client of the caching service.
+    :rtype: Redis
+    '''
+
+    global cache
+
+    cache = await Redis(
+        **get_redis().model_dump(),
+        db=0,
+        encoding='utf-8',
+        decode_responses=True,
+    )
+
+    return cache
+
+
+async def close_cache() -> None:
+    '''
+    Closing the connection to the caching service when the application stops.
+    '''
+
+    global cache
+
+    if cache:
+        await cache.aclose()
+
+        cache = None
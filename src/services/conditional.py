@@ -0,0 +1,149 @@
+from datetime import datetime, UTC
+from email.utils import format_datetime, parsedate_to_datetime
+from hashlib import blake2b
+
+from fastapi import HTTPException, Request, Response, status
+
+
+def etag(*parts, weak: bool = False) -> str:
+    '''
+    Build an entity tag from the metadata of a resource.
+
+    :param parts: Values that change whenever the representation changes. A
+        single value is used as is, several ones are hashed.
+    :param weak: Indication that the tag is a weak validator.
+    :type weak: bool
+    :return: The quoted entity tag.
+    :rtype: str
+    '''
+
+    value = str(parts[0]) if len(parts) == 1 \
+        else blake2b(repr(parts).encode(), digest_size=8).hexdigest()
+
+    return f'{"W/" if weak else ""}"{value}"'
+
+
+def matches(header: str | None, tag: str) -> bool:
+    '''
+    Weak comparison of an entity tag with the list from a request header.
+
+    :param header: The value of the If-None-Match or If-Match header.
+    :type header: str | None
+    :param tag: The current entity tag of the resource.
+    :type tag: str
+    :return: True if any of the listed tags matches the current one.
+    :rtype: bool
+    '''
+
+    if not header:
+        return False
+
+    tag = tag.removeprefix('W/')
+
+    return any(
+        item == '*' or item.removeprefix('W/') == tag
+        for item in map(str.strip, header.split(','))
+    )
+
+
+class Conditional:
+    def __init__(self, request: Request, response: Response) -> None:
+        '''
+        Dependency that answers conditional GET requests.
+
+        :param request: The incoming request with the validators of the
+            client.
+        :type request: Request
+        :param response: The outgoing response that receives the validators
+            of the resource.
+        :type response: Response
+        '''
+
+        self.__request = request
+        self.__response = response
+
+    def versions(self) -> list[int]:
+        '''
+        Get the versions of the resource that the client expects to modify.
+
+        :return: The versions listed in the If-Match header or an empty list
+            if the header is missing or is a wildcard.
+        :rtype: list[int]
+
+        :raises HTTPException: If the header contains no strong entity tag of
+            a version.
+        '''
+
+        if (header := self.__request.headers.get('if-match', '*')) == '*':
+            return []
+
+        if not (result := [
+            int(item[1:-1])
+            for item in map(str.strip, header.split(','))
+            if item[:1] == item[-1:] == '"' and item[1:-1].isdigit()
+        ]):
+            raise HTTPException(
+                status.HTTP_412_PRECONDITION_FAILED,
+                'Contact has been changed',
+            )
+
+        return result
+
+    def tag(self, tag: str, modified: datetime = None) -> dict:
+        '''
+        Setting the validators of the resource to the outgoing response.
+
+        :param tag: The entity tag of the resource.
+        :type tag: str
+        :param modified: The time of the last change of the resource.
+        :type modified: datetime
+        :return: The headers with the validators.
+        :rtype: dict
+        '''
+
+        headers = {'ETag': tag}
+
+        if modified:
+            if not modified.tzinfo:
+                modified = modified.replace(tzinfo=UTC)
+
+            headers['Last-Modified'] = format_datetime(modified, True)
+
+        self.__response.headers.update(headers)
+
+        return headers
+
+    def check(self, tag: str, modified: datetime = None) -> None:
+        '''
+        Setting the validators of the resource and interrupting the request
+        when the client already has its current representation.
+
+        :param tag: The entity tag of the resource.
+        :type tag: str
+        :param modified: The time of the last change of the resource.
+        :type modified: datetime
+
+        :raises HTTPException: With the 304 status if the representation of
+            the client is current.
+        '''
+
+        headers = self.tag(tag, modified)
+
+        if modified and not modified.tzinfo:
+            modified = modified.replace(tzinfo=UTC)
+
+        if (header := self.__request.headers.get('if-none-match')) is not None:
+            fresh = matches(header, tag)
+        elif modified and (
+            header := self.__request.headers.get('if-modified-since')
+        ):
+            try:
+                fresh = modified.replace(microsecond=0) <= \
+                    parsedate_to_datetime(header)
+            except (TypeError, ValueError):
+                fresh = False
+        else:
+            fresh = False
+
+        if fresh:
+            raise HTTPException(status.HTTP_304_NOT_MODIFIED, headers=headers)
@@ -1,16 +1,67 @@
+from asyncio import CancelledError, create_task, sleep
+from collections import deque
+from contextlib import suppress
+from functools import lru_cache
+from logging import getLogger
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType
-from fastapi_mail.errors import ConnectionErrors
 from pydantic import EmailStr
 
 from .auth import auth_service
-from .environment import environment
+from .breakers import breaker
+from .metrics import Metric
+from .settings import get_mail, get_outbox
+
+if TYPE_CHECKING:
+    from fastapi_mail import ConnectionConfig
+
+
+pending = Metric(
+    'email_queue_depth',
+    'E-mails waiting to be sent.',
+    kind='gauge',
+)
+
+dropped = Metric(
+    'email_dropped_total',
+    'E-mails dropped because the queue of the unsent ones was full.',
+)
+
+logger = getLogger(__name__)
+
+# Any failure to send counts, the errors of the mail library are not known
+# before it is imported.
+circuit = breaker('smtp')
+
+
+@lru_cache
+def connection() -> 'ConnectionConfig':
+    '''
+    The settings of the SMTP connection, created once from the validated mail
+    settings when the first e-mail is sent, which is also when the mail
+    library is imported.
+
+    :return: The settings of the connection.
+    :rtype: ConnectionConfig
+    '''
+
+    from fastapi_mail import ConnectionConfig
+
+    return ConnectionConfig(
+        MAIL_FROM_NAME='Contacts API',
+        TEMPLATE_FOLDER=Path(__file__).parent / 'templates',
+        **{
+            key.upper(): value
+            for key, value in get_mail().model_dump().items()
+        },
+    )
 
 
 async def send(address: EmailStr, subject: str, host: str, type: str) -> None:
     '''
-    Send an email to the specified address.
+    Send an email to the specified address, or put it in the queue of the
+    unsent ones if the SMTP server fails or is known to be failing.
 
     :param address: The e-mail address to which the letter should be sent.
     :type address: EmailStr
@@ -26,22 +77,111 @@ async def send(address: EmailStr, subject: str, host: str, type: str) -> None:
     :type type: str
     '''
 
+    pending.inc()
+
+    try:
+        await deliver(address, subject, host, type)
+    except Exception as err:
+        logger.warning('E-mail queued: %s', err)
+
+        outbox.put(address, subject, host, type)
+    else:
+        pending.dec()
+
+
+async def deliver(
+    address: EmailStr,
+    subject: str,
+    host: str,
+    type: str
+) -> None:
+    from fastapi_mail import FastMail, MessageSchema, MessageType
+
     TOKEN = await auth_service.create_token(address, expire=True)
 
-    config = ConnectionConfig(
-        MAIL_FROM_NAME='Contacts API',
-        TEMPLATE_FOLDER=Path(__file__).parent / 'templates',
-        **environment('FASTAPIMAIL', True),
+    message = MessageSchema(
+        subject=subject,
+        recipients=[address],
+        template_body={'url': f'{host}api/auth/{type}/{TOKEN}'},
+        subtype=MessageType.html,
     )
 
-    try:
-        message = MessageSchema(
-            subject=subject,
-            recipients=[address],
-            template_body={'url': f'{host}api/auth/{type}/{TOKEN}'},
-            subtype=MessageType.html,
+    async with circuit:
+        await FastMail(connection()).send_message(
+            message,
+            f'{type}-email.html',
         )
 
-        await FastMail(config).send_message(message, f'{type}-email.html')
-    except ConnectionErrors as err:
-        print(err)
+
+class Outbox:
+    '''
+    E-mails of the worker that were not sent because the SMTP server failed.
+    They are sent again in the background, oldest first, whenever its breaker
+    lets a call through, and the oldest ones are dropped when there are too
+    many of them.
+    '''
+
+    def __init__(self) -> None:
+        '''
+        Reading the number of e-mails the queue holds and the number of
+        seconds between the attempts to send them.
+        '''
+
+        settings = get_outbox()
+
+        self.__capacity = settings.queue
+        self.__interval = settings.retry
+        self.__queue: deque[tuple] = deque()
+        self.__task = None
+
+    def __len__(self) -> int:
+        return len(self.__queue)
+
+    def put(self, *message) -> None:
+        if len(self.__queue) >= self.__capacity:
+            self.__queue.popleft()
+
+            pending.dec()
+            dropped.inc()
+
+        self.__queue.append(message)
+
+    async def drain(self) -> None:
+        '''
+        Sending the queued e-mails until one of them fails again.
+        '''
+
+        while self.__queue and circuit.state != circuit.OPEN:
+            message = self.__queue.popleft()
+
+            try:
+                await deliver(*message)
+            except Exception as err:
+                logger.warning('E-mail not sent: %s', err)
+
+                self.__queue.appendleft(message)
+
+                return
+
+            pending.dec()
+
+    async def __run(self) -> None:
+        while True:
+            await sleep(self.__interval)
+            await self.drain()
+
+    def start(self) -> None:
+        if not self.__task:
+            self.__task = create_task(self.__run())
+
+    async def stop(self) -> None:
+        if self.__task:
+            self.__task.cancel()
+
+            with suppress(CancelledError):
+                await self.__task
+
+            self.__task = None
+
+
+outbox = Outbox()
@@ -0,0 +1,250 @@
+from asyncio import CancelledError, Queue, QueueEmpty, QueueFull, \
+    create_task, sleep, wait_for
+from collections import defaultdict
+from contextlib import suppress
+from logging import getLogger
+from typing import AsyncIterator
+
+from redis.exceptions import RedisError
+
+from src.schemas.contact import Change
+from . import cache
+from .settings import get_events
+
+
+logger = getLogger(__name__)
+
+
+class Subscription:
+    '''
+    The events waiting to be sent to one connected client. The queue is
+    bounded: a client that does not keep up is disconnected instead of
+    growing the memory of the worker, and it resumes from the last event it
+    has received.
+    '''
+
+    def __init__(self, size: int) -> None:
+        self.queue: Queue[tuple[int, str]] = Queue(size)
+        self.closed = False
+
+    async def next(self, timeout: float) -> tuple[int, str] | None:
+        '''
+        Waiting for the next event.
+
+        :param timeout: The number of seconds to wait.
+        :type timeout: float
+        :return: The revision and the event or an empty value if there was
+            none in time or the subscription is closed and drained.
+        :rtype: tuple[int, str] | None
+        '''
+
+        if self.closed:
+            with suppress(QueueEmpty):
+                return self.queue.get_nowait()
+
+            return None
+
+        with suppress(TimeoutError):
+            return await wait_for(self.queue.get(), timeout)
+
+
+class Broker:
+    '''
+    Delivery of contact change events to the clients connected to any worker.
+    The events are published to the caching service and every worker
+    forwards those of its own clients, or they are delivered within the
+    worker when the caching service is not connected.
+    '''
+
+    CHANNEL = 'contacts'
+    BACKOFF = .5, 30  # The first and the longest pause before reconnecting.
+
+    def __init__(self) -> None:
+        '''
+        Reading the maximum number of events waiting for one client and the
+        number of seconds between heartbeats of an idle stream.
+        '''
+
+        settings = get_events()
+
+        self.__size = settings.queue
+        self.__heartbeat = settings.heartbeat
+        self.__subscriptions: dict[int, set[Subscription]] = defaultdict(set)
+        self.__task = None
+
+    def subscribe(self, user_id: int) -> Subscription:
+        subscription = Subscription(self.__size)
+
+        self.__subscriptions[user_id].add(subscription)
+
+        return subscription
+
+    def unsubscribe(self, user_id: int, subscription: Subscription) -> None:
+        if (subscriptions := self.__subscriptions.get(user_id)) is not None:
+            subscriptions.discard(subscription)
+
+            if not subscriptions:
+                del self.__subscriptions[user_id]
+
+    def dispatch(self, user_id: int, event: str) -> None:
+        '''
+        Passing an event to the clients of a user connected to this worker.
+
+        :param user_id: The owner of the changed contact.
+        :type user_id: int
+        :param event: The formatted event.
+        :type event: str
+        '''
+
+        revision = int(event[4:event.index('\n')])
+
+        for subscription in list(self.__subscriptions.get(user_id, ())):
+            try:
+                subscription.queue.put_nowait((revision, event))
+            except QueueFull:
+                subscription.closed = True
+
+                self.unsubscribe(user_id, subscription)
+
+    async def publish(self, user_id: int, change: dict) -> None:
+        '''
+        Announcing a change of a contact to all the workers.
+
+        :param user_id: The owner of the changed contact.
+        :type user_id: int
+        :param change: The revision, the identifier of the contact and either
+            its state or the indication that it has been deleted.
+        :type change: dict
+        '''
+
+        if not cache.cache and user_id not in self.__subscriptions:
+            return
+
+        event = serialize(Change.model_validate(change))
+
+        if cache.cache:
+            with suppress(RedisError):
+                await cache.cache.publish(f'{self.CHANNEL}:{user_id}', event)
+
+                return
+
+        self.dispatch(user_id, event)
+
+    async def stream(
+        self,
+        user_id: int,
+        subscription: Subscription | None,
+        replay: list[str],
+        revision: int
+    ) -> AsyncIterator[str]:
+        '''
+        The events of a single client: the missed ones first, then the live
+        ones, with comments sent as heartbeats while there are none.
+
+        :param user_id: The owner of the contacts.
+        :type user_id: int
+        :param subscription: The subscription of the client or an empty value
+            if the stream ends after the missed events.
+        :type subscription: Subscription | None
+        :param replay: The events that the client missed.
+        :type replay: list[str]
+        :param revision: The revision of the last missed event, the live
+            events up to it are skipped.
+        :type revision: int
+        :return: The events in the text form of the protocol.
+        :rtype: AsyncIterator[str]
+        '''
+
+        try:
+            yield f'retry: {int(self.__heartbeat * 1000)}\n\n'
+
+            for event in replay:
+                yield event
+
+            if not subscription:
+                return
+
+            while (
+                item := await subscription.next(self.__heartbeat)
+            ) or not subscription.closed:
+                if not item:
+                    yield ': ping\n\n'
+                elif item[0] > revision:
+                    revision, event = item
+
+                    yield event
+        finally:
+            if subscription:
+                self.unsubscribe(user_id, subscription)
+
+    def disconnect(self) -> None:
+        '''
+        Ending the streams of all the clients of this worker, which resume
+        from their last events and so get the ones that were missed.
+        '''
+
+        for subscriptions in self.__subscriptions.values():
+            for subscription in subscriptions:
+                subscription.closed = True
+
+        self.__subscriptions.clear()
+
+    async def __listen(self) -> None:
+        delay = self.BACKOFF[0]
+
+        while True:
+            try:
+                async with cache.cache.pubsub() as pubsub:
+                    await pubsub.psubscribe(f'{self.CHANNEL}:*')
+
+                    delay = self.BACKOFF[0]
+
+                    async for message in pubsub.listen():
+                        if message['type'] == 'pmessage':
+                            self.dispatch(
+                                int(message['channel'].rsplit(':', 1)[1]),
+                                message['data'],
+                            )
+            except RedisError as err:
+                logger.warning('Contact events not received: %s', err)
+
+            # The events published in the meantime are lost for this worker.
+            self.disconnect()
+
+            await sleep(delay)
+
+            delay = min(delay * 2, self.BACKOFF[1])
+
+    def start(self) -> None:
+        '''
+        Receiving the events of all the workers in the background.
+        '''
+
+        if cache.cache and not self.__task:
+            self.__task = create_task(self.__listen())
+
+    async def stop(self) -> None:
+        if self.__task:
+            self.__task.cancel()
+
+            with suppress(CancelledError, RedisError):
+                await self.__task
+
+            self.__task = None
+
+
+def serialize(change: Change) -> str:
+    '''
+    Presentation of a change as a server-sent event.
+
+    :param change: The change of a contact.
+    :type change: Change
+    :return: The event whose identifier is the revision of the change.
+    :rtype: str
+    '''
+
+    return f'id: {change.revision}\nevent: change\n' \
+        f'data: {change.model_dump_json()}\n\n'
+
+
+broker = Broker()
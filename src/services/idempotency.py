@@ -0,0 +1,281 @@
+from asyncio import Future, get_running_loop, shield, sleep, timeout
+from base64 import b64decode, b64encode
+from hashlib import blake2b
+from json import dumps, loads
+from time import monotonic
+
+from fastapi import HTTPException
+from redis.exceptions import RedisError
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse, Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from . import cache
+from .auth import auth_service, Token
+from .breakers import Open
+from .metrics import Metric
+from .settings import get_idempotency
+
+
+replays = Metric(
+    'idempotency_requests_total',
+    'Requests with an idempotency key by their outcome.',
+    ('result',),
+)
+
+
+class IdempotencyMiddleware:
+    '''
+    Support of the ``Idempotency-Key`` header on the routes that create
+    resources, so that the retries of a client do not create them again.
+
+    The first request with a key is handled and its response is kept by the
+    caching service. The retries get that response again, with the
+    ``Idempotent-Replayed`` header, and those that arrive while the first one
+    is still handled wait for its response instead of being handled too. A
+    key is bound to the user and the route, and it may not be reused with
+    another body. Without the caching service the requests are simply
+    handled.
+    '''
+
+    PREFIX = 'idempotency'
+    PENDING = 'pending'
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        routes: set[tuple[str, str]] = frozenset()
+    ) -> None:
+        '''
+        Reading the number of seconds the responses are kept and the number
+        of seconds a retry waits for the response of the first request, for
+        example ``IDEMPOTENCY_TTL=86400``.
+
+        :param app: The application.
+        :type app: ASGIApp
+        :param routes: The methods and paths of the routes that accept the
+            header.
+        :type routes: set[tuple[str, str]]
+        '''
+
+        settings = get_idempotency()
+
+        self.app = app
+        self.routes = routes
+        self.ttl = settings.ttl
+        self.wait = settings.wait
+        self.local: dict[str, Future] = {}
+
+    async def principal(self, headers: Headers) -> str:
+        '''
+        The user the key belongs to, taken from the access token without
+        looking the user up, or an empty value for anonymous requests.
+
+        :param headers: The headers of the request.
+        :type headers: Headers
+        :return: The e-mail address of the user.
+        :rtype: str
+        '''
+
+        scheme, _, token = headers.get('authorization', '').partition(' ')
+
+        if scheme.lower() != 'bearer' or not token:
+            return ''
+
+        try:
+            return await auth_service.decode_token(token, Token.ACCESS)
+        except HTTPException:
+            return ''
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http' or \
+                (scope['method'], scope['path']) not in self.routes:
+            return await self.app(scope, receive, send)
+
+        headers = Headers(scope=scope)
+
+        if not (header := headers.get('idempotency-key')) or not cache.cache:
+            return await self.app(scope, receive, send)
+
+        if len(header) > 255:
+            return await JSONResponse(
+                {'detail': 'Idempotency-Key is too long'},
+                400,
+            )(scope, receive, send)
+
+        body = b''
+
+        while True:
+            message = await receive()
+            body += message.get('body', b'')
+
+            if not message.get('more_body'):
+                break
+
+        key = ':'.join((
+            self.PREFIX,
+            scope['method'],
+            scope['path'],
+            await self.principal(headers),
+            header,
+        ))
+
+        fingerprint = blake2b(body, digest_size=16).hexdigest()
+
+        try:
+            async with cache.circuit:
+                claimed = await cache.cache.set(
+                    key,
+                    dumps({'state': self.PENDING, 'fingerprint': fingerprint}),
+                    nx=True,
+                    ex=max(int(self.wait), 1),
+                )
+        except (Open, RedisError):
+            claimed = None
+            key = None
+
+        delivered = False
+
+        async def resend() -> Message:
+            nonlocal delivered
+
+            if delivered:
+                return await receive()
+
+            delivered = True
+
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+
+        if key is None:
+            replays.inc('bypass')
+
+            return await self.app(scope, resend, send)
+
+        if not claimed:
+            return await self.__replay(key, fingerprint, scope, receive, send)
+
+        self.local[key] = get_running_loop().create_future()
+        replays.inc('first')
+
+        await self.__handle(key, fingerprint, scope, resend, send)
+
+    async def __handle(
+        self,
+        key: str,
+        fingerprint: str,
+        scope: Scope,
+        receive: Receive,
+        send: Send
+    ) -> None:
+        '''
+        Handling the first request with a key and keeping its response, unless
+        it is a server error, which the client may retry.
+        '''
+
+        start = {}
+        chunks = []
+
+        async def capture(message: Message) -> None:
+            if message['type'] == 'http.response.start':
+                start.update(message)
+            elif message['type'] == 'http.response.body':
+                chunks.append(message.get('body', b''))
+
+            await send(message)
+
+        stored = None
+
+        try:
+            await self.app(scope, receive, capture)
+
+            if start and start['status'] < 500:
+                stored = dumps({
+                    'state': 'done',
+                    'fingerprint': fingerprint,
+                    'status': start['status'],
+                    'headers': [
+                        [name.decode('latin-1'), value.decode('latin-1')]
+                        for name, value in start.get('headers', ())
+                    ],
+                    'body': b64encode(b''.join(chunks)).decode(),
+                })
+        finally:
+            try:
+                async with cache.circuit:
+                    if stored:
+                        await cache.cache.set(key, stored, ex=self.ttl)
+                    else:
+                        await cache.cache.delete(key)
+            except (Open, RedisError):
+                pass
+
+            if not (waiter := self.local.pop(key)).done():
+                waiter.set_result(stored)
+
+    async def __replay(
+        self,
+        key: str,
+        fingerprint: str,
+        scope: Scope,
+        receive: Receive,
+        send: Send
+    ) -> None:
+        '''
+        Answering a retry with the response of the first request, waiting for
+        it if that request is still handled, by this worker or another one.
+        '''
+
+        stored = None
+        deadline = monotonic() + self.wait
+
+        if (waiter := self.local.get(key)):
+            try:
+                async with timeout(self.wait):
+                    stored = await shield(waiter)
+            except TimeoutError:
+                pass
+
+        while not stored and monotonic() < deadline:
+            try:
+                async with cache.circuit:
+                    stored = await cache.cache.get(key)
+            except (Open, RedisError):
+                break
+
+            if not stored:
+                break
+
+            if loads(stored)['state'] == self.PENDING:
+                stored = None
+
+                await sleep(.05)
+
+        if not stored:
+            replays.inc('conflict')
+
+            return await JSONResponse(
+                {'detail': 'A request with this Idempotency-Key is in '
+                 'progress or has failed, retry it later'},
+                409,
+                {'Retry-After': '1'},
+            )(scope, receive, send)
+
+        entry = loads(stored)
+
+        if entry['fingerprint'] != fingerprint:
+            replays.inc('mismatch')
+
+            return await JSONResponse(
+                {'detail': 'Idempotency-Key is used with another request'},
+                422,
+            )(scope, receive, send)
+
+        replays.inc('replay')
+
+        response = Response(b64decode(entry['body']), entry['status'])
+        response.raw_headers = [
+            (name.encode('latin-1'), value.encode('latin-1'))
+            for name, value in entry['headers']
+        ] + [(b'idempotent-replayed', b'true')]
+
+        await response(scope, receive, send)
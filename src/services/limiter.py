@@ -0,0 +1,303 @@
+from math import ceil
+from time import monotonic, time
+from typing import NamedTuple
+
+from fastapi import Depends, HTTPException, Request, Response, status
+from redis.exceptions import RedisError
+
+from src.database import User
+from . import cache
+from .auth import auth_service
+from .breakers import Open
+from .metrics import Metric
+from .settings import get_ratelimit
+
+
+rejections = Metric(
+    'ratelimit_rejected_total',
+    'Requests rejected by the rate limiter.',
+    ('route',),
+)
+
+
+class Quota(NamedTuple):
+    times: int
+    seconds: int
+    weight: int = 1
+
+    @classmethod
+    def parse(cls, value: str) -> 'Quota':
+        '''
+        Build a quota from its textual form.
+
+        :param value: Number of requests, window length in seconds and an
+            optional weight of one request separated by slashes, for example
+            ``60/60/2``.
+        :type value: str
+        :return: The quota described by the value.
+        :rtype: Quota
+        '''
+
+        return cls(*map(int, value.split('/')))
+
+
+class Bucket:
+    '''
+    Local token bucket of a single user on a single route. It is refilled
+    continuously at the quota rate, but never above the allowance that was
+    left in the shared sliding window at the last synchronization, so that
+    all the workers together stay within the quota. Until the first successful
+    synchronization the allowance is unlimited and only the local rate
+    applies.
+    '''
+
+    __slots__ = ('tokens', 'allowance', 'stamp', 'pending', 'synced', 'syncing')
+
+    def __init__(self, quota: Quota) -> None:
+        self.tokens = float(quota.times)
+        self.allowance = float('inf')
+        self.stamp = monotonic()
+        self.pending = 0
+        self.synced = 0.0
+        self.syncing = False
+
+    def refill(self, quota: Quota, now: float) -> None:
+        self.tokens = min(
+            quota.times,
+            self.allowance,
+            self.tokens + (now - self.stamp) * quota.times / quota.seconds,
+        )
+
+        self.stamp = now
+
+    def spend(self, weight: int) -> None:
+        self.tokens -= weight
+        self.allowance -= weight
+        self.pending += weight
+
+
+class Limiter:
+    '''
+    Per-user rate limiter. Every worker spends tokens from an in-process
+    bucket and reports the spent ones to the caching service in batches, so
+    that a request only waits for the network when a batch is full or the
+    synchronization interval is over. While the caching service is failing
+    its breaker keeps the requests from waiting for it, and the local buckets
+    alone limit the users.
+    '''
+
+    PREFIX = 'ratelimit'
+
+    def __init__(self, default: Quota = Quota(3, 60)) -> None:
+        '''
+        Reading the limits which can be overridden per route by its name, for
+        example ``RATELIMIT_ROUTES={"read_contacts": "60/60"}``.
+
+        :param default: The quota of routes without their own settings.
+        :type default: Quota
+        '''
+
+        self.__default = default
+        self.__quotas: dict[str, Quota] = {}
+        self.__buckets: dict[tuple[int, str], Bucket] = {}
+        self.__evicted = 0.0
+        self.rejected = 0
+
+        settings = get_ratelimit()
+
+        self.__batch = settings.batch
+        self.__interval = settings.interval
+        self.__capacity = settings.capacity
+
+        if settings.default:
+            self.__default = Quota.parse(settings.default)
+
+        self.__overrides = {
+            name: Quota.parse(value) for name, value in settings.routes.items()
+        }
+
+    def quota(self, route: str) -> Quota:
+        '''
+        Get the limit of a particular route.
+
+        :param route: The name of the route.
+        :type route: str
+        :return: The quota of the route.
+        :rtype: Quota
+        '''
+
+        if (quota := self.__quotas.get(route)) is None:
+            quota = self.__quotas[route] = self.__overrides.get(
+                route,
+                self.__default,
+            )
+
+        return quota
+
+    async def __sync(self, key: str, bucket: Bucket, quota: Quota) -> None:
+        '''
+        Sending the tokens spent locally to the shared counter and limiting
+        the local bucket by what is left in the sliding window.
+
+        :param key: The identifier of the user and the route.
+        :type key: str
+        :param bucket: The local bucket of the user on the route.
+        :type bucket: Bucket
+        :param quota: The quota of the route.
+        :type quota: Quota
+        '''
+
+        pending, bucket.pending = bucket.pending, 0
+        bucket.syncing = True
+
+        now = time()
+        window = int(now // quota.seconds)
+
+        try:
+            async with cache.circuit, \
+                    cache.cache.pipeline(transaction=False) as pipe:
+                current = f'{self.PREFIX}:{key}:{window}'
+
+                pipe.incrby(current, pending)
+                pipe.expire(current, quota.seconds * 2)
+                pipe.get(f'{self.PREFIX}:{key}:{window - 1}')
+
+                used, _, previous = await pipe.execute()
+        except (Open, RedisError):
+            # Only the local bucket limits the user until the cache is back.
+            bucket.pending += pending
+            bucket.allowance = float('inf')
+        else:
+            elapsed = now / quota.seconds - window
+            used += int(previous or 0) * (1 - elapsed)
+
+            bucket.allowance = max(quota.times - used, 0)
+            bucket.tokens = min(bucket.tokens, bucket.allowance)
+        finally:
+            bucket.synced = monotonic()
+            bucket.syncing = False
+
+    def __evict(self, now: float) -> None:
+        '''
+        Forgetting the buckets that have been fully refilled and, if there are
+        still too many of them, the oldest ones, so that the memory of the
+        worker does not grow with the number of users. The full scan is done
+        at most once per synchronization interval.
+
+        :param now: The current value of the monotonic clock.
+        :type now: float
+        '''
+
+        if now - self.__evicted >= self.__interval:
+            self.__evicted = now
+
+            for key, bucket in list(self.__buckets.items()):
+                if not bucket.pending and not bucket.syncing:
+                    bucket.refill(quota := self.quota(key[1]), now)
+
+                    if bucket.tokens >= quota.times:
+                        del self.__buckets[key]
+
+        while len(self.__buckets) >= self.__capacity and (key := next(
+            (key for key, bucket in self.__buckets.items()
+             if not bucket.syncing),
+            None,
+        )):
+            del self.__buckets[key]
+
+    async def hit(self, user: int, route: str) -> tuple[Quota, Bucket, bool]:
+        '''
+        Spending the tokens of a single request.
+
+        :param user: The identifier of the user.
+        :type user: int
+        :param route: The name of the route.
+        :type route: str
+        :return: The quota of the route, the bucket of the user and an
+            indication that the request is allowed.
+        :rtype: tuple[Quota, Bucket, bool]
+        '''
+
+        quota = self.quota(route)
+        now = monotonic()
+
+        if not (bucket := self.__buckets.get(key := (user, route))):
+            if len(self.__buckets) >= self.__capacity:
+                self.__evict(now)
+
+            bucket = self.__buckets[key] = Bucket(quota)
+
+        bucket.refill(quota, now)
+
+        stale = cache.cache and not bucket.syncing \
+            and now - bucket.synced >= self.__interval
+
+        if bucket.tokens < quota.weight and stale:
+            await self.__sync(f'{user}:{route}', bucket, quota)
+
+            bucket.refill(quota, now)
+
+        if (allowed := bucket.tokens >= quota.weight):
+            bucket.spend(quota.weight)
+        else:
+            self.rejected += 1
+
+            rejections.inc(route)
+
+        if cache.cache and bucket.pending and not bucket.syncing and (
+            bucket.pending >= self.__batch * quota.weight
+            or now - bucket.synced >= self.__interval
+        ):
+            await self.__sync(f'{user}:{route}', bucket, quota)
+
+        return quota, bucket, allowed
+
+    async def __call__(
+        self,
+        request: Request,
+        response: Response,
+        user: User = Depends(auth_service.get_current_user)
+    ) -> None:
+        '''
+        Dependency that limits the number of requests of the current user to
+        the current route.
+
+        :param request: The incoming request.
+        :type request: Request
+        :param response: The outgoing response to which the limit headers are
+            added.
+        :type response: Response
+        :param user: The logged in user.
+        :type user: User
+
+        :raises HTTPException: If the user has exhausted the quota.
+        '''
+
+        quota, bucket, allowed = await self.hit(
+            user.id,
+            request.scope['route'].name,
+        )
+
+        rate = quota.times / quota.seconds
+
+        headers = {
+            'RateLimit-Limit': str(quota.times // quota.weight),
+            'RateLimit-Remaining': str(int(bucket.tokens // quota.weight)),
+            'RateLimit-Reset': str(ceil((quota.times - bucket.tokens) / rate)),
+        }
+
+        if not allowed:
+            headers['Retry-After'] = str(
+                ceil((quota.weight - bucket.tokens) / rate),
+            )
+
+            raise HTTPException(
+                status.HTTP_429_TOO_MANY_REQUESTS,
+                'Too many requests',
+                headers,
+            )
+
+        response.headers.update(headers)
+
+
+limiter = Limiter()
@@ -0,0 +1,200 @@
+from bisect import bisect_left
+from collections import defaultdict
+from time import perf_counter
+from typing import Callable
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class Metric:
+    '''
+    A family of values of one metric distinguished by the values of its
+    labels, exported in the Prometheus text format.
+    '''
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: tuple[str, ...] = (),
+        kind: str = 'counter',
+        collect: Callable[[], dict[tuple, float]] = None
+    ) -> None:
+        '''
+        :param name: The name of the metric.
+        :type name: str
+        :param help: The description of the metric.
+        :type help: str
+        :param labels: The names of the labels.
+        :type labels: tuple[str, ...]
+        :param kind: Either ``counter`` or ``gauge``.
+        :type kind: str
+        :param collect: The function that returns the current values by the
+            values of the labels at the time of the export instead of keeping
+            them in the metric.
+        :type collect: Callable[[], dict[tuple, float]]
+        '''
+
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.kind = kind
+        self.values: dict[tuple, float] = defaultdict(float)
+        self.__collect = collect
+
+        registry.append(self)
+
+    def inc(self, *labels, value: float = 1) -> None:
+        self.values[labels] += value
+
+    def dec(self, *labels, value: float = 1) -> None:
+        self.values[labels] -= value
+
+    def format(self, labels: tuple, extra: str = '') -> str:
+        pairs = [f'{key}="{value}"' for key, value in zip(self.labels, labels)]
+
+        if extra:
+            pairs.append(extra)
+
+        return '{' + ','.join(pairs) + '}' if pairs else ''
+
+    def render(self) -> list[str]:
+        values = self.__collect() if self.__collect else self.values
+
+        return [
+            f'# HELP {self.name} {self.help}',
+            f'# TYPE {self.name} {self.kind}',
+            *(
+                f'{self.name}{self.format(labels)} {value}'
+                for labels, value in values.items()
+            ),
+        ]
+
+
+class Histogram(Metric):
+    BUCKETS = (
+        .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10,
+    )
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = BUCKETS
+    ) -> None:
+        super().__init__(name, help, labels, 'histogram')
+
+        self.buckets = buckets
+        self.counts: dict[tuple, list[int]] = {}
+        self.sums: dict[tuple, float] = defaultdict(float)
+
+    def observe(self, value: float, *labels) -> None:
+        '''
+        Counting a value in the first bucket that can hold it. The cumulative
+        counts are only calculated at the time of the export.
+
+        :param value: The observed value.
+        :type value: float
+        '''
+
+        if (counts := self.counts.get(labels)) is None:
+            counts = self.counts[labels] = [0] * (len(self.buckets) + 1)
+
+        counts[bisect_left(self.buckets, value)] += 1
+        self.sums[labels] += value
+
+    def render(self) -> list[str]:
+        result = [
+            f'# HELP {self.name} {self.help}',
+            f'# TYPE {self.name} histogram',
+        ]
+
+        for labels, counts in list(self.counts.items()):
+            total = 0
+
+            for bound, count in zip((*self.buckets, '+Inf'), counts):
+                total += count
+                bucket = self.format(labels, f'le="{bound}"')
+
+                result.append(f'{self.name}_bucket{bucket} {total}')
+
+            result += [
+                f'{self.name}_sum{self.format(labels)} {self.sums[labels]}',
+                f'{self.name}_count{self.format(labels)} {total}',
+            ]
+
+        return result
+
+
+registry: list[Metric] = []
+
+
+def render() -> str:
+    '''
+    Export of all the metrics of the worker.
+
+    :return: The metrics in the Prometheus text format.
+    :rtype: str
+    '''
+
+    return '\n'.join(
+        line for metric in registry for line in metric.render()
+    ) + '\n'
+
+
+requests = Metric(
+    'http_requests_total',
+    'Number of handled requests.',
+    ('method', 'route', 'status'),
+)
+
+latency = Histogram(
+    'http_request_duration_seconds',
+    'Time spent handling requests.',
+    ('method', 'route'),
+)
+
+in_flight = Metric(
+    'http_requests_in_flight',
+    'Number of requests being handled.',
+    kind='gauge',
+)
+
+
+class MetricsMiddleware:
+    '''
+    Measuring the latency of every request by the template of the path of its
+    route, so that the number of label values stays bounded.
+    '''
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        start = perf_counter()
+        code = 500
+
+        async def respond(message: Message) -> None:
+            nonlocal code
+
+            if message['type'] == 'http.response.start':
+                code = message['status']
+
+            await send(message)
+
+        in_flight.inc()
+
+        try:
+            await self.app(scope, receive, respond)
+        finally:
+            in_flight.dec()
+
+            route = route.path if (route := scope.get('route')) \
+                else 'unmatched'
+
+            latency.observe(perf_counter() - start, scope['method'], route)
+            requests.inc(scope['method'], route, code)
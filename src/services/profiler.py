@@ -0,0 +1,168 @@
+from asyncio import create_task, to_thread
+from collections import Counter
+from hmac import compare_digest
+from os.path import basename
+from sys import _current_frames
+from threading import Event, get_ident
+from time import monotonic, sleep
+from types import FrameType
+
+from fastapi import Header, HTTPException, status
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .settings import get_profiling
+
+
+class Sampler:
+    '''
+    A sampling profiler of one thread. Another thread periodically records
+    the call stack of the profiled one, so the profiled code runs unchanged
+    and only pays for the time the interpreter lock is taken by the sampler.
+    '''
+
+    def __init__(self, thread: int = None) -> None:
+        '''
+        :param thread: The identifier of the profiled thread, the current one
+            by default.
+        :type thread: int
+        '''
+
+        self.__thread = thread or get_ident()
+        self.__interval = get_profiling().interval
+        self.__stop = Event()
+        self.stacks: Counter[str] = Counter()
+
+    @staticmethod
+    def collapse(frame: FrameType) -> str:
+        stack = []
+
+        while frame:
+            code = frame.f_code
+
+            stack.append(
+                f'{code.co_name} '
+                f'({basename(code.co_filename)}:{code.co_firstlineno})'
+            )
+
+            frame = frame.f_back
+
+        return ';'.join(reversed(stack))
+
+    def run(self, seconds: float = None) -> None:
+        '''
+        Recording the stacks until the time is up or the sampler is stopped.
+
+        :param seconds: The duration of profiling or an empty value to profile
+            until the sampler is stopped.
+        :type seconds: float
+        '''
+
+        deadline = monotonic() + seconds if seconds else float('inf')
+
+        while not self.__stop.is_set() and monotonic() < deadline:
+            if (frame := _current_frames().get(self.__thread)):
+                self.stacks[self.collapse(frame)] += 1
+
+            sleep(self.__interval)
+
+    def stop(self) -> None:
+        self.__stop.set()
+
+    def render(self) -> str:
+        '''
+        Export of the recorded stacks.
+
+        :return: One line per distinct stack with the number of its samples,
+            the format accepted by flamegraph.pl, speedscope and similar tools.
+        :rtype: str
+        '''
+
+        return ''.join(
+            f'{stack} {count}\n' for stack, count in self.stacks.most_common()
+        )
+
+
+def authorize(x_profile_token: str = Header()) -> None:
+    '''
+    Dependency that only lets in the holders of the profiling token.
+
+    :param x_profile_token: The token passed by the administrator.
+    :type x_profile_token: str
+
+    :raises HTTPException: If the token is wrong.
+    '''
+
+    if not compare_digest(x_profile_token, get_profiling().token):
+        raise HTTPException(status.HTTP_403_FORBIDDEN, 'Forbidden')
+
+
+async def profile(seconds: float) -> str:
+    '''
+    Profiling the event loop of the current worker for a while, together with
+    all the requests it handles meanwhile.
+
+    :param seconds: The duration of profiling.
+    :type seconds: float
+    :return: The collapsed stacks.
+    :rtype: str
+    '''
+
+    sampler = Sampler()
+
+    await to_thread(sampler.run, seconds)
+
+    return sampler.render()
+
+
+class ProfilerMiddleware:
+    '''
+    Profiling of a single request that carries the profiling token in the
+    X-Profile-Token header. The response of such a request is replaced by the
+    collapsed stacks, while its original status is kept in the X-Profiled-Status
+    header. Other requests only pay for the lookup of the header.
+    '''
+
+    HEADER = b'x-profile-token'
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self.token = get_profiling().token.encode()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http' or not any(
+            name == self.HEADER and compare_digest(value, self.token)
+            for name, value in scope['headers']
+        ) or scope['path'].rstrip('/').endswith('/profile'):
+            return await self.app(scope, receive, send)
+
+        code = 500
+
+        async def respond(message: Message) -> None:
+            nonlocal code
+
+            if message['type'] == 'http.response.start':
+                code = message['status']
+
+        sampler = Sampler()
+        thread = create_task(to_thread(sampler.run))
+
+        try:
+            await self.app(scope, receive, respond)
+        finally:
+            sampler.stop()
+
+            await thread
+
+        body = sampler.render().encode()
+
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/plain; charset=utf-8'),
+                (b'content-length', str(len(body)).encode()),
+                (b'x-profiled-status', str(code).encode()),
+            ],
+        })
+
+        await send({'type': 'http.response.body', 'body': body})
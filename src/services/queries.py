@@ -0,0 +1,102 @@
+from contextvars import ContextVar
+from logging import getLogger
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .settings import get_sql
+
+
+logger = getLogger(__name__)
+
+
+class Statistics:
+    '''
+    The statements executed while handling a single request.
+    '''
+
+    __slots__ = ('count', 'duration', 'scope')
+
+    def __init__(self, scope: Scope = None) -> None:
+        self.count = 0
+        self.duration = 0.0
+        self.scope = scope
+
+    @property
+    def route(self) -> str:
+        if self.scope and (route := self.scope.get('route')):
+            return f"{self.scope['method']} {route.path}"
+
+        return 'unknown'
+
+    def observe(self, statement: str, duration: float) -> None:
+        '''
+        Counting an executed statement and logging it if it is slow.
+
+        :param statement: The text of the statement.
+        :type statement: str
+        :param duration: The number of seconds it took.
+        :type duration: float
+        '''
+
+        self.count += 1
+        self.duration += duration
+
+        if duration >= get_sql().slow_threshold:
+            logger.warning(
+                'Slow query (%.1f ms) on %s: %s',
+                duration * 1000,
+                self.route,
+                statement,
+            )
+
+
+current: ContextVar[Statistics | None] = ContextVar('queries', default=None)
+
+
+def observe(statement: str, duration: float) -> None:
+    '''
+    Recording an executed statement for the request being handled, or just
+    logging it if it is slow and executed outside of any request.
+
+    :param statement: The text of the statement.
+    :type statement: str
+    :param duration: The number of seconds it took.
+    :type duration: float
+    '''
+
+    (current.get() or Statistics()).observe(statement, duration)
+
+
+class QueryMiddleware:
+    '''
+    Reporting the number of statements and the time spent in the database by
+    every request in the Server-Timing header of its response.
+    '''
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        statistics = Statistics(scope)
+        token = current.set(statistics)
+
+        async def respond(message: Message) -> None:
+            if message['type'] == 'http.response.start':
+                message['headers'] = [
+                    *message.get('headers', ()),
+                    (
+                        b'server-timing',
+                        f'db;desc="{statistics.count} queries";'
+                        f'dur={statistics.duration * 1000:.3f}'.encode(),
+                    ),
+                ]
+
+            await send(message)
+
+        try:
+            await self.app(scope, receive, respond)
+        finally:
+            current.reset(token)
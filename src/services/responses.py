@@ -0,0 +1,211 @@
+from datetime import datetime, time, timedelta
+from hashlib import blake2b
+from typing import NamedTuple
+
+from fastapi import Response
+from pydantic import TypeAdapter
+from redis.exceptions import RedisError
+
+from . import cache
+from .breakers import Open
+from .metrics import Metric
+from .settings import get_responses
+
+
+lookups = Metric(
+    'response_cache_requests_total',
+    'Lookups of the serialized responses in the cache.',
+    ('route', 'result'),
+)
+
+
+def midnight() -> int:
+    '''
+    The number of seconds until the next local midnight, when the answers
+    that depend on the current date become stale.
+
+    :return: The number of seconds, at least one.
+    :rtype: int
+    '''
+
+    now = datetime.now()
+    tomorrow = datetime.combine(now.date() + timedelta(days=1), time())
+
+    return max(int((tomorrow - now).total_seconds()), 1)
+
+
+class Entry(NamedTuple):
+    generation: str
+    tag: str
+    body: str
+
+    def respond(self, response: Response) -> Response:
+        '''
+        The cached answer with the headers that the dependencies of the route
+        have set, such as the validators and the rate limits.
+
+        :param response: The outgoing response of the dependencies.
+        :type response: Response
+        :return: The response with the serialized body.
+        :rtype: Response
+        '''
+
+        return Response(
+            self.body,
+            media_type='application/json',
+            headers=dict(response.headers),
+        )
+
+
+class ResponseCache:
+    '''
+    Cache of the serialized answers of the read routes of a user. Every entry
+    records the generation of the contacts of the user it was made in, and
+    any change of the contacts increments the generation, so the earlier
+    entries are never used again and expire on their own.
+
+    The generation is read before the database, so an answer that races with
+    a change is saved under the old generation and never used.
+    '''
+
+    PREFIX = 'responses'
+
+    def __init__(self) -> None:
+        '''
+        Reading the number of seconds the entries are kept, which also bounds
+        how long a change that could not be recorded by the caching service
+        goes unnoticed.
+        '''
+
+        self.ttl = get_responses().ttl
+
+    def __generation(self, user_id: int) -> str:
+        return f'{self.PREFIX}:{user_id}'
+
+    def __key(self, user_id: int, route: str, params: tuple) -> str:
+        digest = blake2b(repr(params).encode(), digest_size=8).hexdigest()
+
+        return f'{self.PREFIX}:{user_id}:{route}:{digest}'
+
+    async def get(
+        self,
+        user_id: int,
+        route: str,
+        *params
+    ) -> tuple[Entry | None, str | None]:
+        '''
+        Get the answer of a route in the current generation of the contacts
+        of a user.
+
+        :param user_id: The identifier of the user.
+        :type user_id: int
+        :param route: The name of the route.
+        :type route: str
+        :param params: The parameters of the request.
+        :return: The entry, if there is a current one, and the generation, if
+            the caching service is available.
+        :rtype: tuple[Entry | None, str | None]
+        '''
+
+        if not cache.cache:
+            return None, None
+
+        try:
+            async with cache.circuit:
+                generation, entry = await cache.cache.mget(
+                    self.__generation(user_id),
+                    self.__key(user_id, route, params),
+                )
+        except (Open, RedisError):
+            return None, None
+
+        generation = str(generation or 0)
+
+        if entry:
+            current, tag, body = entry.split('\n', 2)
+
+            if current == generation:
+                lookups.inc(route, 'hit')
+
+                return Entry(current, tag, body), generation
+
+        lookups.inc(route, 'miss')
+
+        return None, generation
+
+    async def put(
+        self,
+        user_id: int,
+        route: str,
+        params: tuple,
+        entry: Entry,
+        ttl: int = None
+    ) -> None:
+        '''
+        Saving the answer of a route.
+
+        :param user_id: The identifier of the user.
+        :type user_id: int
+        :param route: The name of the route.
+        :type route: str
+        :param params: The parameters of the request.
+        :type params: tuple
+        :param entry: The answer with the generation it was made in.
+        :type entry: Entry
+        :param ttl: The number of seconds it is kept, if less than usual.
+        :type ttl: int
+        '''
+
+        if not cache.cache:
+            return
+
+        try:
+            async with cache.circuit:
+                await cache.cache.set(
+                    self.__key(user_id, route, params),
+                    f'{entry.generation}\n{entry.tag}\n{entry.body}',
+                    ex=min(ttl or self.ttl, self.ttl),
+                )
+        except (Open, RedisError):
+            pass
+
+    async def invalidate(self, user_id: int) -> None:
+        '''
+        Starting a new generation of the answers of a user after a change of
+        the contacts.
+
+        :param user_id: The identifier of the user.
+        :type user_id: int
+        '''
+
+        if not cache.cache:
+            return
+
+        try:
+            async with cache.circuit, cache.cache.pipeline(False) as pipe:
+                key = self.__generation(user_id)
+
+                # It outlives the entries, so that it never starts over while
+                # some of them are still kept.
+                await pipe.incr(key).expire(key, self.ttl * 10).execute()
+        except (Open, RedisError):
+            pass
+
+    @staticmethod
+    def serialize(adapter: TypeAdapter, value) -> str:
+        '''
+        Serialization of an answer the way the route would do it.
+
+        :param adapter: The adapter of the response model of the route.
+        :type adapter: TypeAdapter
+        :param value: The answer, usually entities of the database.
+        :return: The JSON text.
+        :rtype: str
+        '''
+
+        return adapter.dump_json(
+            adapter.validate_python(value, from_attributes=True),
+        ).decode()
+
+
+responses = ResponseCache()
@@ -0,0 +1,217 @@
+from asyncio import CancelledError, create_task, sleep
+from contextlib import suppress
+from hashlib import blake2b
+from math import ceil, log
+from time import time
+
+from redis.exceptions import RedisError
+
+from . import cache
+from .metrics import Metric
+from .settings import get_revocation
+
+
+checks = Metric(
+    'revocation_checks_total',
+    'Checks of the access tokens against the revocation list by result.',
+    ('result',),
+)
+
+
+class BloomFilter:
+    '''
+    A set that answers "certainly not a member" without false negatives and
+    "possibly a member" with a bounded rate of false positives, in a fixed
+    amount of memory.
+    '''
+
+    def __init__(self, capacity: int, error: float) -> None:
+        '''
+        :param capacity: The expected number of members.
+        :type capacity: int
+        :param error: The acceptable rate of false positives at that number.
+        :type error: float
+        '''
+
+        self.size = max(ceil(-capacity * log(error) / log(2) ** 2), 8)
+        self.hashes = max(round(self.size / capacity * log(2)), 1)
+        self.bits = bytearray(ceil(self.size / 8))
+
+    def __positions(self, item: str) -> list[int]:
+        value = blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(value[:8])
+        second = int.from_bytes(value[8:]) | 1
+
+        return [
+            (first + number * second) % self.size
+            for number in range(self.hashes)
+        ]
+
+    def add(self, item: str) -> None:
+        for position in self.__positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self.bits[position >> 3] & 1 << (position & 7)
+            for position in self.__positions(item)
+        )
+
+
+class Revocations:
+    '''
+    The identifiers of the access tokens revoked before their expiration.
+    They are kept by the caching service until the tokens expire, and every
+    worker mirrors them with their expiration, together with a bloom filter,
+    both rebuilt periodically, so that checking a token costs no network
+    round trip and a token that is not revoked, which is nearly every one,
+    is not even looked up.
+
+    A token revoked by another worker is rejected by this one after the next
+    synchronization at the latest. While the caching service fails, the last
+    mirror is kept, so no revocation is forgotten, and the tokens revoked in
+    the meantime are shared once it is back.
+    '''
+
+    KEY = 'revoked'
+
+    def __init__(self) -> None:
+        '''
+        Reading the expected number of revoked tokens, the acceptable rate of
+        false positives and the number of seconds between synchronizations.
+        '''
+
+        settings = get_revocation()
+
+        self.__capacity = settings.capacity
+        self.__error = settings.error
+        self.__interval = settings.sync
+        self.__filter = BloomFilter(self.__capacity, self.__error)
+        self.__shared: dict[str, float] = {}
+        self.__local: dict[str, float] = {}
+        self.__recent: dict[str, float] = {}
+        self.__task = None
+
+    async def revoke(self, jti: str, expires: float) -> None:
+        '''
+        Revoking a token until it expires anyway.
+
+        :param jti: The identifier of the token.
+        :type jti: str
+        :param expires: The expiration time of the token as a timestamp.
+        :type expires: float
+        '''
+
+        self.__filter.add(jti)
+        self.__recent[jti] = expires
+
+        if cache.cache:
+            with suppress(RedisError):
+                await cache.cache.zadd(self.KEY, {jti: expires})
+
+                return
+
+        self.__local[jti] = expires
+
+    async def revoked(self, jti: str | None) -> bool:
+        '''
+        Checking whether a token is revoked.
+
+        :param jti: The identifier of the token or an empty value for the
+            tokens issued before the identifiers were introduced.
+        :type jti: str | None
+        :return: True if the token is revoked.
+        :rtype: bool
+        '''
+
+        if not jti or jti not in self.__filter:
+            checks.inc('negative')
+
+            return False
+
+        expires = self.__recent.get(jti) or self.__local.get(jti) \
+            or self.__shared.get(jti)
+
+        result = expires is not None and expires > time()
+
+        checks.inc('revoked' if result else 'false_positive')
+
+        return result
+
+    async def sync(self) -> None:
+        '''
+        Sharing the tokens revoked while the caching service failed, dropping
+        the expired tokens and rebuilding the mirror and the filter from the
+        ones revoked by all the workers. The previous mirror is kept if the
+        shared tokens cannot be read.
+        '''
+
+        now = time()
+        recent, self.__recent = self.__recent, {}
+        shared = self.__shared
+
+        if cache.cache:
+            with suppress(RedisError):
+                async with cache.cache.pipeline(False) as pipe:
+                    if self.__local:
+                        pipe.zadd(self.KEY, self.__local)
+
+                    *_, members = await pipe.zremrangebyscore(
+                        self.KEY,
+                        '-inf',
+                        now,
+                    ).zrangebyscore(
+                        self.KEY,
+                        now,
+                        '+inf',
+                        withscores=True,
+                    ).execute()
+
+                shared = dict(members)
+                self.__local = {}
+
+        # The tokens revoked by this worker may be missing from the shared
+        # ones if they could not be read.
+        self.__shared = {
+            jti: expires
+            for jti, expires in (shared | recent).items()
+            if expires > now
+        }
+
+        self.__local = {
+            jti: expires
+            for jti, expires in self.__local.items()
+            if expires > now
+        }
+
+        revoked = [*self.__shared, *self.__local, *self.__recent]
+
+        bloom = BloomFilter(max(self.__capacity, len(revoked)), self.__error)
+
+        for jti in revoked:
+            bloom.add(jti)
+
+        self.__filter = bloom
+
+    async def __run(self) -> None:
+        while True:
+            await sleep(self.__interval)
+            await self.sync()
+
+    async def start(self) -> None:
+        await self.sync()
+
+        if not self.__task:
+            self.__task = create_task(self.__run())
+
+    async def stop(self) -> None:
+        if self.__task:
+            self.__task.cancel()
+
+            with suppress(CancelledError):
+                await self.__task
+
+            self.__task = None
+
+
+revocations = Revocations()
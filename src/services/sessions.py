@@ -0,0 +1,387 @@
+from asyncio import CancelledError, create_task, sleep
+from contextlib import suppress
+from hashlib import sha256
+from logging import getLogger
+from uuid import uuid4
+
+from fastapi import HTTPException, status
+from redis.exceptions import RedisError
+from sqlalchemy import select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src import database
+from src.database import User, open_session
+from . import cache
+from .auth import auth_service, Token
+from .metrics import Metric
+from .settings import get_refresh
+
+
+logger = getLogger(__name__)
+
+rotations = Metric(
+    'refresh_rotations_total',
+    'Refreshes of the tokens by their result.',
+    ('result',),
+)
+
+
+def digest(token: str) -> str:
+    return sha256(token.encode()).hexdigest()
+
+
+class Sessions:
+    '''
+    The refresh tokens of the users grouped in families, one per login. Every
+    refresh replaces the current token of its family, so a token presented
+    after it has been replaced reveals its theft and the family is revoked.
+
+    The current tokens are kept by the caching service, which makes a refresh
+    a single operation on it, and they are written to the database in batches
+    in the background to survive the loss of the cache. Without the caching
+    service the database is used directly, one token per user as before.
+    '''
+
+    PREFIX = 'refresh'
+    TTL = 7 * 24 * 3600  # A week of inactivity ends a family.
+
+    def __init__(self) -> None:
+        '''
+        Reading the number of pending writes that triggers a flush and the
+        number of seconds between the flushes.
+        '''
+
+        settings = get_refresh()
+
+        self.__batch = settings.batch
+        self.__interval = settings.interval
+        self.__pending: dict[int, str | None] = {}
+        self.__task = None
+
+    @property
+    def pending(self) -> int:
+        return len(self.__pending)
+
+    async def __tokens(self, user: User | dict, family: str) -> dict:
+        email, id = (user['sub'], user['uid']) if isinstance(user, dict) \
+            else (user.email, user.id)
+
+        return await auth_service.create_tokens(
+            email,
+            {'uid': id, 'fam': family},
+        )
+
+    async def __persist(
+        self,
+        user_id: int,
+        token: str | None,
+        db: AsyncSession,
+        deferred: bool
+    ) -> None:
+        '''
+        Saving the current refresh token of a user in the database.
+
+        :param user_id: The identifier of the user.
+        :type user_id: int
+        :param token: The token or an empty value if it is revoked.
+        :type token: str | None
+        :param db: Database connection.
+        :type db: AsyncSession
+        :param deferred: Indication that the token is saved by the caching
+            service and can be written later.
+        :type deferred: bool
+        '''
+
+        if deferred:
+            self.__pending[user_id] = token
+
+            if len(self.__pending) >= self.__batch:
+                create_task(self.flush())
+
+            return
+
+        await db.execute(
+            update(User).where(User.id == user_id).values(token=token),
+        )
+
+        await db.commit()
+
+    async def issue(self, user: User, db: AsyncSession) -> dict:
+        '''
+        Starting a new family of tokens after the user has logged in.
+
+        :param user: The user.
+        :type user: User
+        :param db: Database connection.
+        :type db: AsyncSession
+        :return: The access and refresh tokens and their type.
+        :rtype: dict
+        '''
+
+        family = uuid4().hex
+        result = await self.__tokens(user, family)
+        deferred = False
+
+        if cache.cache:
+            with suppress(RedisError):
+                async with cache.cache.pipeline(False) as pipe:
+                    await pipe.set(
+                        f'{self.PREFIX}:{family}',
+                        digest(result[Token.REFRESH.value]),
+                        ex=self.TTL,
+                    ).sadd(
+                        f'{self.PREFIX}:user:{user.id}',
+                        family,
+                    ).expire(
+                        f'{self.PREFIX}:user:{user.id}',
+                        self.TTL,
+                    ).execute()
+
+                deferred = True
+
+        await self.__persist(
+            user.id,
+            result[Token.REFRESH.value],
+            db,
+            deferred,
+        )
+
+        return result
+
+    async def rotate(self, token: str, db: AsyncSession) -> dict:
+        '''
+        Replacing a refresh token with a new pair of tokens of the same family.
+        The token is compared with and replaced by the current one of its
+        family in a single operation on the caching service, and only a
+        family unknown to it is looked up in the database.
+
+        :param token: The refresh token.
+        :type token: str
+        :param db: Database connection.
+        :type db: AsyncSession
+        :return: The access and refresh tokens and their type.
+        :rtype: dict
+
+        :raises HTTPException: If the token is not the current one of its
+            family or of its user.
+        '''
+
+        payload = await auth_service.decode_payload(token, Token.REFRESH)
+
+        if cache.cache and (family := payload.get('fam')):
+            result = await self.__tokens(payload, family)
+
+            try:
+                current = await cache.cache.set(
+                    f'{self.PREFIX}:{family}',
+                    digest(result[Token.REFRESH.value]),
+                    xx=True,
+                    keepttl=True,
+                    get=True,
+                )
+            except RedisError:
+                current = None
+
+            if current == digest(token):
+                rotations.inc('rotated')
+
+                await self.__persist(
+                    payload['uid'],
+                    result[Token.REFRESH.value],
+                    db,
+                    True,
+                )
+
+                return result
+
+            if current is not None:
+                await self.reuse(payload['uid'], db)
+
+            if await self.__ended(family):
+                rotations.inc('ended')
+
+                raise HTTPException(
+                    status.HTTP_401_UNAUTHORIZED,
+                    'Invalid refresh token',
+                )
+
+        user = await auth_service.get_user_by_email(payload['sub'], db)
+
+        if not user or self.__pending.get(user.id, user.token) != token:
+            if user:
+                await self.reuse(user.id, db)
+
+            raise HTTPException(
+                status.HTTP_401_UNAUTHORIZED,
+                'Invalid refresh token',
+            )
+
+        rotations.inc('restored')
+
+        return await self.issue(user, db)
+
+    async def reuse(self, user_id: int, db: AsyncSession) -> None:
+        '''
+        Revoking all the tokens of a user once a replaced one is presented.
+
+        :param user_id: The identifier of the user.
+        :type user_id: int
+        :param db: Database connection.
+        :type db: AsyncSession
+
+        :raises HTTPException: Always.
+        '''
+
+        rotations.inc('reused')
+
+        await self.revoke(user_id, db)
+
+        raise HTTPException(
+            status.HTTP_401_UNAUTHORIZED,
+            'Invalid refresh token',
+        )
+
+    async def revoke(self, user_id: int, db: AsyncSession) -> None:
+        '''
+        Ending all the families of a user.
+
+        :param user_id: The identifier of the user.
+        :type user_id: int
+        :param db: Database connection.
+        :type db: AsyncSession
+        '''
+
+        deferred = False
+
+        if cache.cache:
+            with suppress(RedisError):
+                name = f'{self.PREFIX}:user:{user_id}'
+
+                await cache.cache.delete(name, *(
+                    f'{self.PREFIX}:{family}'
+                    for family in await cache.cache.smembers(name)
+                ))
+
+                deferred = True
+
+        await self.__persist(user_id, None, db, deferred)
+
+    async def end(self, payload: dict, db: AsyncSession) -> None:
+        '''
+        Ending the family of the token the user has logged out with, or all
+        the families of the user if the token does not name one.
+
+        :param payload: The claims of the access token.
+        :type payload: dict
+        :param db: Database connection.
+        :type db: AsyncSession
+        '''
+
+        if not (family := payload.get('fam')) or not cache.cache:
+            user = await auth_service.get_user_by_email(payload['sub'], db)
+
+            return await self.revoke(user.id, db) if user else None
+
+        with suppress(RedisError):
+            async with cache.cache.pipeline(False) as pipe:
+                await pipe.delete(f'{self.PREFIX}:{family}').srem(
+                    f"{self.PREFIX}:user:{payload['uid']}",
+                    family,
+                ).set(
+                    f'{self.PREFIX}:ended:{family}',
+                    1,
+                    ex=self.TTL,
+                ).execute()
+
+        # The token saved for the user must not restore the family either.
+        user_id = payload['uid']
+
+        token = self.__pending[user_id] if user_id in self.__pending \
+            else await db.scalar(select(User.token).where(User.id == user_id))
+
+        if token and await self.__family(token) == family:
+            self.__pending.pop(user_id, None)
+
+            await self.__persist(user_id, None, db, False)
+
+    async def __ended(self, family: str) -> bool:
+        '''
+        Checking whether the user has logged out of a family.
+
+        :param family: The identifier of the family.
+        :type family: str
+        :return: Indication that the family has been ended on purpose.
+        :rtype: bool
+        '''
+
+        with suppress(RedisError):
+            return bool(await cache.cache.exists(
+                f'{self.PREFIX}:ended:{family}',
+            ))
+
+        return False
+
+    @staticmethod
+    async def __family(token: str) -> str | None:
+        try:
+            payload = await auth_service.decode_payload(token, Token.REFRESH)
+        except HTTPException:
+            return None
+
+        return payload.get('fam')
+
+    async def flush(self) -> None:
+        '''
+        Writing the pending tokens to the database in one statement. The
+        tokens are kept for the next attempt if it fails.
+        '''
+
+        if not self.__pending or not database.engine:
+            return
+
+        pending, self.__pending = self.__pending, {}
+
+        try:
+            async with open_session(database.engine) as db:
+                await db.execute(update(User), [
+                    {'id': user_id, 'token': token}
+                    for user_id, token in pending.items()
+                ])
+
+                await db.commit()
+        except SQLAlchemyError as err:
+            logger.warning('Refresh tokens not saved: %s', err)
+
+            for user_id, token in pending.items():
+                self.__pending.setdefault(user_id, token)
+
+    async def __run(self) -> None:
+        while True:
+            await sleep(self.__interval)
+            await self.flush()
+
+    def start(self) -> None:
+        if not self.__task:
+            self.__task = create_task(self.__run())
+
+    async def stop(self) -> None:
+        if self.__task:
+            self.__task.cancel()
+
+            with suppress(CancelledError):
+                await self.__task
+
+            self.__task = None
+
+        await self.flush()
+
+
+sessions = Sessions()
+
+Metric(
+    'refresh_pending_writes',
+    'Refresh tokens waiting to be written to the database.',
+    kind='gauge',
+    collect=lambda: {(): sessions.pending},
+)
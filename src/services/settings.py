@@ -0,0 +1,347 @@
+from functools import lru_cache
+from typing import Annotated
+
+from pydantic import EmailStr, StringConstraints, model_validator
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+# Number of requests, window length in seconds and an optional weight of one
+# request separated by slashes, for example ``60/60/2``.
+Quota = Annotated[str, StringConstraints(pattern=r'^\d+/\d+(/\d+)?$')]
+
+
+def source(prefix: str) -> SettingsConfigDict:
+    return SettingsConfigDict(
+        env_prefix=prefix,
+        env_file='.env',
+        env_ignore_empty=True,
+        extra='ignore',
+    )
+
+
+class Database(BaseSettings):
+    model_config = source('POSTGRES_')
+
+    url: str
+
+
+class Replicas(BaseSettings):
+    model_config = source('REPLICA_')
+
+    urls: str = ''
+    stickiness: float = 5
+    retry: float = 30
+    probe: float = 5
+
+
+class SQL(BaseSettings):
+    model_config = source('SQL_')
+
+    slow_threshold: float = .5
+    query_cache_size: int = 500
+    statement_cache_size: int = 100
+    pool_size: int = 5
+    pool_overflow: int = 10
+    pool_timeout: float = 10
+    statement_timeout: int = 5000
+
+
+class Redis(BaseSettings):
+    model_config = source('REDIS_')
+
+    host: str = 'localhost'
+    port: int = 6379
+    password: str | None = None
+    socket_timeout: float = .5
+    socket_connect_timeout: float = .5
+
+
+class JWT(BaseSettings):
+    model_config = source('JWT_')
+
+    algorithm: str
+    secret: str | None = None
+    private_key: str | None = None
+    public_key: str | None = None
+    audience: str | None = None
+
+    @model_validator(mode='after')
+    def keys(self) -> 'JWT':
+        '''
+        Checking that the secret of the HMAC algorithms or a key of the
+        asymmetric ones is given, so that the signer, which is only loaded
+        with the first token, is known to be valid at boot.
+        '''
+
+        if self.algorithm.startswith('HS'):
+            if not self.secret:
+                raise ValueError(f'{self.algorithm} requires a secret')
+        elif not (self.private_key or self.public_key):
+            raise ValueError(f'{self.algorithm} requires a key')
+
+        return self
+
+
+class Refresh(BaseSettings):
+    model_config = source('REFRESH_')
+
+    batch: int = 100
+    interval: float = 1
+
+
+class Revocation(BaseSettings):
+    model_config = source('REVOCATION_')
+
+    capacity: int = 10000
+    error: float = .001
+    sync: float = 5
+
+
+class Mail(BaseSettings):
+    model_config = source('FASTAPIMAIL_')
+
+    mail_username: str
+    mail_password: str
+    mail_from: EmailStr
+    mail_port: int
+    mail_server: str
+    mail_starttls: bool
+    mail_ssl_tls: bool
+    use_credentials: bool = True
+    validate_certs: bool = True
+    timeout: int = 10
+
+
+class Storage(BaseSettings):
+    model_config = source('CLOUDINARY_')
+
+    cloud_name: str
+    api_key: str
+    api_secret: str
+
+
+class Outbox(BaseSettings):
+    model_config = source('EMAIL_')
+
+    queue: int = 1000
+    retry: float = 5
+
+
+class Breaker(BaseSettings):
+    model_config = source('BREAKER_')
+
+    threshold: int = 5
+    reset: float = 30
+
+
+class RateLimit(BaseSettings):
+    '''
+    The quotas of the rate limiter. Those of single routes are a JSON object
+    keyed by the names of the routes, for example
+    ``RATELIMIT_ROUTES={"read_contacts": "60/60"}``.
+    '''
+
+    model_config = source('RATELIMIT_')
+
+    default: Quota | None = None
+    batch: int = 10
+    interval: float = 1
+    capacity: int = 10000
+    routes: dict[str, Quota] = {}
+
+
+class Responses(BaseSettings):
+    model_config = source('RESPONSES_')
+
+    ttl: int = 60
+
+
+class Accounts(BaseSettings):
+    model_config = source('ACCOUNTS_')
+
+    ttl: int = 86400
+
+
+class Idempotency(BaseSettings):
+    model_config = source('IDEMPOTENCY_')
+
+    ttl: int = 86400
+    wait: float = 10
+
+
+class Events(BaseSettings):
+    model_config = source('EVENTS_')
+
+    queue: int = 100
+    heartbeat: float = 15
+
+
+class Admission(BaseSettings):
+    model_config = source('ADMISSION_')
+
+    concurrency: int = 64
+    expensive_share: float = .5
+    queue: int | None = None
+    target: float = .1
+
+
+class Stats(BaseSettings):
+    model_config = source('STATS_')
+
+    interval: float = 60
+    batch: int = 100
+
+
+class Profiling(BaseSettings):
+    model_config = source('PROFILING_')
+
+    token: str = ''
+    interval: float = .005
+
+
+class Server(BaseSettings):
+    model_config = source('SERVER_')
+
+    host: str = '0.0.0.0'
+    port: int = 8000
+    workers: int | None = None
+    connections: int = 80
+    keepalive: int = 5
+    backlog: int = 2048
+    concurrency: int | None = None
+    access_log: bool = False
+
+
+@lru_cache
+def get_database() -> Database:
+    return Database()
+
+
+@lru_cache
+def get_replicas() -> Replicas:
+    return Replicas()
+
+
+@lru_cache
+def get_sql() -> SQL:
+    return SQL()
+
+
+@lru_cache
+def get_redis() -> Redis:
+    return Redis()
+
+
+@lru_cache
+def get_jwt() -> JWT:
+    return JWT()
+
+
+@lru_cache
+def get_refresh() -> Refresh:
+    return Refresh()
+
+
+@lru_cache
+def get_revocation() -> Revocation:
+    return Revocation()
+
+
+@lru_cache
+def get_mail() -> Mail:
+    return Mail()
+
+
+@lru_cache
+def get_storage() -> Storage:
+    return Storage()
+
+
+@lru_cache
+def get_outbox() -> Outbox:
+    return Outbox()
+
+
+@lru_cache
+def get_breaker() -> Breaker:
+    return Breaker()
+
+
+@lru_cache
+def get_ratelimit() -> RateLimit:
+    return RateLimit()
+
+
+@lru_cache
+def get_responses() -> Responses:
+    return Responses()
+
+
+@lru_cache
+def get_accounts() -> Accounts:
+    return Accounts()
+
+
+@lru_cache
+def get_idempotency() -> Idempotency:
+    return Idempotency()
+
+
+@lru_cache
+def get_events() -> Events:
+    return Events()
+
+
+@lru_cache
+def get_admission() -> Admission:
+    return Admission()
+
+
+@lru_cache
+def get_stats() -> Stats:
+    return Stats()
+
+
+@lru_cache
+def get_profiling() -> Profiling:
+    return Profiling()
+
+
+@lru_cache
+def get_server() -> Server:
+    return Server()
+
+
+def validate() -> None:
+    '''
+    Reading the settings of all the subsystems at the start of the
+    application, so that a missing or invalid value stops it right away
+    instead of failing the first request that needs it. Every subsystem reads
+    its settings once, and the routes receive them as dependencies.
+
+    :raises ValidationError: If any setting is missing or invalid.
+    '''
+
+    for settings in (
+        get_database,
+        get_replicas,
+        get_sql,
+        get_redis,
+        get_jwt,
+        get_refresh,
+        get_revocation,
+        get_mail,
+        get_storage,
+        get_outbox,
+        get_breaker,
+        get_ratelimit,
+        get_responses,
+        get_accounts,
+        get_idempotency,
+        get_events,
+        get_admission,
+        get_stats,
+        get_profiling,
+        get_server,
+    ):
+        settings()
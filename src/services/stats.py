@@ -0,0 +1,81 @@
+from asyncio import CancelledError, create_task, sleep
+from contextlib import suppress
+from logging import getLogger
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from src import database
+from src.database import open_session
+from src.repository.stats import reconcile
+from .metrics import Metric
+from .settings import get_stats
+
+
+logger = getLogger(__name__)
+
+batches = Metric(
+    'contact_stats_reconciliations_total',
+    'Batches of users whose contact counters were counted again.',
+    ('result',),
+)
+
+
+class Reconciler:
+    '''
+    Background job that counts the contacts of the users again, one batch of
+    users at a time, and replaces their counters, so that a drift of them,
+    such as that of the contacts changed outside of the application, does not
+    last. It goes through all the users and starts over.
+    '''
+
+    def __init__(self) -> None:
+        '''
+        Reading the number of seconds between the batches and the number of
+        users in a batch, for example ``STATS_INTERVAL=60``.
+        '''
+
+        settings = get_stats()
+
+        self.__interval = settings.interval
+        self.__batch = settings.batch
+        self.__after = 0
+        self.__task = None
+
+    async def step(self) -> None:
+        '''
+        Reconciling the next batch of users. The batch is tried again next
+        time if it fails.
+        '''
+
+        if not database.engine:
+            return
+
+        try:
+            async with open_session(database.engine) as db:
+                self.__after = await reconcile(db, self.__after, self.__batch)
+        except SQLAlchemyError as err:
+            batches.inc('failure')
+            logger.warning('Contact counters not reconciled: %s', err)
+        else:
+            batches.inc('success')
+
+    async def __run(self) -> None:
+        while True:
+            await sleep(self.__interval)
+            await self.step()
+
+    def start(self) -> None:
+        if not self.__task:
+            self.__task = create_task(self.__run())
+
+    async def stop(self) -> None:
+        if self.__task:
+            self.__task.cancel()
+
+            with suppress(CancelledError):
+                await self.__task
+
+            self.__task = None
+
+
+reconciler = Reconciler()
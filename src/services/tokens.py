@@ -0,0 +1,154 @@
+from os.path import isfile
+
+from cryptography.hazmat.primitives.serialization import \
+    load_pem_private_key, load_pem_public_key
+from jwt import PyJWT, PyJWTError
+
+from .settings import get_jwt
+
+
+class InvalidToken(Exception):
+    ...
+
+
+def pem(value: str) -> bytes:
+    '''
+    The contents of a key given either as the PEM text or as a path to it.
+    '''
+
+    if isfile(value):
+        with open(value, 'rb') as file:
+            return file.read()
+
+    return value.replace('\\n', '\n').encode()
+
+
+class Signer:
+    '''
+    Signing and verification of JSON Web Tokens with keys that are parsed
+    once, when the signer is created, instead of for every token.
+
+    Besides the shared secret of the HMAC algorithms, the asymmetric ES256,
+    EdDSA (Ed25519) and RS256 algorithms are supported, so that services that
+    only verify tokens can be given the public key alone.
+    '''
+
+    HMAC = ('HS256', 'HS384', 'HS512')
+    ASYMMETRIC = ('ES256', 'EdDSA', 'RS256')
+
+    def __init__(
+        self,
+        algorithm: str,
+        secret: str = None,
+        private_key: bytes = None,
+        public_key: bytes = None,
+        audience: str = None
+    ) -> None:
+        '''
+        :param algorithm: The name of the algorithm in the JWS header.
+        :type algorithm: str
+        :param secret: The shared secret of the HMAC algorithms.
+        :type secret: str
+        :param private_key: The PEM of the private key of the asymmetric
+            algorithms, which is only needed for signing.
+        :type private_key: bytes
+        :param public_key: The PEM of the public key, derived from the private
+            one if omitted.
+        :type public_key: bytes
+        :param audience: The ``aud`` claim added to the signed tokens and
+            required of the verified ones.
+        :type audience: str
+
+        :raises ValueError: If the algorithm is not supported or the keys do
+            not match it.
+        '''
+
+        self.algorithm = algorithm
+        self.audience = audience
+        self.__jwt = PyJWT()
+
+        if algorithm in self.HMAC:
+            if not secret:
+                raise ValueError(f'{algorithm} requires a secret')
+
+            self.__private = self.__public = secret.encode()
+        elif algorithm in self.ASYMMETRIC:
+            self.__private = load_pem_private_key(private_key, None) \
+                if private_key else None
+
+            self.__public = load_pem_public_key(public_key) if public_key \
+                else self.__private.public_key() if self.__private else None
+
+            if not self.__public:
+                raise ValueError(f'{algorithm} requires a key')
+        else:
+            raise ValueError(f'Unsupported algorithm {algorithm}')
+
+    @classmethod
+    def load(cls) -> 'Signer':
+        '''
+        Creating the signer of the application from the JWT_ALGORITHM setting,
+        either JWT_SECRET or JWT_PRIVATE_KEY and JWT_PUBLIC_KEY, which are PEM
+        texts or paths to PEM files, and the optional JWT_AUDIENCE.
+
+        :return: The signer.
+        :rtype: Signer
+        '''
+
+        settings = get_jwt()
+
+        return cls(
+            settings.algorithm,
+            settings.secret,
+            *(
+                pem(key) if key else None
+                for key in (settings.private_key, settings.public_key)
+            ),
+            settings.audience,
+        )
+
+    def encode(self, payload: dict) -> str:
+        '''
+        Signing a payload.
+
+        :param payload: The claims, the times as numbers of seconds.
+        :type payload: dict
+        :return: The compact serialization of the token.
+        :rtype: str
+
+        :raises ValueError: If the signer only has a public key.
+        '''
+
+        if not self.__private:
+            raise ValueError('The signer has no private key')
+
+        if self.audience:
+            payload = {'aud': self.audience, **payload}
+
+        return self.__jwt.encode(payload, self.__private, self.algorithm)
+
+    def decode(self, token: str) -> dict:
+        '''
+        Verifying a token and extracting its payload. Besides the signature,
+        the ``exp``, ``nbf`` and ``iat`` claims are checked when present, and
+        the ``aud`` claim has to name the audience of the signer, if any.
+
+        :param token: The compact serialization of the token.
+        :type token: str
+        :return: The claims.
+        :rtype: dict
+
+        :raises InvalidToken: If the token is malformed, signed by another key
+            or algorithm, expired, not yet valid or meant for another
+            audience.
+        '''
+
+        try:
+            return self.__jwt.decode(
+                token,
+                self.__public,
+                [self.algorithm],
+                audience=self.audience,
+            )
+        except PyJWTError as err:
+            raise InvalidToken(str(err) or 'Invalid token') from err
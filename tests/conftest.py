@@ -1,21 +1,28 @@
+from contextlib import asynccontextmanager
+from re import search
+from typing import Callable
+
+from fastapi import FastAPI
 from fastapi.testclient import TestClient
+from httpx import Response
 from pytest import fixture
-from sqlalchemy.pool import StaticPool
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker
 
 from main import app
-from src.database import get_db
+from src.database import Base, get_db, get_replica_db, User
+from src.services.auth import auth_service, get_read_db
+from src.services.limiter import limiter
+from tests.engines import new_engine, new_sessionmaker
+
+
+engine = new_engine()
 
-engine = create_async_engine(
-    'sqlite+aiosqlite:///:memory:',
-    connect_args={'check_same_thread': False},
-    poolclass=StaticPool,
-)
+TestingSessionLocal = new_sessionmaker(engine)
 
-TestingSessionLocal = async_sessionmaker(
-    engine,
-    **{key: False for key in ('autocommit', 'autoflush', 'expire_on_commit')},
-)
+
+@asynccontextmanager
+async def launch(app: FastAPI):
+    yield
 
 
 @fixture(scope='module')
@@ -29,9 +36,60 @@ def client():
             print(err)
 
             await session.rollback()
+
+            raise
         finally:
             await session.close()
 
-    app.dependency_overrides[get_db] = override_get_db
+    for dependency in (get_db, get_replica_db, get_read_db):
+        app.dependency_overrides[dependency] = override_get_db
+
+    app.dependency_overrides[limiter] = lambda: None
+    app.router.lifespan_context = launch
+
+    with TestClient(app) as client:
+        yield client
+
+
+@fixture(scope='module')
+def user(client: TestClient) -> User:
+    async def init() -> User:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+
+        async with TestingSessionLocal() as session:
+            user = User(email='jack@post.com', password='secret', verified=True)
+
+            session.add(user)
+
+            await session.commit()
+
+            return user
+
+    user = client.portal.call(init)
+
+    app.dependency_overrides[auth_service.get_current_user] = lambda: user
+
+    yield user
+
+    del app.dependency_overrides[auth_service.get_current_user]
+
+
+@fixture
+def session_maker() -> async_sessionmaker:
+    return TestingSessionLocal
+
+
+@fixture
+def max_queries() -> Callable[[Response, int], None]:
+    def check(response: Response, limit: int) -> None:
+        timing = search(
+            r'db;desc="(\d+) queries"',
+            response.headers['Server-Timing'],
+        )
+
+        assert int(timing[1]) <= limit, \
+            f'{timing[1]} queries executed, at most {limit} expected'
 
-    yield TestClient(app)
+    return check
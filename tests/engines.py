@@ -0,0 +1,21 @@
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, \
+    create_async_engine
+
+
+def new_engine() -> AsyncEngine:
+    return create_async_engine(
+        'sqlite+aiosqlite:///:memory:',
+        connect_args={'check_same_thread': False},
+        poolclass=StaticPool,
+    )
+
+
+def new_sessionmaker(engine: AsyncEngine) -> async_sessionmaker:
+    return async_sessionmaker(
+        engine,
+        **{
+            key: False
+            for key in ('autocommit', 'autoflush', 'expire_on_commit')
+        },
+    )
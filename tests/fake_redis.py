@@ -0,0 +1,207 @@
+from time import monotonic
+from typing import Any
+
+
+class Pipeline:
+    '''
+    Commands queued to be executed by the in-process caching service in one
+    go, the way a real pipeline sends them in one round trip.
+    '''
+
+    def __init__(self, redis: 'FakeRedis') -> None:
+        self.__redis = redis
+        self.__commands = []
+
+    async def __aenter__(self) -> 'Pipeline':
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        self.__commands.clear()
+
+    def __getattr__(self, name: str) -> Any:
+        def queue(*args, **kwargs) -> 'Pipeline':
+            self.__commands.append((name, args, kwargs))
+
+            return self
+
+        return queue
+
+    async def execute(self) -> list:
+        self.__redis.round_trips += 1
+
+        return [
+            await getattr(self.__redis, name)(*args, **kwargs)
+            for name, args, kwargs in self.__commands
+        ]
+
+
+class FakeRedis:
+    '''
+    A minimal in-process stand-in for the asynchronous Redis client that keeps
+    the data in a dictionary. The tests and the benchmarks use it to remove
+    the network from the measurements while counting round trips.
+    '''
+
+    def __init__(self) -> None:
+        self.data: dict[str, Any] = {}
+        self.expires: dict[str, float] = {}
+        self.round_trips = 0
+
+    def __alive(self, name: str) -> bool:
+        if (deadline := self.expires.get(name)) and deadline <= monotonic():
+            self.data.pop(name, None)
+            self.expires.pop(name, None)
+
+        return name in self.data
+
+    def pipeline(self, transaction: bool = True) -> Pipeline:
+        return Pipeline(self)
+
+    async def get(self, name: str) -> Any:
+        return self.data[name] if self.__alive(name) else None
+
+    async def mget(self, *names: str) -> list:
+        return [await self.get(name) for name in names]
+
+    async def exists(self, *names: str) -> int:
+        return sum(self.__alive(name) for name in names)
+
+    async def set(
+        self,
+        name: str,
+        value: Any,
+        ex: int = None,
+        nx: bool = False,
+        xx: bool = False,
+        keepttl: bool = False,
+        get: bool = False
+    ) -> Any:
+        old = await self.get(name)
+
+        if nx and old is not None or xx and old is None:
+            return old if get else None
+
+        self.data[name] = str(value) if isinstance(value, (int, float)) \
+            else value
+
+        if ex:
+            self.expires[name] = monotonic() + ex
+        elif not keepttl:
+            self.expires.pop(name, None)
+
+        return old if get else True
+
+    async def incrby(self, name: str, amount: int = 1) -> int:
+        value = int(await self.get(name) or 0) + amount
+
+        self.data[name] = str(value)
+
+        return value
+
+    async def incr(self, name: str, amount: int = 1) -> int:
+        return await self.incrby(name, amount)
+
+    async def expire(self, name: str, time: int) -> bool:
+        if not self.__alive(name):
+            return False
+
+        self.expires[name] = monotonic() + time
+
+        return True
+
+    async def delete(self, *names: str) -> int:
+        return sum(
+            self.data.pop(name, None) is not None
+            for name in names
+            if self.__alive(name)
+        )
+
+    async def sadd(self, name: str, *values: Any) -> int:
+        self.__alive(name)
+
+        members = self.data.setdefault(name, set())
+        added = len(set(map(str, values)) - members)
+
+        members.update(map(str, values))
+
+        return added
+
+    async def smembers(self, name: str) -> set:
+        return set(self.data[name]) if self.__alive(name) else set()
+
+    async def srem(self, name: str, *values: Any) -> int:
+        members = self.data.get(name, set()) if self.__alive(name) else set()
+        removed = len(members & set(map(str, values)))
+
+        members.difference_update(map(str, values))
+
+        return removed
+
+    async def zadd(self, name: str, mapping: dict[str, float]) -> int:
+        self.__alive(name)
+
+        members = self.data.setdefault(name, {})
+        added = len(mapping.keys() - members.keys())
+
+        members.update({key: float(score) for key, score in mapping.items()})
+
+        return added
+
+    async def zscore(self, name: str, value: str) -> float | None:
+        return self.data[name].get(value) if self.__alive(name) else None
+
+    async def zrangebyscore(
+        self,
+        name: str,
+        min: float | str,
+        max: float | str,
+        withscores: bool = False
+    ) -> list[str] | list[tuple[str, float]]:
+        members = self.data[name] if self.__alive(name) else {}
+
+        result = sorted(
+            (key for key, score in members.items()
+             if float(min) <= score <= float(max)),
+            key=members.get,
+        )
+
+        return [(key, members[key]) for key in result] if withscores \
+            else result
+
+    async def zremrangebyscore(
+        self,
+        name: str,
+        min: float | str,
+        max: float | str
+    ) -> int:
+        members = self.data[name] if self.__alive(name) else {}
+        removed = await self.zrangebyscore(name, min, max)
+
+        for key in removed:
+            del members[key]
+
+        return len(removed)
+
+    async def publish(self, channel: str, message: str) -> int:
+        return 0
+
+
+class FakeSyncRedis:
+    '''
+    The blocking counterpart of the in-process stand-in, for the clients that
+    use the synchronous Redis API.
+    '''
+
+    def __init__(self) -> None:
+        self.data: dict[str, Any] = {}
+
+    def get(self, name: str) -> Any:
+        return self.data.get(name)
+
+    def set(self, name: str, value: Any, ex: int = None) -> bool:
+        self.data[name] = value
+
+        return True
+
+    def expire(self, name: str, time: int) -> bool:
+        return name in self.data
@@ -0,0 +1,221 @@
+'''
+Microbenchmarks of the functions called on every request, run against the
+in-memory database of the tests at several numbers of contacts per user.
+
+Every measurement fails when the mean time of one call exceeds its threshold,
+so that a regression of a hot path breaks the build. The thresholds are
+generous for slow machines and can be scaled further with the
+BENCHMARK_TOLERANCE variable, and the measured times are printed when pytest
+runs with the -s option.
+'''
+
+from datetime import date
+from os import environ
+from time import perf_counter
+from typing import Awaitable, Callable
+from unittest import IsolatedAsyncioTestCase, main
+
+from pydantic import TypeAdapter
+from sqlalchemy import insert
+
+from src.database import Base, Contact, User
+from src.repository.contacts import birthday, get, read
+from src.schemas.contact import Responses
+from src.services.auth import Token, auth_service
+from tests.engines import new_engine, new_sessionmaker
+from tests.fake_redis import FakeSyncRedis
+
+
+SIZES = (10, 100, 1000)
+
+responses = TypeAdapter(Responses)
+
+TOLERANCE = float(environ.get('BENCHMARK_TOLERANCE', 1))
+
+# The highest mean time of one call in milliseconds: a fixed part and a part
+# per contact of the user.
+THRESHOLDS = {
+    'read': (10, .1),
+    'birthday': (10, .1),
+    'get': (10, 0),
+    'serialize': (1, .3),
+    'create_token': (.5, 0),
+    'decode_token': (.5, 0),
+    'current_user_hit': (1, 0),
+    'current_user_miss': (10, 0),
+    'verify_password': (1000, 0),
+}
+
+
+class TestBenchmarks(IsolatedAsyncioTestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.results: dict[str, dict[int, float]] = {}
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        print(f"\n{'benchmark':<20}{'contacts':>10}{'ms per call':>14}")
+
+        for name, times in cls.results.items():
+            for size, elapsed in times.items():
+                print(f'{name:<20}{size:>10}{elapsed:>14.3f}')
+
+    async def asyncSetUp(self) -> None:
+        self.__engine = new_engine()
+        self.__sessions = new_sessionmaker(self.__engine)
+
+        async with self.__engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+            await conn.execute(insert(User), [{
+                'email': 'jack@post.com',
+                'password': auth_service.get_password_hash('secret'),
+                'verified': True,
+            }])
+
+        self.__cache = auth_service._Auth__cache
+        auth_service._Auth__cache = FakeSyncRedis()
+
+    async def asyncTearDown(self) -> None:
+        auth_service._Auth__cache = self.__cache
+
+        await self.__engine.dispose()
+
+    async def __seed(self, size: int) -> User:
+        async with self.__engine.begin() as conn:
+            await conn.execute(insert(Contact), [
+                {
+                    'first_name': f'Contact {number}',
+                    'email': f'contact{size}.{number}@post.com',
+                    'phone_number': '+380501234567',
+                    'birthday': date(1990, number % 12 + 1, number % 28 + 1),
+                    'bio': 'Bla ' * 50,
+                    'user_id': 1,
+                }
+                for number in range(size)
+            ])
+
+        async with self.__sessions() as db:
+            return await db.get(User, 1)
+
+    async def __measure(
+        self,
+        name: str,
+        call: Callable[[], Awaitable],
+        size: int = 0,
+        repeat: int = 100
+    ) -> None:
+        '''
+        Timing the repeated calls after a warm-up one and comparing the mean
+        time with the threshold.
+
+        :param name: The name of the benchmark.
+        :type name: str
+        :param call: The measured function.
+        :type call: Callable[[], Awaitable]
+        :param size: The number of contacts of the user.
+        :type size: int
+        :param repeat: The number of timed calls.
+        :type repeat: int
+        '''
+
+        await call()
+
+        start = perf_counter()
+
+        for _ in range(repeat):
+            await call()
+
+        elapsed = (perf_counter() - start) / repeat * 1000
+        fixed, per_contact = THRESHOLDS[name]
+        limit = (fixed + per_contact * size) * TOLERANCE
+
+        self.results.setdefault(name, {})[size] = elapsed
+
+        self.assertLess(
+            elapsed,
+            limit,
+            f'{name} with {size} contacts: {elapsed:.3f} ms > {limit:.3f} ms',
+        )
+
+    async def test_repository(self) -> None:
+        seeded = 0
+
+        for size in SIZES:
+            with self.subTest(size=size):
+                user = await self.__seed(size - seeded)
+                seeded = size
+
+                async with self.__sessions() as db:
+                    await self.__measure(
+                        'read',
+                        lambda: read(db, user),
+                        size,
+                        20,
+                    )
+
+                    await self.__measure(
+                        'birthday',
+                        lambda: birthday(db, user, 30),
+                        size,
+                        20,
+                    )
+
+                    await self.__measure('get', lambda: get(db, user, 1), size)
+
+                    contacts = await read(db, user)
+
+                async def serialize() -> None:
+                    responses.dump_json(responses.validate_python(contacts))
+
+                await self.__measure('serialize', serialize, size, 20)
+
+    async def test_tokens(self) -> None:
+        token = await auth_service.create_token(
+            'jack@post.com',
+            Token.ACCESS,
+        )
+
+        await self.__measure(
+            'create_token',
+            lambda: auth_service.create_token('jack@post.com', Token.ACCESS),
+            repeat=1000,
+        )
+
+        await self.__measure(
+            'decode_token',
+            lambda: auth_service.decode_token(token, Token.ACCESS),
+            repeat=1000,
+        )
+
+    async def test_current_user(self) -> None:
+        token = await auth_service.create_token(
+            'jack@post.com',
+            Token.ACCESS,
+        )
+
+        async with self.__sessions() as db:
+            await self.__measure(
+                'current_user_hit',
+                lambda: auth_service.get_current_user(token, db),
+                repeat=1000,
+            )
+
+            async def miss() -> User:
+                auth_service._Auth__cache.data.clear()
+
+                return await auth_service.get_current_user(token, db)
+
+            await self.__measure('current_user_miss', miss)
+
+    async def test_verify_password(self) -> None:
+        hashed = auth_service.get_password_hash('secret')
+
+        async def verify() -> None:
+            self.assertTrue(auth_service.verify_password('secret', hashed))
+
+        await self.__measure('verify_password', verify, repeat=3)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+from unittest.mock import AsyncMock, patch
+
+from fastapi import status
+from fastapi.testclient import TestClient
+
+from src.database import User
+from src.services import cache
+from src.services.auth import auth_service, Token
+from src.services.revocation import revocations
+from tests.fake_redis import FakeRedis
+
+
+def test_logout(client: TestClient, user: User) -> None:
+    token = client.portal.call(
+        auth_service.create_token,
+        user.email,
+        Token.ACCESS,
+    )
+
+    response = client.post(
+        'api/auth/logout',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == status.HTTP_204_NO_CONTENT, response.text
+
+    payload = client.portal.call(auth_service.decode_payload, token)
+
+    assert client.portal.call(revocations.revoked, payload['jti'])
+
+
+def test_signup_conflict(client: TestClient, user: User) -> None:
+    body = {'username': 'apu@post.com', 'password': 'secret'}
+
+    with patch('src.routes.auth.send', AsyncMock()) as send, \
+            patch.object(cache, 'cache', FakeRedis()), \
+            patch.object(
+                auth_service,
+                'get_password_hash',
+                wraps=auth_service.get_password_hash,
+            ) as hashes:
+        response = client.post('api/auth/signup', json=body)
+
+        assert response.status_code == status.HTTP_201_CREATED, response.text
+
+        for email in (user.email, 'apu@post.com', 'apu@post.com'):
+            response = client.post(
+                'api/auth/signup',
+                json=body | {'username': email},
+            )
+
+            assert response.status_code == status.HTTP_409_CONFLICT, \
+                response.text
+
+    assert send.call_count == 1
+    assert hashes.call_count == 2
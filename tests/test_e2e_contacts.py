@@ -0,0 +1,388 @@
+from datetime import date, timedelta
+from unittest.mock import patch
+
+from fastapi import status
+from fastapi.testclient import TestClient
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.database import Change, Stats, User
+from src.repository.stats import reconcile
+from src.services import cache
+from tests.fake_redis import FakeRedis
+
+
+CONTACT = {'first_name': 'Jack', 'email': 'jack.jones@post.com'}
+
+
+def test_conditional_contact(client: TestClient, user: User) -> None:
+    response = client.post('api/contacts/', json=CONTACT)
+
+    assert response.status_code == status.HTTP_201_CREATED, response.text
+
+    url = f"api/contacts/{response.json()['id']}"
+
+    response = client.get(url)
+
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert response.headers['ETag'] == '"1"'
+    assert 'Last-Modified' in response.headers
+
+    response = client.get(url, headers={'If-None-Match': '"1"'})
+
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert not response.content
+
+
+def test_conditional_contacts(client: TestClient, user: User) -> None:
+    response = client.get('api/contacts/')
+
+    assert response.status_code == status.HTTP_200_OK, response.text
+
+    tag = response.headers['ETag']
+
+    response = client.get('api/contacts/', headers={'If-None-Match': tag})
+
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    response = client.get(
+        'api/contacts/',
+        params={'first_name': 'Jack'},
+        headers={'If-None-Match': tag},
+    )
+
+    assert response.status_code == status.HTTP_200_OK, response.text
+
+    contact = client.post(
+        'api/contacts/',
+        json={'first_name': 'Ralph', 'email': 'ralph@post.com'},
+    ).json()
+
+    response = client.get('api/contacts/')
+
+    assert 'Last-Modified' not in response.headers
+
+    tag = response.headers['ETag']
+
+    client.delete(f"api/contacts/{contact['id']}")
+
+    response = client.get('api/contacts/', headers={'If-None-Match': tag})
+
+    assert response.status_code == status.HTTP_200_OK, response.text
+
+
+def test_optimistic_update(client: TestClient, user: User) -> None:
+    response = client.post(
+        'api/contacts/',
+        json={'first_name': 'Bart', 'email': 'bart@post.com'},
+    )
+
+    url = f"api/contacts/{response.json()['id']}"
+    body = {'first_name': 'Bartholomew', 'email': 'bart@post.com'}
+
+    response = client.put(url, json=body, headers={'If-Match': '"1"'})
+
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert response.headers['ETag'] == '"2"'
+    assert response.json()['first_name'] == 'Bartholomew'
+
+    response = client.put(url, json=body, headers={'If-Match': '"1"'})
+
+    assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+
+    response = client.put(url, json=body)
+
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert response.headers['ETag'] == '"3"'
+
+    response = client.put(
+        'api/contacts/1000',
+        json=body,
+        headers={'If-Match': '"1"'},
+    )
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_changes(client: TestClient, user: User) -> None:
+    since = client.get('api/contacts/changes').json()['next']
+
+    first = client.post(
+        'api/contacts/',
+        json={'first_name': 'Lisa', 'email': 'lisa@post.com'},
+    ).json()['id']
+
+    client.put(
+        f'api/contacts/{first}',
+        json={'first_name': 'Liza', 'email': 'lisa@post.com'},
+    )
+
+    second = client.post(
+        'api/contacts/',
+        json={'first_name': 'Maggie', 'email': 'maggie@post.com'},
+    ).json()['id']
+
+    client.delete(f'api/contacts/{first}')
+
+    response = client.get('api/contacts/changes', params={'since': since})
+
+    assert response.status_code == status.HTTP_200_OK, response.text
+
+    data = response.json()
+
+    assert [(item['id'], item['deleted']) for item in data['changes']] == [
+        (second, False),
+        (first, True),
+    ]
+
+    assert data['changes'][0]['contact']['first_name'] == 'Maggie'
+    assert data['next'] == since + 4
+    assert not data['more']
+
+    response = client.get(
+        'api/contacts/changes',
+        params={'since': since, 'limit': 1},
+    )
+
+    assert response.json()['more']
+    assert response.json()['next'] == since + 1
+
+
+def test_queries(client: TestClient, user: User, max_queries) -> None:
+    response = client.post(
+        'api/contacts/',
+        json={'first_name': 'Homer', 'email': 'homer@post.com'},
+    )
+
+    max_queries(response, 5)
+
+    url = f"api/contacts/{response.json()['id']}"
+
+    max_queries(client.get(url), 2)
+    max_queries(client.get('api/contacts/'), 2)
+    max_queries(client.put(url, json=CONTACT | {'email': 'homer@post.com'}), 3)
+
+
+def test_cached_statements(client: TestClient, user: User) -> None:
+    for _ in range(2):
+        response = client.get('api/contacts/', params={'email': 'bart@post.com'})
+
+        assert response.status_code == status.HTTP_200_OK, response.text
+        assert [contact['email'] for contact in response.json()] == \
+            ['bart@post.com']
+
+    response = client.get('metrics')
+
+    assert 'sql_compiled_cache_total{result="cache_hit"}' in response.text
+
+
+def test_cached_responses(client: TestClient, user: User, max_queries) -> None:
+    with patch.object(cache, 'cache', FakeRedis()):
+        first = client.get('api/contacts/')
+
+        assert first.status_code == status.HTTP_200_OK, first.text
+
+        second = client.get('api/contacts/')
+
+        max_queries(second, 0)
+
+        assert second.json() == first.json()
+        assert second.headers['ETag'] == first.headers['ETag']
+
+        response = client.get(
+            'api/contacts/',
+            headers={'If-None-Match': first.headers['ETag']},
+        )
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        max_queries(response, 0)
+
+        client.post(
+            'api/contacts/',
+            json={'first_name': 'Ned', 'email': 'ned@post.com'},
+        )
+
+        response = client.get('api/contacts/')
+
+        assert 'ned@post.com' in [item['email'] for item in response.json()]
+
+        client.put(
+            f"api/contacts/{response.json()[-1]['id']}",
+            json={
+                'first_name': 'Ned',
+                'email': 'ned@post.com',
+                # A leap year, so that any day of the year exists in it.
+                'birthday': str(date.today().replace(year=1984)),
+            },
+        )
+
+        for _ in range(2):
+            response = client.get('api/contacts/birthdays')
+
+            assert response.status_code == status.HTTP_200_OK, response.text
+            assert 'ned@post.com' in \
+                [item['email'] for item in response.json()]
+
+        max_queries(response, 0)
+
+
+def test_idempotent_create(client: TestClient, user: User) -> None:
+    body = {'first_name': 'Moe', 'email': 'moe@post.com'}
+    headers = {'Idempotency-Key': 'moe'}
+
+    with patch.object(cache, 'cache', FakeRedis()):
+        first = client.post('api/contacts/', json=body, headers=headers)
+        second = client.post('api/contacts/', json=body, headers=headers)
+
+    assert first.status_code == status.HTTP_201_CREATED, first.text
+    assert second.status_code == status.HTTP_201_CREATED, second.text
+    assert second.json() == first.json()
+    assert second.headers['Idempotent-Replayed'] == 'true'
+
+    response = client.get('api/contacts/', params={'email': 'moe@post.com'})
+
+    assert len(response.json()) == 1
+
+
+def test_fields(client: TestClient, user: User) -> None:
+    client.post(
+        'api/contacts/',
+        json={
+            'first_name': 'Otto',
+            'email': 'otto@post.com',
+            'phone_number': '+380501234567',
+            'bio': 'Long ' * 50,
+        },
+    )
+
+    response = client.get(
+        'api/contacts/',
+        params={'email': 'otto@post.com', 'fields': 'phone_number,first_name'},
+    )
+
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert response.json() == [{
+        'id': response.json()[0]['id'],
+        'first_name': 'Otto',
+        'phone_number': '+380501234567',
+    }]
+
+    contact = client.get(
+        f"api/contacts/{response.json()[0]['id']}",
+        params={'fields': 'email'},
+    )
+
+    assert contact.json() == {
+        'id': response.json()[0]['id'],
+        'email': 'otto@post.com',
+    }
+    assert contact.headers['ETag'].startswith('W/')
+
+    response = client.get('api/contacts/', params={'fields': 'password'})
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_stats(
+    client: TestClient,
+    user: User,
+    max_queries,
+    session_maker: async_sessionmaker
+) -> None:
+    before = client.get('api/contacts/stats', params={'weeks': 2})
+
+    assert before.status_code == status.HTTP_200_OK, before.text
+    max_queries(before, 2)
+
+    contact = client.post(
+        'api/contacts/',
+        json={
+            'first_name': 'Rod',
+            'email': 'rod@post.com',
+            'birthday': str(date.today().replace(year=1984)),
+        },
+    ).json()
+
+    after = client.get('api/contacts/stats', params={'weeks': 2}).json()
+
+    assert after['total'] == before.json()['total'] + 1
+    assert after['birthdays'] == before.json()['birthdays'] + 1
+    assert after['weeks'][0]['count'] == \
+        before.json()['weeks'][0]['count'] + 1
+    assert len(after['weeks']) == 2
+
+    client.put(
+        f"api/contacts/{contact['id']}",
+        json={
+            'first_name': 'Rod',
+            'email': 'rod@post.com',
+            'birthday': str(
+                (date.today() + timedelta(days=60)).replace(year=1984),
+            ),
+        },
+    )
+
+    after = client.get('api/contacts/stats', params={'weeks': 2}).json()
+
+    assert after['birthdays'] == before.json()['birthdays'] + 1
+    assert after['weeks'][0]['count'] == before.json()['weeks'][0]['count']
+
+    async def drift() -> int:
+        async with session_maker() as db:
+            await db.execute(update(Stats).values(total=0, birthdays=0))
+            await db.commit()
+
+            return await reconcile(db)
+
+    assert client.portal.call(drift) == user.id
+    assert client.get('api/contacts/stats', params={'weeks': 2}).json() == \
+        after
+
+    client.delete(f"api/contacts/{contact['id']}")
+
+    assert client.get('api/contacts/stats', params={'weeks': 2}).json() == \
+        before.json()
+
+
+def test_events_resync(
+    client: TestClient,
+    user: User,
+    session_maker: async_sessionmaker
+) -> None:
+    async def fill() -> int:
+        async with session_maker() as db:
+            since = await db.scalar(
+                select(User.revision).where(User.id == user.id)
+            )
+
+            await db.execute(insert(Change), [
+                {
+                    'user_id': user.id,
+                    'revision': since + number,
+                    'contact_id': number,
+                    'deleted': True,
+                }
+                for number in range(1, 1002)
+            ])
+
+            await db.execute(
+                update(User)
+                .where(User.id == user.id)
+                .values(revision=since + 1001)
+            )
+
+            await db.commit()
+
+            return since
+
+    since = client.portal.call(fill)
+
+    response = client.get(
+        'api/contacts/events',
+        headers={'Last-Event-ID': str(since)},
+    )
+
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert response.text.count('event: change\n') == 1000
+    assert response.text.endswith('event: resync\ndata: {}\n\n')
@@ -1,6 +1,13 @@
+from time import monotonic
+from unittest.mock import patch
+
 from fastapi import status
 from fastapi.testclient import TestClient
 
+from src.services import cache
+from src.services.cache import circuit
+from tests.fake_redis import FakeRedis
+
 
 def test_root(client: TestClient) -> None:
     response = client.get('api/healthchecker')
@@ -11,3 +18,45 @@ def test_root(client: TestClient) -> None:
 
     assert 'message' in data
     assert data['message'] == 'Welcome to FastAPI!'
+
+
+def test_metrics(client: TestClient) -> None:
+    client.get('api/healthchecker')
+
+    response = client.get('metrics')
+
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert 'http_request_duration_seconds_bucket{method="GET",' \
+        'route="/api/healthchecker",le="+Inf"}' in response.text
+    assert 'http_requests_in_flight 1' in response.text
+
+
+def test_readiness(client: TestClient) -> None:
+    response = client.get('api/readiness')
+
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert response.json()['breakers']['redis'] == 'closed'
+
+    with patch.object(circuit, 'failures', circuit.threshold), \
+            patch.object(circuit, 'opened', monotonic()):
+        data = client.get('api/readiness').json()
+
+        assert data['status'] == 'degraded'
+        assert data['breakers']['redis'] == 'open'
+        assert 'breaker_state{dependency="redis"} 2' in \
+            client.get('metrics').text
+
+
+def test_cors(client: TestClient) -> None:
+    with patch.object(cache, 'cache', FakeRedis()):
+        response = client.post(
+            'api/contacts/',
+            json={},
+            headers={
+                'Origin': 'https://contacts.example',
+                'Idempotency-Key': 'x' * 256,
+            },
+        )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST, response.text
+    assert 'Access-Control-Allow-Origin' in response.headers
@@ -0,0 +1,116 @@
+from os.path import join
+from tempfile import TemporaryDirectory
+from unittest import IsolatedAsyncioTestCase, main
+from unittest.mock import patch
+
+from fastapi import HTTPException
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src import database
+from src.database import Replica, read_session, wrote
+from src.services import cache
+
+
+class TestReplicas(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.__directory = TemporaryDirectory()
+        self.__urls = {}
+
+        for name in ('primary', 'replica'):
+            url = 'sqlite+aiosqlite:///' + join(self.__directory.name, name)
+            engine = create_async_engine(url)
+
+            async with engine.begin() as conn:
+                await conn.execute(text('CREATE TABLE origin (name TEXT)'))
+                await conn.execute(
+                    text('INSERT INTO origin VALUES (:name)'),
+                    {'name': name},
+                )
+
+            await engine.dispose()
+
+            self.__urls[name] = url
+
+        self.__primary = create_async_engine(self.__urls['primary'])
+        self.__replica = Replica(0, self.__urls['replica'])
+
+        self.__broken = Replica(
+            1,
+            'sqlite+aiosqlite:///' + join(self.__directory.name, 'no', 'db'),
+        )
+
+        for target, value in (
+            (database, {'engine': self.__primary, 'writes': {}}),
+            (cache, {'cache': None}),
+        ):
+            patcher = patch.multiple(target, **value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def asyncTearDown(self) -> None:
+        for engine in (
+            self.__primary,
+            self.__replica.engine,
+            self.__broken.engine,
+        ):
+            await engine.dispose()
+
+        self.__directory.cleanup()
+
+    async def __origin(self, user_id: int = None) -> str:
+        async with read_session(user_id) as session:
+            return await session.scalar(text('SELECT name FROM origin'))
+
+    async def test_primary_only(self) -> None:
+        with patch.object(database, 'replicas', []):
+            self.assertEqual(await self.__origin(), 'primary')
+
+    async def test_replica(self) -> None:
+        with patch.object(database, 'replicas', [self.__replica]):
+            for _ in range(3):
+                self.assertEqual(await self.__origin(1), 'replica')
+
+    async def test_read_your_writes(self) -> None:
+        with patch.object(database, 'replicas', [self.__replica]):
+            await wrote(1)
+
+            self.assertEqual(await self.__origin(1), 'primary')
+            self.assertEqual(await self.__origin(2), 'replica')
+            self.assertEqual(await self.__origin(), 'replica')
+
+            with patch('src.database.monotonic', return_value=10 ** 9):
+                self.assertEqual(await self.__origin(1), 'replica')
+
+    async def test_ejection(self) -> None:
+        with patch.object(database, 'replicas', [self.__broken]):
+            with self.assertRaises(HTTPException) as context:
+                await self.__origin()
+
+            self.assertEqual(context.exception.status_code, 503)
+            self.assertFalse(self.__broken.healthy)
+            self.assertEqual(await self.__origin(), 'primary')
+
+            with patch('src.database.monotonic', return_value=10 ** 9):
+                self.assertTrue(self.__broken.healthy)
+
+        with patch.object(
+            database,
+            'replicas',
+            [self.__broken, self.__replica],
+        ):
+            for _ in range(2):
+                self.assertEqual(await self.__origin(), 'replica')
+
+    async def test_probe(self) -> None:
+        self.__replica.eject()
+
+        for replica in (self.__broken, self.__replica):
+            await replica.check()
+
+        self.assertFalse(self.__broken.healthy)
+        self.assertTrue(self.__replica.healthy)
+
+
+if __name__ == '__main__':
+    main()
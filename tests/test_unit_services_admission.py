@@ -0,0 +1,108 @@
+from asyncio import Event, create_task, sleep
+from unittest import IsolatedAsyncioTestCase, main
+from unittest.mock import patch
+
+from starlette.types import Receive, Scope, Send
+
+from src.services.admission import AdmissionMiddleware
+from src.services.settings import Admission
+
+
+class App:
+    def __init__(self) -> None:
+        self.release = Event()
+        self.order = []
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.order.append(scope['path'])
+
+        await self.release.wait()
+        await send({'type': 'http.response.start', 'status': 200})
+        await send({'type': 'http.response.body', 'body': b''})
+
+
+async def request(middleware, method: str, path: str) -> tuple[int, dict]:
+    messages = []
+
+    async def receive() -> dict:
+        return {'type': 'http.request'}
+
+    async def send(message: dict) -> None:
+        messages.append(message)
+
+    await middleware(
+        {'type': 'http', 'method': method, 'path': path, 'headers': []},
+        receive,
+        send,
+    )
+
+    return messages[0]['status'], dict(messages[0].get('headers', ()))
+
+
+class TestAdmission(IsolatedAsyncioTestCase):
+    def middleware(self, **settings) -> tuple[App, AdmissionMiddleware]:
+        app = App()
+
+        with patch(
+            'src.services.admission.get_admission',
+            return_value=Admission(**settings),
+        ):
+            return app, AdmissionMiddleware(
+                app,
+                expensive={('POST', '/login')},
+                exempt={'/health'},
+            )
+
+    async def test_shed(self) -> None:
+        app, middleware = self.middleware(concurrency=1, target=.05)
+
+        first = create_task(request(middleware, 'GET', '/contacts'))
+
+        await sleep(0)
+
+        status, headers = await request(middleware, 'GET', '/contacts')
+
+        self.assertEqual(status, 503)
+        self.assertEqual(headers[b'retry-after'], b'1')
+
+        health = create_task(request(middleware, 'GET', '/health'))
+
+        app.release.set()
+
+        self.assertEqual((await first)[0], 200)
+        self.assertEqual((await health)[0], 200)
+        self.assertEqual(middleware.active, 0)
+
+    async def test_priority(self) -> None:
+        app, middleware = self.middleware(
+            concurrency=2,
+            expensive_share=.5,
+            target=5,
+        )
+
+        tasks = [
+            create_task(request(middleware, method, path))
+            for method, path in (
+                ('POST', '/login'),
+                ('POST', '/login'),
+                ('GET', '/contacts'),
+                ('GET', '/birthdays'),
+            )
+        ]
+
+        await sleep(0)
+
+        self.assertEqual(app.order, ['/login', '/contacts'])
+        self.assertEqual(middleware.heavy, 1)
+
+        app.release.set()
+
+        for task in tasks:
+            self.assertEqual((await task)[0], 200)
+
+        self.assertEqual(app.order[2], '/birthdays')
+        self.assertEqual((middleware.active, middleware.heavy), (0, 0))
+
+
+if __name__ == '__main__':
+    main()
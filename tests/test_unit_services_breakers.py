@@ -0,0 +1,125 @@
+from time import monotonic
+from unittest import IsolatedAsyncioTestCase, main
+from unittest.mock import AsyncMock, patch
+
+from redis.exceptions import TimeoutError
+from sqlalchemy import insert
+
+from src.database import Base, User
+from src.services import cache, email
+from src.services.auth import auth_service, Token
+from src.services.breakers import Breaker, Open
+from src.services.limiter import Limiter, Quota
+from tests.engines import new_engine, new_sessionmaker
+
+
+class StalledRedis:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def stall(self, *args, **kwargs) -> None:
+        self.calls += 1
+
+        raise TimeoutError('Timeout reading from socket')
+
+    get = set = pipeline = stall
+
+
+class TestBreaker(IsolatedAsyncioTestCase):
+    async def test_states(self) -> None:
+        breaker = Breaker('test', (OSError,), threshold=2, reset=30)
+
+        for _ in range(2):
+            with self.assertRaises(OSError):
+                async with breaker:
+                    raise OSError
+
+        self.assertEqual(breaker.state, Breaker.OPEN)
+
+        with self.assertRaises(Open):
+            with breaker:
+                ...
+
+        breaker.opened = monotonic() - 30
+
+        self.assertEqual(breaker.state, Breaker.HALF_OPEN)
+
+        with breaker:
+            with self.assertRaises(Open):
+                with breaker:
+                    ...
+
+        self.assertEqual(breaker.state, Breaker.CLOSED)
+
+    async def test_other_errors(self) -> None:
+        breaker = Breaker('test', (OSError,), threshold=1)
+
+        with self.assertRaises(KeyError):
+            with breaker:
+                raise KeyError
+
+        self.assertEqual(breaker.state, Breaker.CLOSED)
+
+
+class TestFallbacks(IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.addCleanup(setattr, cache.circuit, 'failures', 0)
+        self.addCleanup(setattr, email.circuit, 'failures', 0)
+
+    async def test_current_user(self) -> None:
+        engine = new_engine()
+
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+            await conn.execute(insert(User), [
+                {'email': 'jack@post.com', 'password': 'secret'},
+            ])
+
+        token = await auth_service.create_token('jack@post.com', Token.ACCESS)
+        redis = StalledRedis()
+
+        with patch.object(auth_service, '_Auth__cache', redis):
+            async with new_sessionmaker(engine)() as db:
+                for _ in range(10):
+                    user = await auth_service.get_current_user(token, db)
+
+                    self.assertEqual(user.email, 'jack@post.com')
+
+        self.assertEqual(cache.circuit.state, Breaker.OPEN)
+        self.assertEqual(redis.calls, cache.circuit.threshold)
+
+        await engine.dispose()
+
+    async def test_limiter(self) -> None:
+        redis = StalledRedis()
+        limiter = Limiter(Quota(3, 60))
+
+        with patch.object(cache, 'cache', redis):
+            results = [
+                (await limiter.hit(user, 'route'))[2]
+                for user in range(10)
+                for _ in range(4)
+            ]
+
+        self.assertEqual(results, [True, True, True, False] * 10)
+        self.assertLessEqual(redis.calls, cache.circuit.threshold)
+
+    async def test_email(self) -> None:
+        failing = AsyncMock(side_effect=OSError('Connection refused'))
+        outbox = email.Outbox()
+
+        with patch('src.services.email.deliver', failing), \
+                patch.object(email, 'outbox', outbox):
+            await email.send('jack@post.com', 'Confirm', 'host/', 'confirm')
+
+            self.assertEqual(len(outbox), 1)
+
+            with patch('src.services.email.deliver', AsyncMock()):
+                await outbox.drain()
+
+        self.assertEqual(len(outbox), 0)
+
+
+if __name__ == '__main__':
+    main()
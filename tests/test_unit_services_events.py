@@ -0,0 +1,133 @@
+from asyncio import Event, sleep
+from unittest import IsolatedAsyncioTestCase, main
+from unittest.mock import patch
+
+from redis.exceptions import ConnectionError
+
+from src.services import cache
+from src.services.events import Broker
+
+
+class PubSub:
+    def __init__(self, bus: 'Bus') -> None:
+        self.bus = bus
+
+    async def __aenter__(self) -> 'PubSub':
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        pass
+
+    async def psubscribe(self, pattern: str) -> None:
+        self.bus.connections += 1
+
+        if self.bus.connections == 1:
+            raise ConnectionError('Connection reset by peer')
+
+    async def listen(self):
+        yield {'type': 'psubscribe'}
+
+        await self.bus.ready.wait()
+
+        yield {
+            'type': 'pmessage',
+            'channel': 'contacts:1',
+            'data': 'id: 7\n\n',
+        }
+
+        await self.bus.closed.wait()
+
+
+class Bus:
+    def __init__(self) -> None:
+        self.connections = 0
+        self.closed = Event()
+        self.ready = Event()
+
+    def pubsub(self) -> PubSub:
+        return PubSub(self)
+
+
+class TestEvents(IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        cache.cache = None
+
+        self.broker = Broker()
+
+    async def test_publish(self) -> None:
+        subscription = self.broker.subscribe(1)
+
+        await self.broker.publish(1, {'revision': 5, 'id': 2, 'deleted': True})
+        await self.broker.publish(2, {'revision': 6, 'id': 3, 'deleted': True})
+
+        revision, event = await subscription.next(1)
+
+        self.assertEqual(revision, 5)
+        self.assertTrue(event.startswith('id: 5\nevent: change\n'))
+        self.assertIsNone(await subscription.next(0.01))
+
+    async def test_overflow(self) -> None:
+        subscription = self.broker.subscribe(1)
+
+        for revision in range(101):
+            self.broker.dispatch(1, f'id: {revision}\n\n')
+
+        self.assertTrue(subscription.closed)
+
+        for _ in range(100):
+            self.assertIsNotNone(await subscription.next(1))
+
+        self.assertIsNone(await subscription.next(1))
+
+    async def test_stream(self) -> None:
+        subscription = self.broker.subscribe(1)
+
+        for revision in range(1, 4):
+            self.broker.dispatch(1, f'id: {revision}\n\n')
+
+        subscription.closed = True
+
+        events = [
+            event
+            async for event in self.broker.stream(1, subscription, ['old'], 2)
+        ]
+
+        self.assertEqual(events[1:], ['old', 'id: 3\n\n'])
+
+        await self.broker.publish(1, {'revision': 4, 'id': 2, 'deleted': True})
+
+        self.assertTrue(subscription.queue.empty())
+
+    async def test_resync(self) -> None:
+        events = [
+            event
+            async for event in self.broker.stream(1, None, ['old'], 0)
+        ]
+
+        self.assertEqual(events[1:], ['old'])
+
+    async def test_reconnect(self) -> None:
+        stale = self.broker.subscribe(1)
+        cache.cache = Bus()
+
+        with patch.object(Broker, 'BACKOFF', (0, 0)):
+            self.broker.start()
+
+            await sleep(0.01)
+
+            self.assertTrue(stale.closed)
+
+            subscription = self.broker.subscribe(1)
+            cache.cache.ready.set()
+
+            self.assertEqual((await subscription.next(1))[0], 7)
+
+            await self.broker.stop()
+
+        self.assertEqual(cache.cache.connections, 2)
+
+        cache.cache = None
+
+
+if __name__ == '__main__':
+    main()
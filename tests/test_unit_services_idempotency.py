@@ -0,0 +1,104 @@
+from asyncio import gather, sleep
+from unittest import IsolatedAsyncioTestCase, main
+from unittest.mock import patch
+
+from starlette.types import Receive, Scope, Send
+
+from src.services import cache
+from src.services.idempotency import IdempotencyMiddleware
+from tests.fake_redis import FakeRedis
+
+
+class App:
+    def __init__(self, status: int = 201) -> None:
+        self.calls = 0
+        self.status = status
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.calls += 1
+        body = (await receive())['body']
+
+        await sleep(.05)
+        await send({
+            'type': 'http.response.start',
+            'status': self.status,
+            'headers': [(b'content-type', b'application/json')],
+        })
+        await send({
+            'type': 'http.response.body',
+            'body': b'{"id": %d, "body": "%s"}' % (self.calls, body),
+        })
+
+
+async def request(middleware, key: str, body: bytes = b'x') -> tuple:
+    messages = []
+
+    async def receive() -> dict:
+        return {'type': 'http.request', 'body': body}
+
+    async def send(message: dict) -> None:
+        messages.append(message)
+
+    await middleware(
+        {
+            'type': 'http',
+            'method': 'POST',
+            'path': '/contacts',
+            'headers': [(b'idempotency-key', key.encode())] if key else [],
+        },
+        receive,
+        send,
+    )
+
+    return (
+        messages[0]['status'],
+        dict(messages[0]['headers']),
+        messages[1]['body'],
+    )
+
+
+class TestIdempotency(IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        patcher = patch.object(cache, 'cache', FakeRedis())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def middleware(self, app: App) -> IdempotencyMiddleware:
+        return IdempotencyMiddleware(app, {('POST', '/contacts')})
+
+    async def test_replay(self) -> None:
+        app = App()
+        middleware = self.middleware(app)
+
+        first, second, third = await gather(*(
+            request(middleware, 'key') for _ in range(3)
+        ))
+
+        self.assertEqual(app.calls, 1)
+        self.assertEqual(first[2], second[2])
+        self.assertEqual(second, third)
+        self.assertEqual(second[1][b'idempotent-replayed'], b'true')
+
+        later = await request(middleware, 'key')
+
+        self.assertEqual(later[0], 201)
+        self.assertEqual(later[2], first[2])
+        self.assertEqual(app.calls, 1)
+
+        self.assertEqual((await request(middleware, 'key', b'y'))[0], 422)
+        self.assertEqual((await request(middleware, 'other'))[0], 201)
+        self.assertEqual((await request(middleware, ''))[0], 201)
+        self.assertEqual(app.calls, 3)
+
+    async def test_server_error(self) -> None:
+        app = App(500)
+        middleware = self.middleware(app)
+
+        for _ in range(2):
+            self.assertEqual((await request(middleware, 'key'))[0], 500)
+
+        self.assertEqual(app.calls, 2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+from os import environ
+from unittest import IsolatedAsyncioTestCase, main
+from unittest.mock import patch
+
+from src.services import cache
+from src.services.limiter import Limiter, Quota
+from src.services.settings import get_ratelimit
+from tests.fake_redis import FakeRedis
+
+
+class TestLimiter(IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        cache.cache = None
+        get_ratelimit.cache_clear()
+
+    tearDown = setUp
+
+    def test_parse(self) -> None:
+        self.assertEqual(Quota.parse('60/30'), Quota(60, 30, 1))
+        self.assertEqual(Quota.parse('60/30/2'), Quota(60, 30, 2))
+
+    async def test_local(self) -> None:
+        limiter = Limiter(Quota(3, 60))
+
+        for _ in range(3):
+            self.assertTrue((await limiter.hit(1, 'route'))[2])
+
+        self.assertFalse((await limiter.hit(1, 'route'))[2])
+        self.assertTrue((await limiter.hit(2, 'route'))[2])
+        self.assertTrue((await limiter.hit(1, 'other'))[2])
+        self.assertEqual(limiter.rejected, 1)
+
+    async def test_weight(self) -> None:
+        limiter = Limiter(Quota(4, 60, 2))
+
+        self.assertTrue((await limiter.hit(1, 'route'))[2])
+        self.assertTrue((await limiter.hit(1, 'route'))[2])
+        self.assertFalse((await limiter.hit(1, 'route'))[2])
+
+    @patch.dict(environ, {'RATELIMIT_BATCH': '1'})
+    async def test_shared(self) -> None:
+        cache.cache = FakeRedis()
+
+        first, second = Limiter(Quota(4, 60)), Limiter(Quota(4, 60))
+
+        for _ in range(3):
+            self.assertTrue((await first.hit(1, 'route'))[2])
+
+        self.assertTrue((await second.hit(1, 'route'))[2])
+        self.assertFalse((await second.hit(1, 'route'))[2])
+
+    @patch.dict(environ, {'RATELIMIT_BATCH': '1'})
+    async def test_shared_refill(self) -> None:
+        cache.cache = FakeRedis()
+
+        limiters = Limiter(Quota(4, 2)), Limiter(Quota(4, 2))
+        clock = 1000.0
+        allowed = 0
+
+        with patch('src.services.limiter.monotonic', lambda: clock), \
+                patch('src.services.limiter.time', lambda: clock):
+            for step in range(100):
+                clock = 1000 + step / 10
+
+                for limiter in limiters:
+                    allowed += (await limiter.hit(1, 'route'))[2]
+
+        # The initial burst plus four requests per every two seconds.
+        self.assertLessEqual(allowed, 4 + 4 * 10 // 2 + 2)
+
+    @patch.dict(environ, {'RATELIMIT_CAPACITY': '10'})
+    async def test_capacity(self) -> None:
+        limiter = Limiter(Quota(3, 60))
+
+        for user in range(100):
+            await limiter.hit(user, 'route')
+
+        self.assertLessEqual(len(limiter._Limiter__buckets), 10)
+
+
+if __name__ == '__main__':
+    main()
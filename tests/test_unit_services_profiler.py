@@ -0,0 +1,43 @@
+from threading import Thread
+from time import monotonic
+from unittest import TestCase, main
+
+from src.services.profiler import Sampler
+
+
+def busy(seconds: float) -> None:
+    deadline = monotonic() + seconds
+
+    while monotonic() < deadline:
+        ...
+
+
+class TestProfiler(TestCase):
+    def test_sampler(self) -> None:
+        sampler = Sampler()
+        thread = Thread(target=sampler.run, args=(.2,))
+
+        thread.start()
+        busy(.2)
+        thread.join()
+
+        profile = sampler.render()
+
+        self.assertIn('busy (test_unit_services_profiler.py:', profile)
+
+        for line in profile.splitlines():
+            stack, count = line.rsplit(' ', 1)
+
+            self.assertTrue(count.isdigit())
+
+    def test_stop(self) -> None:
+        sampler = Sampler()
+
+        sampler.stop()
+        sampler.run()
+
+        self.assertFalse(sampler.stacks)
+
+
+if __name__ == '__main__':
+    main()
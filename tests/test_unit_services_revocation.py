@@ -0,0 +1,132 @@
+from time import time
+from unittest import IsolatedAsyncioTestCase, TestCase, main
+from unittest.mock import patch
+from uuid import uuid4
+
+from fastapi import HTTPException
+from redis.exceptions import ConnectionError
+from sqlalchemy import insert
+
+from src.database import Base, User
+from src.services import cache
+from src.services.auth import auth_service, Token
+from src.services.revocation import BloomFilter, Revocations
+from tests.engines import new_engine, new_sessionmaker
+from tests.fake_redis import FakeRedis, FakeSyncRedis
+
+
+class TestBloomFilter(TestCase):
+    def test_membership(self) -> None:
+        bloom = BloomFilter(1000, .001)
+        members = [uuid4().hex for _ in range(1000)]
+
+        for member in members:
+            bloom.add(member)
+
+        self.assertTrue(all(member in bloom for member in members))
+
+        positives = sum(uuid4().hex in bloom for _ in range(10000))
+
+        self.assertLess(positives, 100)
+
+
+class TestRevocations(IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        patcher = patch.object(cache, 'cache', FakeRedis())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_shared(self) -> None:
+        first, second = Revocations(), Revocations()
+
+        await first.revoke('stolen', time() + 60)
+
+        self.assertTrue(await first.revoked('stolen'))
+        self.assertFalse(await second.revoked('stolen'))
+        self.assertFalse(await first.revoked('other'))
+
+        await second.sync()
+
+        self.assertTrue(await second.revoked('stolen'))
+
+        with patch('src.services.revocation.time', return_value=time() + 120):
+            self.assertFalse(await second.revoked('stolen'))
+
+            await second.sync()
+
+        self.assertFalse(await second.revoked('stolen'))
+        self.assertFalse(await cache.cache.zrangebyscore('revoked', 0, '+inf'))
+
+    async def test_outage(self) -> None:
+        first, second = Revocations(), Revocations()
+
+        await first.revoke('stolen', time() + 60)
+        await second.sync()
+
+        with patch.object(
+            cache.cache,
+            'pipeline',
+            side_effect=ConnectionError('Connection refused'),
+        ), patch.object(
+            cache.cache,
+            'zadd',
+            side_effect=ConnectionError('Connection refused'),
+        ):
+            await second.sync()
+
+            self.assertTrue(await second.revoked('stolen'))
+
+            await second.revoke('leaked', time() + 60)
+            await second.sync()
+
+            self.assertTrue(await second.revoked('leaked'))
+
+        await second.sync()
+        await first.sync()
+
+        self.assertTrue(await first.revoked('leaked'))
+        self.assertTrue(await second.revoked('stolen'))
+
+    async def test_local(self) -> None:
+        with patch.object(cache, 'cache', None):
+            revocations = Revocations()
+
+            await revocations.revoke('stolen', time() + 60)
+            await revocations.sync()
+
+            self.assertTrue(await revocations.revoked('stolen'))
+            self.assertFalse(await revocations.revoked(None))
+
+    async def test_current_user(self) -> None:
+        engine = new_engine()
+
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+            await conn.execute(insert(User), [
+                {'email': 'jack@post.com', 'password': 'secret'},
+            ])
+
+        token = await auth_service.create_token('jack@post.com', Token.ACCESS)
+        payload = await auth_service.decode_payload(token)
+        revocations = Revocations()
+
+        with patch('src.services.auth.revocations', revocations), \
+                patch.object(auth_service, '_Auth__cache', FakeSyncRedis()):
+            async with new_sessionmaker(engine)() as db:
+                user = await auth_service.get_current_user(token, db)
+
+                self.assertEqual(user.email, 'jack@post.com')
+
+                await revocations.revoke(payload['jti'], payload['exp'])
+
+                with self.assertRaises(HTTPException) as error:
+                    await auth_service.get_current_user(token, db)
+
+                self.assertEqual(error.exception.status_code, 401)
+
+        await engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+from unittest import IsolatedAsyncioTestCase, main
+from unittest.mock import patch
+
+from fastapi import HTTPException
+from sqlalchemy import insert
+
+from src import database
+from src.database import Base, User
+from src.services import cache
+from src.services.auth import auth_service
+from src.services.sessions import Sessions
+from tests.engines import new_engine, new_sessionmaker
+from tests.fake_redis import FakeRedis
+
+
+class TestSessions(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.__engine = new_engine()
+        self.__sessions = new_sessionmaker(self.__engine)
+        self.__cache = FakeRedis()
+
+        async with self.__engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+            await conn.execute(insert(User), [
+                {'email': 'jack@post.com', 'password': 'secret'},
+            ])
+
+        for target, name, value in (
+            (database, 'engine', self.__engine),
+            (cache, 'cache', self.__cache),
+        ):
+            patcher = patch.object(target, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.store = Sessions()
+
+    async def asyncTearDown(self) -> None:
+        await self.__engine.dispose()
+
+    async def __user(self) -> User:
+        async with self.__sessions() as db:
+            return await db.get(User, 1)
+
+    async def __issue(self) -> str:
+        async with self.__sessions() as db:
+            tokens = await self.store.issue(await self.__user(), db)
+
+        return tokens['refresh_token']
+
+    async def __rotate(self, token: str) -> str:
+        async with self.__sessions() as db:
+            tokens = await self.store.rotate(token, db)
+
+        return tokens['refresh_token']
+
+    async def test_rotation(self) -> None:
+        token = await self.__issue()
+        rotated = await self.__rotate(token)
+
+        self.assertNotEqual(rotated, token)
+        self.assertEqual(self.store.pending, 1)
+        self.assertIsNone((await self.__user()).token)
+
+        await self.store.flush()
+
+        self.assertEqual(self.store.pending, 0)
+        self.assertEqual((await self.__user()).token, rotated)
+
+    async def test_reuse(self) -> None:
+        token = await self.__issue()
+        other = await self.__issue()
+        rotated = await self.__rotate(token)
+
+        for stale in (token, rotated, other):
+            with self.assertRaises(HTTPException) as error:
+                await self.__rotate(stale)
+
+            self.assertEqual(error.exception.status_code, 401)
+
+    async def test_lost_cache(self) -> None:
+        token = await self.__rotate(await self.__issue())
+
+        await self.store.flush()
+
+        self.__cache.data.clear()
+
+        self.assertTrue(await self.__rotate(token))
+
+    async def test_end(self) -> None:
+        for flushed in (False, True):
+            token = await self.__issue()
+            payload = await auth_service.decode_payload(token)
+
+            if flushed:
+                await self.store.flush()
+
+            async with self.__sessions() as db:
+                await self.store.end(payload, db)
+
+            self.assertEqual(self.store.pending, 0)
+            self.assertIsNone((await self.__user()).token)
+
+            with self.assertRaises(HTTPException) as error:
+                await self.__rotate(token)
+
+            self.assertEqual(error.exception.status_code, 401)
+
+        self.__cache.data.clear()
+
+        with self.assertRaises(HTTPException):
+            await self.__rotate(token)
+
+    async def test_without_cache(self) -> None:
+        with patch.object(cache, 'cache', None):
+            token = await self.__issue()
+
+            self.assertEqual((await self.__user()).token, token)
+
+            rotated = await self.__rotate(token)
+
+            self.assertEqual((await self.__user()).token, rotated)
+
+            with self.assertRaises(HTTPException):
+                await self.__rotate(token)
+
+            self.assertIsNone((await self.__user()).token)
+
+
+if __name__ == '__main__':
+    main()
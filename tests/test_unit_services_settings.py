@@ -0,0 +1,78 @@
+from os import environ
+from unittest import TestCase, main
+from unittest.mock import patch
+
+from pydantic import ValidationError
+
+from src.services import settings
+
+
+class TestSettings(TestCase):
+    def setUp(self) -> None:
+        for getter in (
+            settings.get_redis,
+            settings.get_jwt,
+            settings.get_ratelimit,
+            settings.get_server,
+        ):
+            getter.cache_clear()
+
+    tearDown = setUp
+
+    def test_parse(self) -> None:
+        with patch.dict(environ, {
+            'REDIS_HOST': 'cache',
+            'REDIS_PORT': '6380',
+            'REDIS_TAG': '7.4.0-alpine3.20',
+        }):
+            redis = settings.get_redis()
+
+        self.assertEqual(redis.host, 'cache')
+        self.assertEqual(redis.port, 6380)
+        self.assertIsNone(redis.password)
+
+    def test_cached(self) -> None:
+        with patch.dict(environ, {'JWT_ALGORITHM': 'HS256'}):
+            jwt = settings.get_jwt()
+
+        with patch.dict(environ, {'JWT_ALGORITHM': 'EdDSA'}):
+            self.assertIs(settings.get_jwt(), jwt)
+
+        self.assertEqual(jwt.algorithm, 'HS256')
+
+    def test_invalid(self) -> None:
+        with patch.dict(environ, {'REDIS_PORT': 'port'}):
+            with self.assertRaises(ValidationError):
+                settings.validate()
+
+    def test_keys(self) -> None:
+        for algorithm in ('HS256', 'EdDSA'):
+            with self.subTest(algorithm=algorithm), patch.dict(environ, {
+                'JWT_ALGORITHM': algorithm,
+                'JWT_SECRET': '',
+                'JWT_PRIVATE_KEY': '',
+            }):
+                with self.assertRaises(ValidationError):
+                    settings.get_jwt()
+
+    def test_optional(self) -> None:
+        with patch.dict(environ, {
+            'SERVER_WORKERS': '',
+            'SERVER_ACCESS_LOG': 'true',
+            'RATELIMIT_ROUTES': '{"read_contacts": "60/60"}',
+        }):
+            server = settings.get_server()
+            limits = settings.get_ratelimit()
+
+        self.assertIsNone(server.workers)
+        self.assertTrue(server.access_log)
+        self.assertEqual(limits.routes, {'read_contacts': '60/60'})
+
+    def test_quota(self) -> None:
+        with patch.dict(environ, {'RATELIMIT_DEFAULT': '60 per minute'}):
+            with self.assertRaises(ValidationError):
+                settings.validate()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+from time import time
+from unittest import TestCase, main
+
+from cryptography.hazmat.primitives.asymmetric.ec import SECP256R1, \
+    generate_private_key as generate_ec_key
+from cryptography.hazmat.primitives.asymmetric.ed25519 import \
+    Ed25519PrivateKey
+from cryptography.hazmat.primitives.asymmetric.rsa import \
+    generate_private_key as generate_rsa_key
+from cryptography.hazmat.primitives.serialization import Encoding, \
+    NoEncryption, PrivateFormat, PublicFormat
+
+from src.services.tokens import InvalidToken, Signer
+
+
+SECRET = 'secret' * 11
+
+
+def keys(private) -> tuple[bytes, bytes]:
+    return (
+        private.private_bytes(
+            Encoding.PEM,
+            PrivateFormat.PKCS8,
+            NoEncryption(),
+        ),
+        private.public_key().public_bytes(
+            Encoding.PEM,
+            PublicFormat.SubjectPublicKeyInfo,
+        ),
+    )
+
+
+class TestSigner(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.keys = {
+            'ES256': keys(generate_ec_key(SECP256R1())),
+            'EdDSA': keys(Ed25519PrivateKey.generate()),
+            'RS256': keys(generate_rsa_key(65537, 2048)),
+        }
+
+    def signers(self) -> dict[str, tuple[Signer, Signer]]:
+        result = {
+            algorithm: (Signer(algorithm, SECRET),) * 2
+            for algorithm in Signer.HMAC
+        }
+
+        for algorithm, (private, public) in self.keys.items():
+            result[algorithm] = (
+                Signer(algorithm, private_key=private),
+                Signer(algorithm, public_key=public),
+            )
+
+        return result
+
+    def test_round_trip(self) -> None:
+        payload = {'sub': 'jack@post.com', 'exp': int(time()) + 60}
+
+        for algorithm, (signer, verifier) in self.signers().items():
+            with self.subTest(algorithm=algorithm):
+                token = signer.encode(payload)
+
+                self.assertEqual(verifier.decode(token), payload)
+
+    def test_invalid(self) -> None:
+        payload = {'sub': 'jack@post.com'}
+        expired = {'sub': 'jack@post.com', 'exp': int(time()) - 1}
+        other = Signer('HS256', SECRET[::-1])
+
+        for algorithm, (signer, verifier) in self.signers().items():
+            with self.subTest(algorithm=algorithm):
+                token = signer.encode(payload)
+                header, body, signature = token.split('.')
+
+                for invalid in (
+                    f'{header}.{body}.{signature[::-1]}',
+                    f'{header}.{other.encode(expired).split(".")[1]}.'
+                    f'{signature}',
+                    other.encode(payload),
+                    signer.encode(expired),
+                    'token',
+                    f'{header}..',
+                ):
+                    with self.assertRaises(InvalidToken):
+                        verifier.decode(invalid)
+
+    def test_claims(self) -> None:
+        signer = Signer('HS256', SECRET, audience='contacts')
+        other = Signer('HS256', SECRET, audience='billing')
+        payload = {'sub': 'jack@post.com'}
+
+        self.assertEqual(
+            signer.decode(signer.encode(payload)),
+            {'aud': 'contacts', **payload},
+        )
+
+        for invalid in (
+            signer.encode({**payload, 'nbf': int(time()) + 60}),
+            other.encode(payload),
+            Signer('HS256', SECRET).encode(payload),
+        ):
+            with self.assertRaises(InvalidToken):
+                signer.decode(invalid)
+
+    def test_public_only(self) -> None:
+        with self.assertRaises(ValueError):
+            Signer('EdDSA', public_key=self.keys['EdDSA'][1]).encode({})
+
+        with self.assertRaises(ValueError):
+            Signer('ES256')
+
+        with self.assertRaises(ValueError):
+            Signer('none')
+
+
+if __name__ == '__main__':
+    main()